@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the docker, docker-compose and terraform executables.
+
+The harness puts wrapper scripts named after each tool on PATH; they run this
+script with the tool name as the first argument. What the fake tool prints is
+decided by the scenario file named in CLEO_FAKE_SCENARIO: the first rule whose
+tool and argument pattern match is replayed with its latency, output, output
+volume and exit code. Every invocation is appended to CLEO_FAKE_LOG.
+"""
+import fnmatch
+import json
+import os
+import sys
+import time
+
+
+def load_scenario():
+    """Load the scenario the harness wrote for this run."""
+    path = os.environ.get("CLEO_FAKE_SCENARIO")
+    if not path:
+        return {"rules": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def find_rule(scenario, tool, args):
+    """Find the first rule matching the tool and its joined arguments."""
+    command_line = " ".join(args)
+    for rule in scenario.get("rules", []):
+        if rule.get("tool", tool) != tool:
+            continue
+        if fnmatch.fnmatchcase(command_line, rule.get("match", "*")):
+            return rule
+    return scenario.get("default", {})
+
+
+def log_invocation(tool, args, started, exit_code):
+    """Append the invocation to the call log."""
+    path = os.environ.get("CLEO_FAKE_LOG")
+    if not path:
+        return
+    entry = {"tool": tool, "args": args, "started": started, "ended": time.time(), "exit_code": exit_code}
+    with open(path, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def main():
+    """Replay the matching rule."""
+    started = time.time()
+    tool, args = sys.argv[1], sys.argv[2:]
+    rule = find_rule(load_scenario(), tool, args)
+    
+    # Drain input piped to the tool, e.g. SQL sent to docker exec -i ... psql
+    if rule.get("stdin", "-i" in args):
+        sys.stdin.read()
+    
+    time.sleep(rule.get("latency", 0))
+    
+    output = rule.get("output", "")
+    if rule.get("output_file"):
+        with open(rule["output_file"]) as f:
+            output = f.read()
+    lines = output.splitlines()
+    repeat = rule.get("repeat", 1)
+    line_delay = rule.get("line_delay", 0)
+    
+    stream = sys.stderr if rule.get("stderr") else sys.stdout
+    for _ in range(repeat):
+        for line in lines:
+            stream.write(line + "\n")
+            if line_delay:
+                stream.flush()
+                time.sleep(line_delay)
+    stream.flush()
+    
+    exit_code = rule.get("exit_code", 0)
+    log_invocation(tool, args, started, exit_code)
+    sys.exit(exit_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Benchmark harness for the CLEO SPA setup orchestration layer.
+
+Runs the compose, database initialization and terraform code paths headlessly
+against fake docker, docker-compose and terraform executables (see fake_tool.py)
+in a temporary project, so the tool's own overhead can be measured on any Linux
+machine without a Docker daemon, AWS account or network.
+
+Usage (from the setup directory):
+    python benchmarks/harness.py
+    python benchmarks/harness.py --only logs,init --lines 50000 --json results.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SETUP_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = SETUP_DIR.parent
+sys.path.insert(0, str(SETUP_DIR))
+
+from cleo_setup.history import percentile  # noqa: E402
+from cleo_setup.utils import log_message  # noqa: E402
+
+FAKE_TOOLS = ["docker", "docker-compose", "terraform"]
+BENCHMARKS = ["spawn", "logs", "init", "terraform"]
+
+
+class FakeVar:
+    """Minimal stand-in for a tkinter variable."""
+    
+    def __init__(self, value=""):
+        self._value = value
+    
+    def get(self):
+        return self._value
+    
+    def set(self, value):
+        self._value = value
+
+
+class FakeConsole:
+    """Collects what would be written to a ScrolledText console."""
+    
+    def __init__(self):
+        self.lines = 0
+        self.bytes = 0
+    
+    def config(self, **kwargs):
+        pass
+    
+    def delete(self, *args):
+        pass
+    
+    def see(self, *args):
+        pass
+    
+    def insert(self, index, text, *tags):
+        self.lines += 1
+        self.bytes += len(text)
+
+
+class FakeApp:
+    """Headless stand-in for DeploymentApp with the attributes the orchestration code reads."""
+    
+    def __init__(self):
+        self.local_db_user = FakeVar("user")
+        self.local_db_password = FakeVar("password")
+        self.local_db_name = FakeVar("my_db")
+        self.local_sim_db_name = FakeVar("sim_db")
+        self.backend_port = FakeVar("3000")
+        self.frontend_port = FakeVar("5173")
+        self.db_port = FakeVar("5432")
+        self.sim_db_port = FakeVar("5433")
+        self.inv_jwt_secret = FakeVar("")
+        self.console = FakeConsole()
+        self.local_console = FakeConsole()
+        self.su_console = FakeConsole()
+    
+    def log_message(self, message, color="white"):
+        log_message(self.console, message, color)
+    
+    def log_local_message(self, message, color="white"):
+        log_message(self.local_console, message, color)
+    
+    def log_su_message(self, message, color="white"):
+        log_message(self.su_console, message, color)
+
+
+class FakeEnvironment:
+    """A temporary project plus fake tools on PATH, driven by a scenario file."""
+    
+    def __init__(self, sql_files=None):
+        self.root = Path(tempfile.mkdtemp(prefix="cleo-bench-"))
+        self.bin_dir = self.root / "bin"
+        self.project = self.root / "project"
+        self.scenario_path = self.root / "scenario.json"
+        self.log_path = self.root / "calls.jsonl"
+        self._saved_env = {}
+        self._create_project(sql_files)
+        self._create_tools()
+    
+    def _create_project(self, sql_files):
+        """Create a project with the repository's compose file, SQL and terraform files."""
+        self.project.mkdir(parents=True)
+        for name in ("compose.yml",):
+            if (REPO_ROOT / name).exists():
+                shutil.copy(REPO_ROOT / name, self.project / name)
+        sql_dir = self.project / "server" / "sql"
+        if sql_files is None and (REPO_ROOT / "server" / "sql").exists():
+            shutil.copytree(REPO_ROOT / "server" / "sql", sql_dir)
+        else:
+            # Synthetic files: schema.sql plus the rest spread over subdirectories
+            sql_dir.mkdir(parents=True)
+            (sql_dir / "schema.sql").write_text("CREATE TABLE members (id int);\n")
+            for index in range((sql_files or 1) - 1):
+                subdir = sql_dir / f"group{index % 5}"
+                subdir.mkdir(exist_ok=True)
+                (subdir / f"function_{index}.sql").write_text(f"SELECT {index};\n")
+        (self.project / "terraform").mkdir()
+        if (REPO_ROOT / "terraform" / "main.tf").exists():
+            shutil.copy(REPO_ROOT / "terraform" / "main.tf", self.project / "terraform" / "main.tf")
+    
+    def _create_tools(self):
+        """Put wrapper scripts for each fake tool in the bin directory."""
+        self.bin_dir.mkdir()
+        fake_tool = Path(__file__).resolve().parent / "fake_tool.py"
+        for tool in FAKE_TOOLS:
+            wrapper = self.bin_dir / tool
+            wrapper.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{fake_tool}" {tool} "$@"\n')
+            wrapper.chmod(0o755)
+    
+    def sql_file_count(self):
+        """Number of SQL files initialize_databases runs per database."""
+        return len(list((self.project / "server" / "sql").rglob("*.sql")))
+    
+    def set_scenario(self, rules, default=None):
+        """Write the rules the fake tools replay."""
+        with open(self.scenario_path, "w") as f:
+            json.dump({"rules": rules, "default": default or {}}, f)
+        if self.log_path.exists():
+            self.log_path.unlink()
+    
+    def calls(self):
+        """Return the invocations logged by the fake tools."""
+        if not self.log_path.exists():
+            return []
+        with open(self.log_path) as f:
+            return [json.loads(line) for line in f]
+    
+    def __enter__(self):
+        updates = {
+            "PATH": f"{self.bin_dir}{os.pathsep}{os.environ.get('PATH', '')}",
+            "CLEO_FAKE_SCENARIO": str(self.scenario_path),
+            "CLEO_FAKE_LOG": str(self.log_path),
+            "CLEO_SPA_PROJECT_PATH": str(self.project),
+        }
+        for key, value in updates.items():
+            self._saved_env[key] = os.environ.get(key)
+            os.environ[key] = value
+        return self
+    
+    def __exit__(self, *exc_info):
+        for key, value in self._saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(self.root, ignore_errors=True)
+        return False
+
+
+def database_rules(sql_latency=0.0, ready_latency=0.0):
+    """Rules that answer the container lookups and psql calls of initialize_databases."""
+    return [
+        {"tool": "docker-compose", "match": "* ps -q db", "output": "cid-db"},
+        {"tool": "docker-compose", "match": "* ps -q db-sim", "output": "cid-db-sim"},
+        {"tool": "docker", "match": "inspect --format * cid-db", "output": "/project-db-1"},
+        {"tool": "docker", "match": "inspect --format * cid-db-sim", "output": "/project-db-sim-1"},
+        {"tool": "docker", "match": "exec * pg_isready *", "output": "localhost:5432 - accepting connections",
+         "latency": ready_latency},
+        {"tool": "docker", "match": "exec * psql * -c *", "output": " count \n-------\n     0\n(1 row)"},
+        {"tool": "docker", "match": "exec -i * psql *", "output": "CREATE FUNCTION", "latency": sql_latency},
+        {"tool": "docker", "match": "--version", "output": "Docker version 0.0.0-fake"},
+        {"tool": "docker", "match": "version *", "output": "0.0.0-fake"},
+    ]
+
+
+def terraform_events(resources):
+    """Build a terraform -json event stream for destroying the given number of resources."""
+    lines = [json.dumps({"@level": "info", "@message": "Terraform 1.9.0", "type": "version"})]
+    for index in range(resources):
+        hook = {"resource": {"addr": f"aws_security_group.bench[{index}]"}, "action": "delete"}
+        lines.append(json.dumps({"type": "apply_start", "hook": hook}))
+        lines.append(json.dumps({"type": "apply_progress", "hook": dict(hook, elapsed_seconds=10)}))
+        lines.append(json.dumps({"type": "apply_complete", "hook": dict(hook, elapsed_seconds=12)}))
+    lines.append(json.dumps({"@message": f"Destroy complete! Resources: {resources} destroyed.", "type": "change_summary"}))
+    return "\n".join(lines)
+
+
+def _summary(samples):
+    """Summarize timing samples in milliseconds."""
+    return {
+        "runs": len(samples),
+        "mean_ms": statistics.mean(samples) * 1000,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+    }
+
+
+def bench_spawn(env, app, args):
+    """Process spawn cost: a bare fake tool call versus a container lookup."""
+    import subprocess
+    from cleo_setup.local_development import get_database_container_name
+    
+    env.set_scenario(database_rules())
+    bare = []
+    for _ in range(args.spawns):
+        start = time.perf_counter()
+        subprocess.run(["docker", "--version"], capture_output=True)
+        bare.append(time.perf_counter() - start)
+    
+    lookups = []
+    for _ in range(args.spawns):
+        start = time.perf_counter()
+        get_database_container_name(app, "db")
+        lookups.append(time.perf_counter() - start)
+    
+    lookup_calls = len(env.calls()) - args.spawns
+    return {
+        "bare_tool_call": _summary(bare),
+        "container_lookup": _summary(lookups),
+        "processes_per_lookup": lookup_calls / args.spawns,
+    }
+
+
+def bench_logs(env, app, args):
+    """Console throughput of streamed docker-compose output."""
+    from cleo_setup.local_development import _run_docker_compose_command
+    
+    line = "backend-1  | " + "x" * (args.line_length - 13)
+    env.set_scenario([{"tool": "docker-compose", "match": "* down", "output": line, "repeat": args.lines}])
+    start = time.perf_counter()
+    _run_docker_compose_command(app, "down", env.project)
+    elapsed = time.perf_counter() - start
+    return {
+        "lines": app.local_console.lines,
+        "seconds": elapsed,
+        "lines_per_second": app.local_console.lines / elapsed,
+        "mb_per_second": app.local_console.bytes / elapsed / (1024 * 1024),
+    }
+
+
+def bench_init(env, app, args):
+    """End-to-end database initialization, separating modeled latency from tool overhead."""
+    from cleo_setup.local_development import initialize_databases
+    
+    env.set_scenario(database_rules(sql_latency=args.sql_latency, ready_latency=args.ready_latency))
+    samples = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        initialize_databases(app, force=True)
+        samples.append(time.perf_counter() - start)
+    
+    files = env.sql_file_count()
+    modeled = 2 * (files * args.sql_latency + args.ready_latency)
+    calls = len(env.calls()) / args.repeat
+    return {
+        "sql_files_per_database": files,
+        "processes_per_run": calls,
+        "total": _summary(samples),
+        "modeled_latency_ms": modeled * 1000,
+        "overhead_ms": (statistics.mean(samples) - modeled) * 1000,
+        "overhead_per_process_ms": (statistics.mean(samples) - modeled) * 1000 / calls if calls else None,
+    }
+
+
+def bench_terraform(env, app, args):
+    """Parsing and display of a terraform -json event stream."""
+    from cleo_setup.aws_deployment import _run_terraform_in_docker
+    
+    env.set_scenario([{"tool": "docker", "match": "run * hashicorp/terraform:latest destroy *",
+                       "output": terraform_events(args.resources)}])
+    start = time.perf_counter()
+    _run_terraform_in_docker(app, "destroy")
+    elapsed = time.perf_counter() - start
+    events = 3 * args.resources + 2
+    return {
+        "events": events,
+        "seconds": elapsed,
+        "events_per_second": events / elapsed,
+        "console_lines": app.console.lines,
+    }
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark the CLEO SPA setup orchestration against fake tools")
+    parser.add_argument("--only", type=str, default=",".join(BENCHMARKS),
+                        help=f"Comma-separated benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--spawns", type=int, default=20, help="Process spawns per spawn benchmark")
+    parser.add_argument("--lines", type=int, default=20000, help="Lines of compose output to stream")
+    parser.add_argument("--line-length", type=int, default=120, help="Length of each compose output line")
+    parser.add_argument("--sql-files", type=int, default=None,
+                        help="Use this many synthetic SQL files instead of server/sql")
+    parser.add_argument("--sql-latency", type=float, default=0.0, help="Seconds each psql call takes")
+    parser.add_argument("--ready-latency", type=float, default=0.0, help="Seconds each pg_isready call takes")
+    parser.add_argument("--resources", type=int, default=500, help="Resources in the terraform event stream")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of the init benchmark")
+    parser.add_argument("--json", type=str, default=None, help="Write the results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    """Run the selected benchmarks and print the results."""
+    if sys.platform == "win32":
+        print("The benchmark harness uses shell wrappers and only runs on Linux and macOS.")
+        sys.exit(1)
+    
+    args = parse_arguments()
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+        sys.exit(1)
+    
+    benchmarks = {"spawn": bench_spawn, "logs": bench_logs, "init": bench_init, "terraform": bench_terraform}
+    results = {}
+    for name in selected:
+        # Each benchmark gets a fresh project and app so results do not interfere
+        with FakeEnvironment(args.sql_files) as env:
+            results[name] = benchmarks[name](env, FakeApp(), args)
+        print(f"\n[{name}]")
+        for key, value in results[name].items():
+            if isinstance(value, dict):
+                value = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in value.items())
+            elif isinstance(value, float):
+                value = f"{value:.2f}"
+            print(f"  {key}: {value}")
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
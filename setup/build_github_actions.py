@@ -8,8 +8,31 @@ import sys
 import subprocess
 import shutil
 import argparse
+import ast
+import hashlib
+import json
+from collections import defaultdict
 from pathlib import Path
 import importlib.metadata
+import importlib.util
+
+# Patterns excluded from the bundled project files, by profile
+EXCLUDE_PROFILES = {
+    "default": [
+        '*.log', '__pycache__', '*.pyc', '.git*',
+        'node_modules', '**/node_modules', 'node_modules/**',
+        'dist', 'build', '.env', '.env.local', '.env.production',
+        # Saved terraform plans can contain secrets
+        '*.tfplan', '*.tfplan.meta.json'
+    ],
+}
+EXCLUDE_PROFILES["lean"] = EXCLUDE_PROFILES["default"] + [
+    '.DS_Store', '*.map', 'coverage', '__tests__', '*.test.*', '*.spec.*',
+    '.terraform', '*.tfstate', '*.tfstate.backup'
+]
+EXCLUDE_PROFILES["minimal"] = EXCLUDE_PROFILES["lean"] + [
+    '*.md', 'README*', 'scripts', '*.psd', '*.mp4'
+]
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -17,6 +40,13 @@ def parse_arguments():
     parser.add_argument('--version', type=str, default=None, help='Version to use for the build')
     parser.add_argument('--platform', type=str, choices=['windows', 'macos', 'linux'], 
                         default=None, help='Target platform for the build')
+    parser.add_argument('--mode', type=str, choices=['onefile', 'onedir'], default='onefile',
+                        help='Distribution layout: a single self-extracting file, or a directory '
+                             'that starts without unpacking anything')
+    parser.add_argument('--exclude-profile', type=str, choices=sorted(EXCLUDE_PROFILES), default='default',
+                        help='Set of file patterns left out of the bundled project files')
+    parser.add_argument('--exclude', type=str, action='append', default=[],
+                        help='Additional file pattern to leave out of the bundle (repeatable)')
     return parser.parse_args()
 
 def get_version(specified_version=None):
@@ -116,10 +146,13 @@ def copy_resources():
     create_icon_file(resource_dir)
     print("  Resource files prepared for bundling with project files")
 
-def bundle_project_files():
+def bundle_project_files(exclude_patterns=None):
     """Bundle all project files into the resources directory for extraction."""
     print("Bundling entire project files for installer...")
     
+    if exclude_patterns is None:
+        exclude_patterns = EXCLUDE_PROFILES["default"]
+    
     # Create project_files directory in resources
     project_files_dir = Path("cleo_setup/resources/project_files")
     project_files_dir.mkdir(exist_ok=True, parents=True)
@@ -155,11 +188,7 @@ def bundle_project_files():
             
             # Copy the entire directory
             shutil.copytree(source_dir, target_dir, 
-                          ignore=shutil.ignore_patterns(
-                              '*.log', '__pycache__', '*.pyc', '.git*', 
-                              'node_modules', '**/node_modules', 'node_modules/**',
-                              'dist', 'build', '.env', '.env.local', '.env.production'
-                          ))
+                          ignore=shutil.ignore_patterns(*exclude_patterns))
         else:
             print(f"  Warning: Directory not found: {dir_name}")
     
@@ -177,6 +206,273 @@ def bundle_project_files():
     print(f"  Project files bundled in: {project_files_dir}")
     return project_files_dir
 
+def compile_seed_fixtures(project_files_dir):
+    """
+    Compile the bundled seed states into binary COPY files in resources/seed_fixtures.
+    
+    Operators then load seeds by streaming these files into COPY instead of
+    parsing the CSVs on their machine. The fixture dialog ships in every build,
+    so a compile failure fails the build.
+    
+    Raises:
+        RuntimeError: When the fixtures cannot be compiled.
+    """
+    print("Compiling seed fixtures...")
+    fixtures_dir = project_files_dir.parent / "seed_fixtures"
+    if fixtures_dir.exists():
+        shutil.rmtree(fixtures_dir)
+    
+    # Compile from the bundled copies so the fixtures match the seeds that ship
+    env = dict(os.environ, CLEO_SPA_PROJECT_PATH=str(project_files_dir.resolve()))
+    result = subprocess.run(
+        [sys.executable, "-m", "cleo_setup.seed_fixtures", "compile", "--output", str(fixtures_dir)],
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not compile seed fixtures: {result.stderr.strip()[-500:]}")
+    print(f"  {result.stdout.strip().splitlines()[-1]}")
+    return fixtures_dir
+
+def hash_tree(root_dir):
+    """Return a mapping of relative path -> [size, sha256] for every file under root_dir."""
+    files = {}
+    for file_path in sorted(root_dir.rglob("*")):
+        if not file_path.is_file():
+            continue
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        rel_path = file_path.relative_to(root_dir).as_posix()
+        files[rel_path] = [file_path.stat().st_size, digest.hexdigest()]
+    return files
+
+def deduplicate_bundle(project_files_dir, files):
+    """
+    Keep only one copy of each distinct file in the bundle.
+    
+    Duplicate copies are removed from the bundle and recorded as links to the
+    copy that is kept; the installer recreates them on extraction.
+    
+    Returns:
+        dict: Mapping of removed relative path -> relative path of the kept copy
+    """
+    print("Deduplicating bundled project files...")
+    canonical_by_digest = {}
+    links = {}
+    saved_bytes = 0
+    for rel_path, (size, digest) in files.items():
+        if size == 0:
+            continue
+        canonical = canonical_by_digest.setdefault(digest, rel_path)
+        if canonical != rel_path:
+            (project_files_dir / rel_path).unlink()
+            links[rel_path] = canonical
+            saved_bytes += size
+    
+    print(f"  Removed {len(links)} duplicate files ({saved_bytes / (1024 * 1024):.2f} MB)")
+    return links
+
+def write_bundle_manifest(project_files_dir, version, files, links=None):
+    """
+    Write a manifest describing every bundled project file.
+    
+    The installer compares this manifest against the one stamped into an existing
+    installation so unchanged files are skipped instead of being extracted again.
+    """
+    print("Writing bundle manifest...")
+    
+    # The bundle id changes whenever any file content changes
+    bundle_digest = hashlib.sha256(json.dumps(files, sort_keys=True).encode("utf-8"))
+    manifest = {
+        "bundle_id": f"{version}-{bundle_digest.hexdigest()[:16]}",
+        "version": version,
+        "files": files,
+        "links": links or {}
+    }
+    
+    manifest_path = project_files_dir.parent / "bundle_manifest.json"
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    
+    print(f"  {len(files)} files recorded in {manifest_path} (bundle {manifest['bundle_id']})")
+    return manifest_path
+
+def load_resource_database_module():
+    """Load cleo_setup/utils/database.py directly, so the build does not import the GUI package."""
+    spec = importlib.util.spec_from_file_location("cleo_resource_database", "cleo_setup/utils/database.py")
+    database = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(database)
+    return database
+
+def write_resource_manifest(project_files_dir, files, links):
+    """
+    Write a manifest mapping logical resource names to their location in the bundle.
+    
+    At runtime the frozen executable answers resource lookups from this manifest
+    instead of probing candidate paths.
+    """
+    print("Writing resource manifest...")
+    resource_dir = project_files_dir.parent
+    resources = {}
+    
+    # Files shipped directly in the resources directory
+    for file_path in sorted(resource_dir.iterdir()):
+        if file_path.is_file() and not file_path.name.endswith(("_manifest.json", ".db")):
+            resources[file_path.name] = {
+                "path": file_path.name,
+                "size": file_path.stat().st_size,
+                "sha256": hashlib.sha256(file_path.read_bytes()).hexdigest()
+            }
+    
+    # Templates resolved from the bundled project files
+    for name, candidates in load_resource_database_module().RESOURCE_CANDIDATES.items():
+        for candidate in candidates:
+            if candidate in files:
+                size, digest = files[candidate]
+                stored_path = links.get(candidate, candidate)
+                resources[name] = {
+                    "path": f"{project_files_dir.name}/{stored_path}",
+                    "size": size,
+                    "sha256": digest
+                }
+                break
+        else:
+            print(f"  Warning: No bundled file found for resource: {name}")
+    
+    manifest_path = resource_dir / "resource_manifest.json"
+    with open(manifest_path, "w") as f:
+        json.dump({"resources": resources}, f, indent=2)
+    
+    print(f"  {len(resources)} resources recorded in {manifest_path}")
+    return manifest_path
+
+def build_resource_database(project_files_dir, files):
+    """
+    Store templates and assets compressed in resources/resources.db.
+    
+    The frozen executable loads templates from this database with one indexed
+    query and extracts them only when the copy on disk differs.
+    """
+    print("Building resource database...")
+    resource_dir = project_files_dir.parent
+    
+    database = load_resource_database_module()
+    
+    sources = {}
+    for file_path in sorted(resource_dir.iterdir()):
+        if file_path.is_file() and not file_path.name.endswith(("_manifest.json", ".db")):
+            sources[file_path.name] = file_path
+    for name, candidates in database.RESOURCE_CANDIDATES.items():
+        for candidate in candidates:
+            if candidate in files:
+                sources[name] = project_files_dir / candidate
+                break
+    
+    db_path = resource_dir / database.RESOURCE_DB_NAME
+    stats = database.create_resource_database(db_path, sources)
+    print(f"  {stats['resources']} resources stored in {db_path} "
+          f"({stats['raw_bytes'] / 1024:.1f} KB -> {stats['stored_bytes'] / 1024:.1f} KB)")
+    return db_path
+
+def _collect_toc_entries(node, entries):
+    """Recursively collect (name, path, typecode) entries from a parsed PyInstaller TOC."""
+    if isinstance(node, (list, tuple)):
+        if len(node) == 3 and all(isinstance(item, str) for item in node):
+            entries.append(node)
+        else:
+            for item in node:
+                _collect_toc_entries(item, entries)
+
+def collect_pyinstaller_modules(name="CLEO_SPA_SETUP"):
+    """
+    Summarise the Python modules and binaries PyInstaller pulled into the build.
+    
+    Returns:
+        dict: Bytes and module counts per top-level package, or None if unavailable
+    """
+    build_dir = Path("build") / name
+    entries = []
+    for toc_path in sorted(build_dir.glob("*.toc")):
+        try:
+            _collect_toc_entries(ast.literal_eval(toc_path.read_text()), entries)
+        except (OSError, ValueError, SyntaxError):
+            continue
+    
+    if not entries:
+        return None
+    
+    packages = defaultdict(lambda: {"bytes": 0, "modules": 0})
+    seen = set()
+    for entry_name, entry_path, typecode in entries:
+        if typecode not in ("PYMODULE", "EXTENSION", "BINARY") or entry_name in seen:
+            continue
+        seen.add(entry_name)
+        top_level = entry_name.replace("\\", "/").split("/")[0].split(".")[0]
+        package = packages[f"{top_level} ({typecode.lower()})"]
+        package["modules"] += 1
+        if entry_path and os.path.isfile(entry_path):
+            package["bytes"] += os.path.getsize(entry_path)
+    
+    return dict(sorted(packages.items(), key=lambda item: item[1]["bytes"], reverse=True))
+
+def write_size_report(project_files_dir, files, links, platform, mode, top_n=25):
+    """Write a size report for the bundle and the built executable to dist/size_report.json."""
+    print("Generating bundle size report...")
+    by_directory = defaultdict(int)
+    by_file_type = defaultdict(int)
+    for rel_path, (size, _) in files.items():
+        if rel_path in links:
+            continue
+        by_directory[rel_path.split("/")[0]] += size
+        by_file_type[Path(rel_path).suffix.lower() or "(none)"] += size
+    
+    largest_files = sorted(
+        ((rel_path, size) for rel_path, (size, _) in files.items() if rel_path not in links),
+        key=lambda item: item[1], reverse=True
+    )[:top_n]
+    
+    dist_path = Path("dist")
+    artifact_bytes = sum(f.stat().st_size for f in dist_path.glob("**/*") if f.is_file() and f.suffix != ".zip")
+    
+    report = {
+        "platform": platform,
+        "mode": mode,
+        "artifact_bytes": artifact_bytes,
+        "bundle_bytes": sum(size for rel_path, (size, _) in files.items() if rel_path not in links),
+        "deduplicated_bytes": sum(files[rel_path][0] for rel_path in links),
+        "by_directory": dict(sorted(by_directory.items(), key=lambda item: item[1], reverse=True)),
+        "by_file_type": dict(sorted(by_file_type.items(), key=lambda item: item[1], reverse=True)),
+        "largest_files": [{"path": rel_path, "bytes": size} for rel_path, size in largest_files],
+        "python_packages": collect_pyinstaller_modules()
+    }
+    
+    report_path = dist_path / "size_report.json"
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    
+    def mb(value):
+        return f"{value / (1024 * 1024):8.2f} MB"
+    
+    print(f"  Artifact size: {mb(report['artifact_bytes'])}")
+    print(f"  Bundled project files: {mb(report['bundle_bytes'])} "
+          f"(saved {mb(report['deduplicated_bytes']).strip()} by deduplication)")
+    print("  By top-level directory:")
+    for name, size in list(report["by_directory"].items())[:10]:
+        print(f"    {mb(size)}  {name}")
+    print("  By file type:")
+    for name, size in list(report["by_file_type"].items())[:10]:
+        print(f"    {mb(size)}  {name}")
+    print("  Largest files:")
+    for item in report["largest_files"][:10]:
+        print(f"    {mb(item['bytes'])}  {item['path']}")
+    if report["python_packages"]:
+        print("  Largest Python packages:")
+        for name, info in list(report["python_packages"].items())[:10]:
+            print(f"    {mb(info['bytes'])}  {name} - {info['modules']} modules")
+    print(f"  Full report written to {report_path}")
+    return report_path
+
 def create_icon_file(resource_dir):
     """Create an appropriate icon file for Windows executable."""
     try:
@@ -301,18 +597,21 @@ def create_simple_icon_with_code(icon_path):
         print(f"  Error creating basic icon file: {e}")
         return None
 
-def create_executable(platform):
+def create_executable(platform, mode="onefile"):
     """Build the executable using PyInstaller."""
-    print(f"Building executable for {platform} with PyInstaller...")
+    print(f"Building {mode} executable for {platform} with PyInstaller...")
     
     # Set the separator based on the platform
     separator = ";" if sys.platform == "win32" else ":"
     
     # Create PyInstaller command arguments
-    pyinstaller_args = [
-        "--name=CLEO_SPA_SETUP",
-        "--onefile",  # Create a single executable file
-    ]
+    pyinstaller_args = ["--name=CLEO_SPA_SETUP"]
+    if mode == "onedir":
+        # Directory layout - the executable is a small launcher next to its files,
+        # so nothing is unpacked to a temporary directory on launch
+        pyinstaller_args.append("--onedir")
+    else:
+        pyinstaller_args.append("--onefile")  # Create a single executable file
     
     # Add windowed flag on Windows and macOS
     if sys.platform in ["win32", "darwin"]:
@@ -379,10 +678,17 @@ def create_executable(platform):
             print(f"Error during fallback PyInstaller execution: {e2}")
             sys.exit(1)
 
-def verify_executable(platform, version):
+def verify_executable(platform, version, mode="onefile"):
     """Verify the executable was created successfully."""
     # Determine the executable name based on platform
-    if platform == "windows":
+    if mode == "onedir" and platform != "macos":
+        exe_name = "CLEO_SPA_SETUP.exe" if platform == "windows" else "CLEO_SPA_SETUP"
+        launcher_path = Path("dist/CLEO_SPA_SETUP") / exe_name
+        if not launcher_path.exists():
+            print("\nBuild failed: Launcher not found in onedir build.")
+            sys.exit(1)
+        exe_path = Path("dist/CLEO_SPA_SETUP")
+    elif platform == "windows":
         exe_path = Path("dist/CLEO_SPA_SETUP.exe")
     elif platform == "macos":
         # Check for .app bundle on macOS
@@ -398,7 +704,7 @@ def verify_executable(platform, version):
         print(f"\nBuild successful! Executable created at: {exe_path.absolute()}")
         
         # Check file size
-        if exe_path.is_dir():  # macOS .app bundle
+        if exe_path.is_dir():  # macOS .app bundle or onedir build
             size_mb = sum(f.stat().st_size for f in exe_path.glob('**/*') if f.is_file()) / (1024 * 1024)
         else:
             size_mb = exe_path.stat().st_size / (1024 * 1024)
@@ -410,6 +716,11 @@ def verify_executable(platform, version):
             os.chmod(exe_path, 0o755)
             print(f"Made the executable file executable (chmod +x)")
         
+        # Onedir builds are shipped as a single archive of the directory
+        if mode == "onedir" and platform != "macos":
+            archive_path = shutil.make_archive(f"dist/CLEO_SPA_SETUP_{platform}", "zip", "dist", "CLEO_SPA_SETUP")
+            print(f"Onedir archive created at: {Path(archive_path).absolute()}")
+        
         print(f"\nBuild for {platform} completed successfully!")
         print(f"Version: {version}")
     else:
@@ -454,7 +765,7 @@ def main():
     version = get_version(args.version)
     platform = get_platform(args.platform)
     
-    print(f"Building CLEO SPA SETUP version {version} for {platform}")
+    print(f"Building CLEO SPA SETUP version {version} for {platform} ({args.mode})")
     
     # Check if we're in the correct directory
     if not Path("setup.py").exists():
@@ -492,9 +803,17 @@ if __name__ == "__main__":
         install_dependencies()
         clean_build_directories()
         copy_resources()
-        bundle_project_files()  # Bundle all project files
-        create_executable(platform)
-        verify_executable(platform, version)
+        exclude_patterns = EXCLUDE_PROFILES[args.exclude_profile] + args.exclude
+        project_files_dir = bundle_project_files(exclude_patterns)  # Bundle all project files
+        compile_seed_fixtures(project_files_dir)
+        bundle_files = hash_tree(project_files_dir)
+        links = deduplicate_bundle(project_files_dir, bundle_files)
+        write_bundle_manifest(project_files_dir, version, bundle_files, links)
+        write_resource_manifest(project_files_dir, bundle_files, links)
+        build_resource_database(project_files_dir, bundle_files)
+        create_executable(platform, args.mode)
+        verify_executable(platform, version, args.mode)
+        write_size_report(project_files_dir, bundle_files, links, platform, args.mode)
         print("\nDone!")
     except Exception as e:
         print(f"\nBuild failed with error: {e}")
@@ -14,10 +14,14 @@ from pathlib import Path
 import secrets
 import string
 
-from .aws_deployment import run_terraform_command, extract_and_display_outputs
+from .aws_deployment import run_terraform_command, extract_and_display_outputs, build_provider_mirror, provider_mirror_available
 from .local_development import setup_local_dev_tab, update_docker_compose_config, run_docker_compose_command
 from .super_admin import setup_super_admin_tab
+from .prewarm import start_prewarm
+from .history import setup_history_tab
+from .load_testing import setup_load_testing_tab
 from .utils import check_docker, log_message
+from .utils.env import EnvStore, write_file_atomic
 
 
 class DeploymentApp:
@@ -56,15 +60,25 @@ class DeploymentApp:
         # Project settings
         self.project_name = tk.StringVar(value="cleo-spa-app")  # Default
         
+        # Terraform settings
+        self.use_provider_mirror = tk.BooleanVar(value=provider_mirror_available())
+        
         # Console output references
         self.console = None
         self.local_console = None
         
+        # Docker image prewarm status, shown below the tabs
+        self.prewarm_status = tk.StringVar(value="Docker images: checking...")
+        ttk.Label(self.root, textvariable=self.prewarm_status, anchor=tk.W).pack(side=tk.BOTTOM, fill=tk.X, padx=10)
+        
         # Create the UI
         self.create_notebook()
         
-        # Check if Docker is installed
-        self.check_docker()
+        # Check if Docker is installed, then fetch missing images while the forms are filled in
+        if self.check_docker():
+            start_prewarm(self)
+        else:
+            self.prewarm_status.set("Docker images: Docker not available")
     
     def check_docker(self):
         """Check if Docker is installed and running."""
@@ -80,10 +94,14 @@ class DeploymentApp:
         local_dev_frame = ttk.Frame(notebook)
         aws_frame = ttk.Frame(notebook)
         super_admin_frame = ttk.Frame(notebook)
+        load_testing_frame = ttk.Frame(notebook)
+        history_frame = ttk.Frame(notebook)
         
         notebook.add(local_dev_frame, text="Local Development")
         notebook.add(aws_frame, text="AWS Configuration & Deployment")
         notebook.add(super_admin_frame, text="Super Admin Setup")
+        notebook.add(load_testing_frame, text="Load Testing")
+        notebook.add(history_frame, text="History")
         
         # Setup local development tab (first)
         setup_local_dev_tab(self, local_dev_frame)
@@ -93,6 +111,12 @@ class DeploymentApp:
         
         # Setup super admin tab
         setup_super_admin_tab(super_admin_frame, self)
+        
+        # Setup load testing tab
+        setup_load_testing_tab(self, load_testing_frame)
+        
+        # Setup operation history tab
+        setup_history_tab(self, history_frame)
 
     def setup_aws_tab(self, parent):
         """Set up the combined AWS configuration and deployment tab."""
@@ -204,6 +228,22 @@ class DeploymentApp:
             command=lambda: run_terraform_command(self, "destroy")
         ).pack(side=tk.LEFT, padx=5)
         
+        # Provider installation options
+        provider_frame = ttk.Frame(deploy_frame)
+        provider_frame.pack(fill=tk.X, pady=(0, 10))
+        
+        ttk.Checkbutton(
+            provider_frame,
+            text="Use offline provider mirror",
+            variable=self.use_provider_mirror
+        ).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(
+            provider_frame,
+            text="Build Provider Mirror",
+            command=lambda: build_provider_mirror(self)
+        ).pack(side=tk.LEFT, padx=5)
+        
         # Add output console
         console_frame = ttk.LabelFrame(deploy_frame, text="Deployment Console")
         console_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -289,17 +329,17 @@ project_name       = "{self.project_name.get()}"
 """
             
             # Write the updated content
-            with open(tfvars_path, 'w') as f:
-                f.write(tfvars_content)
+            write_file_atomic(tfvars_path, tfvars_content)
                 
             # Create a .env file for AWS credentials
             scripts_dir = project_root / "scripts"
             scripts_dir.mkdir(exist_ok=True, parents=True)
             env_path = scripts_dir / ".aws_credentials.env"
-            with open(env_path, 'w') as f:
-                f.write(f"AWS_ACCESS_KEY_ID={self.aws_access_key.get()}\n")
-                f.write(f"AWS_SECRET_ACCESS_KEY={self.aws_secret_key.get()}\n")
-                f.write(f"AWS_DEFAULT_REGION={self.aws_region.get()}\n")
+            EnvStore(env_path).update({
+                "AWS_ACCESS_KEY_ID": self.aws_access_key.get(),
+                "AWS_SECRET_ACCESS_KEY": self.aws_secret_key.get(),
+                "AWS_DEFAULT_REGION": self.aws_region.get(),
+            })
             
             messagebox.showinfo(
                 "Success", 
@@ -321,6 +361,10 @@ project_name       = "{self.project_name.get()}"
     def log_su_message(self, message, color="white"):
         """Log a message to the super admin setup console."""
         log_message(self.su_console, message, color)
+    
+    def log_load_message(self, message, color="white"):
+        """Log a message to the load testing console."""
+        log_message(self.load_console, message, color)
 
 def main():
     """
@@ -7,11 +7,118 @@ is no longer available for new customers as of July 2024.
 import subprocess
 import threading
 import json
+import hashlib
 import os
+import re
+from datetime import datetime
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox
 
+from .terraform_events import TerraformEventStream
+from .history import record_operation
+
+TERRAFORM_IMAGE = "hashicorp/terraform:latest"
+
+# Docker volume shared by every terraform container, so providers are only
+# downloaded once instead of on every fresh init. Terraform only links a cached
+# provider when .terraform.lock.hcl already holds its checksum; building the
+# provider mirror locks them for every platform in MIRROR_PLATFORMS.
+PLUGIN_CACHE_VOLUME = "cleo-spa-terraform-plugins"
+PLUGIN_CACHE_DIR = "/terraform-plugin-cache"
+
+# Local filesystem mirror of the providers used by terraform/main.tf. It can be
+# built once on a connected machine and copied to hosts without internet access.
+PROVIDER_MIRROR_DIR = Path(os.environ.get(
+    "CLEO_SPA_PROVIDER_MIRROR",
+    Path.home() / ".cleo-spa" / "terraform" / "providers"
+))
+CLI_CONFIG_PATH = Path.home() / ".cleo-spa" / "terraform" / "mirror.tfrc"
+MIRROR_PLATFORMS = ["linux_amd64", "linux_arm64"]
+
+CLI_CONFIG = """provider_installation {
+  filesystem_mirror {
+    path    = "/provider-mirror"
+    include = ["registry.terraform.io/*/*"]
+  }
+  direct {
+    exclude = ["registry.terraform.io/*/*"]
+  }
+}
+"""
+
+# Saved plan written by "Plan Deployment" and applied as-is by "Apply Deployment"
+PLAN_FILE = "cleo.tfplan"
+PLAN_METADATA_FILE = "cleo.tfplan.meta.json"
+
+# Terraform files whose changes make a saved plan stale
+PLAN_INPUT_PATTERNS = ["*.tf", "*.tfvars", ".terraform.lock.hcl"]
+
+# Outputs parsed from the local state, reused until the state changes
+_outputs_cache = {"key": None, "outputs": None}
+
+def _credentials_path():
+    """Get the path of the AWS credentials env file passed to terraform containers."""
+    # For now, we'll still use the scripts directory from the original location for AWS credentials
+    original_project_root = Path(__file__).parent.parent.parent
+    return original_project_root / "scripts" / ".aws_credentials.env"
+
+def provider_mirror_available():
+    """Check if the local provider mirror has been built."""
+    return PROVIDER_MIRROR_DIR.exists() and any(PROVIDER_MIRROR_DIR.rglob("*.zip"))
+
+def _write_cli_config():
+    """Write the terraform CLI config that installs providers from the local mirror."""
+    CLI_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    if not CLI_CONFIG_PATH.exists() or CLI_CONFIG_PATH.read_text() != CLI_CONFIG:
+        CLI_CONFIG_PATH.write_text(CLI_CONFIG)
+    return CLI_CONFIG_PATH
+
+def terraform_docker_command(terraform_dir, args, env_file=None, use_mirror=False, mirror_writable=False):
+    """
+    Build the docker command that runs terraform against the project's terraform directory.
+    
+    Args:
+        terraform_dir (Path): The terraform directory, mounted as the working directory.
+        args (list): The terraform arguments.
+        env_file (Path, optional): Env file with the AWS credentials.
+        use_mirror (bool): Install providers from the local mirror only.
+        mirror_writable (bool): Mount the mirror directory writable, for building it.
+    
+    Returns:
+        list: The docker command
+    """
+    docker_cmd = ["docker", "run", "--rm"]
+    if env_file:
+        docker_cmd.extend(["--env-file", str(env_file)])
+    docker_cmd.extend([
+        "-v", f"{terraform_dir}:/terraform",
+        "-w", "/terraform",
+        "-v", f"{PLUGIN_CACHE_VOLUME}:{PLUGIN_CACHE_DIR}",
+        "-e", f"TF_PLUGIN_CACHE_DIR={PLUGIN_CACHE_DIR}",
+    ])
+    if use_mirror or mirror_writable:
+        PROVIDER_MIRROR_DIR.mkdir(parents=True, exist_ok=True)
+        docker_cmd.extend(["-v", f"{PROVIDER_MIRROR_DIR}:/provider-mirror" + ("" if mirror_writable else ":ro")])
+    if use_mirror:
+        docker_cmd.extend([
+            "-v", f"{_write_cli_config()}:/cleo-terraform.tfrc:ro",
+            "-e", "TF_CLI_CONFIG_FILE=/cleo-terraform.tfrc",
+        ])
+    docker_cmd.append(TERRAFORM_IMAGE)
+    docker_cmd.extend(args)
+    return docker_cmd
+
+def _use_mirror(app):
+    """Check if the app asked for the offline provider mirror, and that it exists."""
+    use_mirror_var = getattr(app, "use_provider_mirror", None)
+    if not use_mirror_var or not use_mirror_var.get():
+        return False
+    if not provider_mirror_available():
+        app.log_message(f"Provider mirror not found at {PROVIDER_MIRROR_DIR}; installing providers from the registry.", "yellow")
+        return False
+    return True
+
 def run_terraform_command(app, command):
     """Run a Terraform command in a Docker container."""
     # Check if AWS credentials are configured
@@ -25,9 +132,17 @@ def run_terraform_command(app, command):
             
     # Confirm potentially destructive operations
     if command == "apply":
+        from .utils import get_project_root
+        
+        # Apply only ever runs the plan the user has reviewed
+        metadata, problem = check_saved_plan(get_project_root() / "terraform")
+        if problem:
+            messagebox.showerror("No Current Plan", f"{problem}\n\nRun 'Plan Deployment' first.")
+            return
         if not messagebox.askyesno(
             "Confirm Deployment", 
-            "This will deploy resources to AWS and may incur costs. Continue?"
+            f"This will apply the saved plan ({format_plan_counts(metadata['summary'])}) "
+            "to AWS and may incur costs. Continue?"
         ):
             return
     elif command == "destroy":
@@ -40,8 +155,168 @@ def run_terraform_command(app, command):
     # Run the command in a separate thread to avoid freezing the UI
     threading.Thread(target=_run_terraform_in_docker, args=(app, command), daemon=True).start()
 
+def build_provider_mirror(app):
+    """Download the providers used by the terraform configuration into the local mirror."""
+    threading.Thread(target=_build_provider_mirror, args=(app,), daemon=True).start()
+
+def _build_provider_mirror(app):
+    """Run terraform providers mirror, then providers lock against it, inside Docker containers."""
+    from .utils import get_project_root
+    
+    terraform_dir = get_project_root() / "terraform"
+    if not terraform_dir.exists():
+        app.log_message("Error: Terraform directory not found in extracted project files.", "red")
+        return
+    
+    app.log_message(f"Building provider mirror in {PROVIDER_MIRROR_DIR}...", "cyan")
+    mirror_args = ["providers", "mirror"]
+    mirror_args.extend(f"-platform={platform}" for platform in MIRROR_PLATFORMS)
+    mirror_args.append("/provider-mirror")
+    # Record the checksums of the mirrored providers in .terraform.lock.hcl, for every
+    # platform, so init verifies them and can link them from the plugin cache
+    lock_args = ["providers", "lock", "-fs-mirror=/provider-mirror"]
+    lock_args.extend(f"-platform={platform}" for platform in MIRROR_PLATFORMS)
+    steps = [
+        ("Building the provider mirror", terraform_docker_command(terraform_dir, mirror_args, mirror_writable=True)),
+        ("Locking the providers", terraform_docker_command(terraform_dir, lock_args, use_mirror=True)),
+    ]
+    
+    try:
+        for step, docker_cmd in steps:
+            app.log_message(f"Executing: {' '.join(docker_cmd)}", "cyan")
+            process = subprocess.Popen(
+                docker_cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                bufsize=1,
+                universal_newlines=True
+            )
+            for line in iter(process.stdout.readline, ''):
+                app.log_message(line.rstrip())
+            process.stdout.close()
+            return_code = process.wait()
+            
+            if return_code != 0:
+                app.log_message(f"\n{step} failed with return code {return_code}", "red")
+                return
+        
+        _write_cli_config()
+        app.log_message("\nProvider mirror built and terraform/.terraform.lock.hcl updated; commit the lock file. "
+                        "Tick 'Use offline provider mirror' to init without internet access.", "green")
+    except Exception as e:
+        app.log_message(f"Error: {str(e)}", "red")
+
+def _plan_fingerprint(terraform_dir):
+    """Hash the terraform configuration and credentials a plan was computed from."""
+    digest = hashlib.sha256()
+    inputs = set()
+    for pattern in PLAN_INPUT_PATTERNS:
+        inputs.update(terraform_dir.glob(pattern))
+    credentials = _credentials_path()
+    if credentials.exists():
+        inputs.add(credentials)
+    for path in sorted(inputs):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def _file_sha256(path):
+    """Return the sha256 hex digest of a file."""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+def summarize_plan(plan_json):
+    """
+    Summarize the resource changes of a plan from terraform show -json.
+    
+    Args:
+        plan_json (dict): The parsed JSON plan.
+    
+    Returns:
+        dict: Lists of resource addresses under create, update, replace and destroy
+    """
+    summary = {"create": [], "update": [], "replace": [], "destroy": []}
+    for change in plan_json.get("resource_changes", []):
+        actions = change.get("change", {}).get("actions", [])
+        address = change.get("address", "")
+        if "delete" in actions and "create" in actions:
+            summary["replace"].append(address)
+        elif actions == ["create"]:
+            summary["create"].append(address)
+        elif actions == ["update"]:
+            summary["update"].append(address)
+        elif actions == ["delete"]:
+            summary["destroy"].append(address)
+    return summary
+
+def format_plan_counts(summary):
+    """Format plan summary counts, e.g. '3 to create, 0 to update, 1 to replace, 0 to destroy'."""
+    return ", ".join(f"{len(summary[action])} to {action}" for action in ("create", "update", "replace", "destroy"))
+
+def save_plan_summary(app, terraform_dir):
+    """Read the saved plan with terraform show -json and record its summary and fingerprint."""
+    docker_cmd = terraform_docker_command(
+        terraform_dir, ["show", "-json", PLAN_FILE], env_file=_credentials_path(), use_mirror=_use_mirror(app)
+    )
+    result = subprocess.run(docker_cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        app.log_message(f"Could not read the saved plan: {result.stderr.strip()}", "red")
+        return None
+    
+    summary = summarize_plan(json.loads(result.stdout))
+    metadata = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "fingerprint": _plan_fingerprint(terraform_dir),
+        "plan_sha256": _file_sha256(terraform_dir / PLAN_FILE),
+        "summary": summary
+    }
+    with open(terraform_dir / PLAN_METADATA_FILE, "w") as f:
+        json.dump(metadata, f, indent=2)
+    
+    app.log_message("\n---- PLAN SUMMARY ----", "green")
+    colors = {"create": "green", "update": "yellow", "replace": "yellow", "destroy": "red"}
+    for action in ("create", "update", "replace", "destroy"):
+        for address in summary[action]:
+            app.log_message(f"  {action:<8} {address}", colors[action])
+    app.log_message(f"Plan: {format_plan_counts(summary)}. Saved to {PLAN_FILE}.", "cyan")
+    return metadata
+
+def check_saved_plan(terraform_dir):
+    """
+    Check that a saved plan exists and still matches the configuration.
+    
+    Returns:
+        tuple: (metadata, None) if the plan can be applied, or (None, reason)
+    """
+    plan_path = terraform_dir / PLAN_FILE
+    metadata_path = terraform_dir / PLAN_METADATA_FILE
+    if not plan_path.exists() or not metadata_path.exists():
+        return None, "No saved plan found."
+    try:
+        with open(metadata_path) as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None, "The saved plan summary could not be read."
+    if metadata.get("plan_sha256") != _file_sha256(plan_path):
+        return None, "The saved plan file has changed since it was summarized."
+    if metadata.get("fingerprint") != _plan_fingerprint(terraform_dir):
+        return None, "The Terraform configuration or credentials changed after the plan was made."
+    return metadata, None
+
+def discard_saved_plan(terraform_dir):
+    """Remove the saved plan; a plan can only be applied once."""
+    for name in (PLAN_FILE, PLAN_METADATA_FILE):
+        path = terraform_dir / name
+        if path.exists():
+            path.unlink()
+
 def _run_terraform_in_docker(app, command):
     """Execute Terraform commands inside a Docker container."""
+    with record_operation("terraform", command) as operation:
+        _run_terraform(app, command, operation)
+
+def _run_terraform(app, command, operation):
+    """Run a terraform command, recording its outcome and per-resource times in operation."""
     from .utils import get_project_root
     
     app.log_message(f"Starting Terraform {command} operation...", "cyan")
@@ -54,31 +329,31 @@ def _run_terraform_in_docker(app, command):
     # Check if terraform directory exists
     if not terraform_dir.exists():
         app.log_message("Error: Terraform directory not found in extracted project files.", "red")
+        operation.finish("failed")
         return
     
-    # For now, we'll still use the scripts directory from the original location for AWS credentials
-    # This might need to be updated based on your specific setup
-    original_project_root = Path(__file__).parent.parent.parent
-    env_path = original_project_root / "scripts" / ".aws_credentials.env"
-    
-    # Create Docker command
-    docker_cmd = [
-        "docker", "run", "--rm",
-        "--env-file", str(env_path),
-        "-v", f"{terraform_dir}:/terraform",
-        "-w", "/terraform",
-        "hashicorp/terraform:latest"
-    ]
-    
     # Add terraform command
+    terraform_args = []
     if command == "init":
-        docker_cmd.extend(["init"])
+        terraform_args = ["init"]
     elif command == "plan":
-        docker_cmd.extend(["plan"])
+        terraform_args = ["plan", "-input=false", "-json", f"-out={PLAN_FILE}"]
     elif command == "apply":
-        docker_cmd.extend(["apply", "-auto-approve"])
+        # Check again in case the configuration changed after the confirmation
+        _, problem = check_saved_plan(terraform_dir)
+        if problem:
+            app.log_message(f"Error: {problem} Run 'Plan Deployment' first.", "red")
+            operation.finish("failed")
+            return
+        # A saved plan is applied without prompting and without planning again
+        terraform_args = ["apply", "-input=false", "-json", PLAN_FILE]
     elif command == "destroy":
-        docker_cmd.extend(["destroy", "-auto-approve"])
+        terraform_args = ["destroy", "-auto-approve", "-json"]
+    
+    # Create Docker command
+    docker_cmd = terraform_docker_command(
+        terraform_dir, terraform_args, env_file=_credentials_path(), use_mirror=_use_mirror(app)
+    )
     
     try:
         # Run the command
@@ -94,16 +369,36 @@ def _run_terraform_in_docker(app, command):
             universal_newlines=True
         )
         
-        # Stream output to the console
+        # Stream output to the console, following resource progress in -json runs
+        events = TerraformEventStream() if "-json" in terraform_args else None
         for line in iter(process.stdout.readline, ''):
-            app.log_message(line.rstrip())
+            if events:
+                for message, color in events.handle(line):
+                    app.log_message(message, color)
+            else:
+                app.log_message(line.rstrip())
         
         process.stdout.close()
         return_code = process.wait()
         
+        if events:
+            for message, color in events.report():
+                app.log_message(message, color)
+            for address, resource in events.resources.items():
+                if resource.get("elapsed") is not None:
+                    operation.add_phase(address, resource["elapsed"], "ok" if resource["status"] == "complete" else "failed")
+        operation.finish("ok" if return_code == 0 else "failed", return_code)
+        
+        # Saved plans are single use, and any apply or destroy makes them stale
+        if command in ("apply", "destroy"):
+            discard_saved_plan(terraform_dir)
+        
         if return_code == 0:
             app.log_message(f"\nTerraform {command} completed successfully!", "green")
             
+            if command == "plan":
+                save_plan_summary(app, terraform_dir)
+            
             # If this was an apply, extract and display important outputs
             if command == "apply":
                 extract_and_display_outputs(app)
@@ -112,35 +407,93 @@ def _run_terraform_in_docker(app, command):
             
     except Exception as e:
         app.log_message(f"Error: {str(e)}", "red")
+        operation.finish("error")
+        operation.details["error"] = str(e)
+
+def uses_remote_backend(terraform_dir):
+    """Check if the terraform configuration keeps its state in a remote backend."""
+    # terraform init records the configured backend here
+    backend_state = terraform_dir / ".terraform" / "terraform.tfstate"
+    if backend_state.exists():
+        try:
+            with open(backend_state) as f:
+                backend_type = json.load(f).get("backend", {}).get("type")
+            if backend_type:
+                return backend_type != "local"
+        except (OSError, ValueError):
+            pass
+    
+    for tf_file in terraform_dir.glob("*.tf"):
+        for backend_type in re.findall(r'^\s*backend\s+"(\w+)"', tf_file.read_text(), re.MULTILINE):
+            if backend_type != "local":
+                return True
+    return False
+
+def read_state_outputs(terraform_dir):
+    """
+    Read outputs from the local terraform.tfstate.
+    
+    The parsed outputs are cached and reused until the state's lineage, serial or
+    modification time changes.
+    
+    Returns:
+        dict: Outputs in the format of terraform output -json, or None without local state
+    """
+    state_path = terraform_dir / "terraform.tfstate"
+    try:
+        mtime = state_path.stat().st_mtime_ns
+    except OSError:
+        return None
+    
+    cached_key = _outputs_cache["key"]
+    if cached_key and cached_key[0] == state_path and cached_key[3] == mtime:
+        return _outputs_cache["outputs"]
+    
+    try:
+        with open(state_path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    key = (state_path, state.get("lineage"), state.get("serial"), mtime)
+    if cached_key and cached_key[:3] == key[:3]:
+        # Rewritten without changes, e.g. by a refresh
+        _outputs_cache["key"] = key
+        return _outputs_cache["outputs"]
+    
+    outputs = state.get("outputs", {})
+    _outputs_cache["key"] = key
+    _outputs_cache["outputs"] = outputs
+    return outputs
+
+def get_terraform_outputs(terraform_dir=None):
+    """
+    Get the outputs of the last deployment.
+    
+    Local state is read directly; only remote backends need a terraform container.
+    
+    Returns:
+        dict: Outputs in the format of terraform output -json, or None if unavailable
+    """
+    if terraform_dir is None:
+        from .utils import get_project_root
+        terraform_dir = get_project_root() / "terraform"
+    
+    if not uses_remote_backend(terraform_dir):
+        return read_state_outputs(terraform_dir)
+    
+    docker_cmd = terraform_docker_command(terraform_dir, ["output", "-json"], env_file=_credentials_path())
+    result = subprocess.run(docker_cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout)
 
 def extract_and_display_outputs(app):
     """Extract and display Terraform outputs after successful deployment."""
     try:
-        from .utils import get_project_root
+        outputs = get_terraform_outputs()
         
-        # Use extracted project path for terraform directory
-        project_root = get_project_root()
-        terraform_dir = project_root / "terraform"
-        
-        # For now, we'll still use the scripts directory from the original location for AWS credentials
-        original_project_root = Path(__file__).parent.parent.parent
-        env_path = original_project_root / "scripts" / ".aws_credentials.env"
-        
-        # Run terraform output -json
-        docker_cmd = [
-            "docker", "run", "--rm",
-            "--env-file", str(env_path),
-            "-v", f"{terraform_dir}:/terraform",
-            "-w", "/terraform",
-            "hashicorp/terraform:latest",
-            "output", "-json"
-        ]
-        
-        result = subprocess.run(docker_cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            outputs = json.loads(result.stdout)
-            
+        if outputs:
             # Display important outputs
             app.log_message("\n---- DEPLOYMENT INFORMATION ----", "green")
             
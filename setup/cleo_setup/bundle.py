@@ -0,0 +1,113 @@
+"""
+Access to the project files embedded in the frozen executable.
+
+The build writes a bundle manifest (relative path -> size and sha256) next to the
+bundled project files. The installer uses it to bring an installation up to date
+by copying only the files that changed, instead of re-extracting the whole tree.
+"""
+import json
+import shutil
+import sys
+from pathlib import Path
+
+MANIFEST_NAME = "bundle_manifest.json"
+INSTALLED_MANIFEST = Path(".cleo-setup") / MANIFEST_NAME
+
+
+def get_resources_dir():
+    """
+    Get the directory holding the bundled resources.
+
+    Returns:
+        Path or None: The resources directory inside the bundle, None when not frozen
+    """
+    if not getattr(sys, 'frozen', False) or not hasattr(sys, '_MEIPASS'):
+        return None
+    return Path(sys._MEIPASS) / "cleo_setup" / "resources"
+
+
+def load_manifest(path):
+    """
+    Load a bundle manifest from disk.
+
+    Args:
+        path (Path): Path to the manifest file.
+
+    Returns:
+        dict or None: The manifest, or None if missing or unreadable
+    """
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+        if isinstance(manifest.get("files"), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def load_bundle_manifest():
+    """Load the manifest shipped with the frozen executable, if any."""
+    resources_dir = get_resources_dir()
+    if resources_dir is None:
+        return None
+    return load_manifest(resources_dir / MANIFEST_NAME)
+
+
+def _is_current(target, rel_path, entry, installed_files):
+    """Fast check that an installed file still matches its manifest entry."""
+    if installed_files.get(rel_path) != list(entry):
+        return False
+    try:
+        return target.stat().st_size == entry[0]
+    except OSError:
+        return False
+
+
+def sync_bundle(bundle_root, install_path, manifest, progress=None):
+    """
+    Bring an installation up to date with the bundled project files.
+
+    Files whose manifest entry matches the manifest stamped into the installation
+    (and whose size on disk still matches) are left untouched.
+
+    Args:
+        bundle_root (Path): The bundled project_files directory.
+        install_path (Path): The installation directory.
+        manifest (dict): The bundle manifest.
+        progress (callable, optional): Called with a status message.
+
+    Returns:
+        dict: Counts of copied and skipped files
+    """
+    install_path = Path(install_path)
+    stamp_path = install_path / INSTALLED_MANIFEST
+    installed = load_manifest(stamp_path) or {"files": {}}
+    installed_files = installed["files"]
+
+    if installed.get("bundle_id") == manifest.get("bundle_id") and progress:
+        progress("Installed files match this bundle, verifying...")
+
+    # Duplicate files are stored once in the bundle and linked to the kept copy
+    links = manifest.get("links", {})
+
+    copied = 0
+    skipped = 0
+    for rel_path, entry in manifest["files"].items():
+        target = install_path / rel_path
+        if _is_current(target, rel_path, entry, installed_files):
+            skipped += 1
+            continue
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copy2(bundle_root / links.get(rel_path, rel_path), target)
+        copied += 1
+
+    # Stamp the installation so the next extraction can skip unchanged files
+    stamp_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(stamp_path, 'w') as f:
+        json.dump(manifest, f)
+
+    if progress:
+        progress(f"Extracted {copied} files, {skipped} already up to date")
+
+    return {'copied': copied, 'skipped': skipped}
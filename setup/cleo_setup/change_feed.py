@@ -0,0 +1,677 @@
+"""
+Watch and measure the db_changes notification channel.
+
+notify_data_change() (server/sql/triggers/notify_data_change.sql) sends a
+pg_notify('db_changes', ...) with the whole row as JSON for every insert,
+update and delete on the tables it is attached to; updates carry the old row
+as well. PostgreSQL refuses payloads of 8000 bytes or more, and then the
+write that fired the trigger fails with it.
+
+The monitor LISTENs on the channel through psql in the database container and
+counts events per table and action per second, with the distribution of
+payload sizes. Payloads close to the limit are reported as they arrive, and
+before listening the largest rows of the triggered tables are measured to
+show how much headroom their update payloads have.
+
+The benchmark copies a triggered table into a scratch table and runs pgbench
+updates (or inserts) against it, alternating rounds with the trigger enabled
+and disabled, to measure what the trigger costs on the write path. The
+scratch table is dropped afterwards. The server's listener receives the
+benchmark's notifications like any others.
+
+Command line:
+    
+    python -m cleo_setup.change_feed monitor --container cleo-db-1 --seconds 60
+    python -m cleo_setup.change_feed bench --container cleo-db-1 --table statuses --rounds 3
+"""
+import argparse
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import percentile, record_operation
+from .utils.psql import local_target, psql, psql_command
+
+CHANNEL = "db_changes"
+TRIGGER_FUNCTION = "notify_data_change"
+NOTIFY_LIMIT = 8000
+NEAR_LIMIT = 6000
+SIZE_BOUNDS = [256, 512, 1024, 2048, 4096, NEAR_LIMIT, NOTIFY_LIMIT]
+POLL_SECONDS = 0.2
+REPORT_SECONDS = 5
+BENCH_TABLE = "change_feed_bench"
+BENCH_TRIGGER = "change_feed_bench_notify"
+BENCH_ROWS = 1000
+
+# psql prints notifications it received after each command, payload unescaped
+NOTIFICATION_RE = re.compile(
+    r'^Asynchronous notification "(?P<channel>[^"]*)" with payload "(?P<payload>.*)" '
+    r'received from server process with PID (?P<pid>\d+)\.$'
+)
+# Size of json_build_object('table', ..., 'action', ..., 'data', ..., 'old_data', ...) around the rows
+PAYLOAD_OVERHEAD = len('{"table" : "", "action" : "update", "data" : , "old_data" : }')
+
+
+def listen_command(target):
+    """Build the docker exec psql command that listens on the channel."""
+    return psql_command(target, "-X", "-q", "-t", "-A")
+
+
+class FeedStats:
+    """
+    Events of the channel, counted per second and per table and action.
+    
+    Args:
+        near_limit (int): Payloads of at least this many bytes are flagged.
+    """
+    
+    def __init__(self, near_limit=NEAR_LIMIT):
+        self.near_limit = near_limit
+        self.per_second = defaultdict(Counter)
+        self.sizes = defaultdict(list)
+        self.flagged = []
+        self.unparsed = 0
+        self.started = None
+        self.last = None
+    
+    def add(self, payload, received=None):
+        """
+        Count one notification.
+        
+        Args:
+            payload (str): The payload as received.
+            received (float, optional): time.time() of arrival.
+        
+        Returns:
+            tuple: (table, action, size in bytes, flagged)
+        """
+        received = received if received is not None else time.time()
+        if self.started is None:
+            self.started = received
+        self.last = received
+        size = len(payload.encode("utf-8"))
+        try:
+            event = json.loads(payload)
+            key = (str(event.get("table")), str(event.get("action")))
+        except (ValueError, AttributeError):
+            self.unparsed += 1
+            key = ("?", "?")
+        self.per_second[int(received)][key] += 1
+        self.sizes[key].append(size)
+        flagged = size >= self.near_limit
+        if flagged:
+            self.flagged.append({"table": key[0], "action": key[1], "bytes": size, "at": received})
+        return key + (size, flagged)
+    
+    @property
+    def count(self):
+        """Number of events counted."""
+        return sum(len(sizes) for sizes in self.sizes.values())
+    
+    def summary(self, seconds):
+        """
+        Summarize the events per table and action.
+        
+        Args:
+            seconds (float): How long the channel was watched.
+        
+        Returns:
+            list: Dicts with table, action, events, rate, peak, bytes and p50/p95/max, busiest first
+        """
+        rows = []
+        for key, sizes in self.sizes.items():
+            peak = max(counts[key] for counts in self.per_second.values())
+            rows.append({
+                "table": key[0],
+                "action": key[1],
+                "events": len(sizes),
+                "rate": len(sizes) / seconds if seconds else 0.0,
+                "peak": peak,
+                "bytes": sum(sizes),
+                "p50": percentile(sizes, 50),
+                "p95": percentile(sizes, 95),
+                "max": max(sizes),
+            })
+        return sorted(rows, key=lambda row: (-row["events"], row["table"], row["action"]))
+    
+    def histogram(self):
+        """Count payloads per bucket of SIZE_BOUNDS, plus an overflow bucket."""
+        counts = [0] * (len(SIZE_BOUNDS) + 1)
+        for sizes in self.sizes.values():
+            for size in sizes:
+                for index, bound in enumerate(SIZE_BOUNDS):
+                    if size < bound:
+                        counts[index] += 1
+                        break
+                else:
+                    counts[-1] += 1
+        return counts
+    
+    def lines(self, seconds, width=40):
+        """Render the summary and the size histogram as text."""
+        total = self.count
+        busiest = max((sum(counts.values()) for counts in self.per_second.values()), default=0)
+        lines = [f"{total:,} events in {seconds:.0f}s ({total / seconds if seconds else 0:,.1f}/s, peak {busiest:,}/s)"]
+        if not total:
+            return lines
+        lines.append(f"{'table':<28} {'action':<8} {'events':>8} {'/s':>8} {'peak/s':>7} "
+                     f"{'p50 B':>7} {'p95 B':>7} {'max B':>7}")
+        for row in self.summary(seconds):
+            lines.append(f"{row['table']:<28} {row['action']:<8} {row['events']:>8,} {row['rate']:>8,.1f} "
+                         f"{row['peak']:>7,} {row['p50']:>7,.0f} {row['p95']:>7,.0f} {row['max']:>7,}")
+        lines.append("Payload sizes:")
+        counts = self.histogram()
+        largest = max(counts)
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            label = f"< {SIZE_BOUNDS[index]} B" if index < len(SIZE_BOUNDS) else f">= {SIZE_BOUNDS[-1]} B"
+            bar = "#" * max(1, round(width * count / largest))
+            lines.append(f"{label:>10} {bar} {count:,}")
+        if self.flagged:
+            lines.append(f"{len(self.flagged):,} payloads of {self.near_limit:,} bytes or more "
+                         f"(NOTIFY refuses {NOTIFY_LIMIT:,})")
+        if self.unparsed:
+            lines.append(f"{self.unparsed:,} payloads were not JSON")
+        return lines
+    
+    def to_dict(self, seconds):
+        """Convert the summary to a JSON-serializable dictionary."""
+        return {
+            "events": self.count,
+            "seconds": seconds,
+            "tables": self.summary(seconds),
+            "histogram": dict(zip([f"<{bound}" for bound in SIZE_BOUNDS] + [f">={SIZE_BOUNDS[-1]}"], self.histogram())),
+            "flagged": self.flagged,
+            "unparsed": self.unparsed,
+        }
+
+
+def triggered_tables(target):
+    """Tables with a trigger that calls notify_data_change()."""
+    output = psql(target, (
+        "\\pset tuples_only on\n\\pset format unaligned\n"
+        "SELECT DISTINCT c.relname FROM pg_trigger t "
+        "JOIN pg_class c ON c.oid = t.tgrelid JOIN pg_proc p ON p.oid = t.tgfoid "
+        f"WHERE NOT t.tgisinternal AND p.proname = '{TRIGGER_FUNCTION}' AND c.relname <> '{BENCH_TABLE}' "
+        "ORDER BY 1;"
+    ))
+    return [line for line in output.splitlines() if line.strip()]
+
+
+def payload_headroom(target, tables=None):
+    """
+    Estimate the largest payload each triggered table can send today.
+    
+    An update sends the new and the old row, so its payload is about twice
+    the largest row plus the JSON around it.
+    
+    Args:
+        target (dict): container, database and user.
+        tables (list, optional): Tables to measure; the triggered tables by default.
+    
+    Returns:
+        list: Dicts with table, rows, max_row and max_update (bytes)
+    """
+    tables = tables if tables is not None else triggered_tables(target)
+    if not tables:
+        return []
+    selects = " UNION ALL ".join(
+        f"SELECT '{table}', count(*), coalesce(max(octet_length(row_to_json(t)::text)), 0) FROM \"{table}\" t"
+        for table in tables
+    )
+    output = psql(target, f"\\pset tuples_only on\n\\pset format unaligned\n{selects};")
+    result = []
+    for line in output.splitlines():
+        if not line.strip():
+            continue
+        table, rows, max_row = line.split("|")
+        result.append({"table": table, "rows": int(rows), "max_row": int(max_row),
+                       "max_update": PAYLOAD_OVERHEAD + len(table) + 2 * int(max_row)})
+    return result
+
+
+def headroom_lines(headroom, near_limit=NEAR_LIMIT):
+    """Render payload_headroom() as text, with the color of each line."""
+    lines = []
+    for entry in headroom:
+        color = "red" if entry["max_update"] >= NOTIFY_LIMIT else "orange" if entry["max_update"] >= near_limit else "white"
+        lines.append((f"  {entry['table']}: {entry['rows']:,} rows, largest {entry['max_row']:,} B, "
+                      f"update payload up to ~{entry['max_update']:,} B", color))
+    return lines
+
+
+def monitor(target, seconds, near_limit=NEAR_LIMIT, log=None, stop=None):
+    """
+    Listen on the channel and count its events.
+    
+    psql only prints notifications after running a command, so a trivial
+    query is sent every POLL_SECONDS; arrival times are accurate to that.
+    
+    Args:
+        target (dict): container, database and user.
+        seconds (float): How long to listen; until stop is set when 0.
+        near_limit (int): Payloads of at least this many bytes are flagged.
+        log (callable, optional): log(message, color) for progress.
+        stop (threading.Event, optional): Set to stop listening early.
+    
+    Returns:
+        tuple: (FeedStats, seconds listened, error or None)
+    """
+    log = log or (lambda message, color="white": print(message))
+    stop = stop or threading.Event()
+    stats = FeedStats(near_limit)
+    errors = []
+    
+    process = subprocess.Popen(
+        listen_command(target), stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding="utf-8", errors="replace", bufsize=1,
+        creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+    )
+    
+    def read_notifications():
+        for line in iter(process.stdout.readline, ""):
+            match = NOTIFICATION_RE.match(line.rstrip("\n"))
+            if not match or match.group("channel") != CHANNEL:
+                continue
+            table, action, size, flagged = stats.add(match.group("payload"))
+            if flagged:
+                log(f"  {table} {action}: {size:,} byte payload ({NOTIFY_LIMIT - size:,} below the NOTIFY limit)", "orange")
+    
+    def read_errors():
+        for line in iter(process.stderr.readline, ""):
+            errors.append(line.rstrip())
+    
+    readers = [threading.Thread(target=read_notifications, daemon=True),
+               threading.Thread(target=read_errors, daemon=True)]
+    for reader in readers:
+        reader.start()
+    
+    started = time.monotonic()
+    reported = started
+    reported_count = 0
+    try:
+        process.stdin.write(f"LISTEN {CHANNEL};\n")
+        process.stdin.flush()
+        while not stop.is_set() and process.poll() is None:
+            now = time.monotonic()
+            if seconds and now - started >= seconds:
+                break
+            if now - reported >= REPORT_SECONDS:
+                count = stats.count
+                log(f"  {count - reported_count:,} events in the last {now - reported:.0f}s ({count:,} in total)", "white")
+                reported, reported_count = now, count
+            process.stdin.write("SELECT 1;\n")
+            process.stdin.flush()
+            stop.wait(POLL_SECONDS)
+    except KeyboardInterrupt:
+        pass
+    try:
+        # One more round trip collects what arrived since the last one
+        process.stdin.write("SELECT 1;\n")
+        process.stdin.close()
+    except (BrokenPipeError, OSError):
+        pass
+    elapsed = time.monotonic() - started
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+    for reader in readers:
+        reader.join(timeout=5)
+    
+    error = None
+    if process.returncode not in (0, None) or any("ERROR" in line or "FATAL" in line for line in errors):
+        error = "\n".join(errors[-5:]) or f"psql exited with {process.returncode}"
+    return stats, elapsed, error
+
+
+def bench_script(columns, action):
+    """
+    Build the pgbench script for one write against the scratch table.
+    
+    Args:
+        columns (list): Columns copied from the source table.
+        action (str): "update" or "insert".
+    
+    Returns:
+        str: The script
+    """
+    if action == "insert":
+        names = ", ".join(f'"{column}"' for column in columns)
+        return (f"\\set id random(1, {BENCH_ROWS})\n"
+                f"INSERT INTO {BENCH_TABLE} ({names}) SELECT {names} FROM {BENCH_TABLE} WHERE bench_id = :id;\n")
+    return (f"\\set id random(1, {BENCH_ROWS})\n"
+            f"UPDATE {BENCH_TABLE} SET bench_touch = bench_touch + 1 WHERE bench_id = :id;\n")
+
+
+def pgbench_command(target, seconds, clients):
+    """Build the docker exec pgbench command that reads its script from stdin."""
+    return ["docker", "exec", "-i", target["container"], "pgbench", "-h", "localhost", "-p", "5432",
+            "-U", target["user"], "-n", "-M", "prepared", "-c", str(clients), "-j", str(clients),
+            "-T", str(seconds), "-f", "-", target["database"]]
+
+
+def run_pgbench(target, script, seconds, clients):
+    """
+    Run one pgbench round.
+    
+    Returns:
+        dict: tps, latency (ms) and transactions
+    """
+    result = subprocess.run(
+        pgbench_command(target, seconds, clients), input=script, capture_output=True, text=True, encoding='utf-8',
+        creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip() or result.stdout.strip())
+    tps = re.search(r"^tps = ([\d.]+)", result.stdout, re.MULTILINE)
+    latency = re.search(r"^latency average = ([\d.]+) ms", result.stdout, re.MULTILINE)
+    transactions = re.search(r"number of transactions actually processed: (\d+)", result.stdout)
+    if not tps:
+        raise RuntimeError(f"Unexpected pgbench output: {result.stdout.strip()[-500:]}")
+    return {"tps": float(tps.group(1)),
+            "latency": float(latency.group(1)) if latency else None,
+            "transactions": int(transactions.group(1)) if transactions else None}
+
+
+def create_bench_table(target, table):
+    """
+    Copy a table into the scratch table and attach the trigger to it.
+    
+    Returns:
+        list: The copied columns
+    """
+    output = psql(target, (
+        "\\pset tuples_only on\n\\pset format unaligned\n"
+        "SELECT column_name FROM information_schema.columns "
+        f"WHERE table_schema = current_schema() AND table_name = '{table}' ORDER BY ordinal_position;"
+    ))
+    columns = [line for line in output.splitlines() if line.strip()]
+    if not columns:
+        raise ValueError(f"Table {table} does not exist")
+    names = ", ".join(f'"{column}"' for column in columns)
+    source_names = ", ".join(f's."{column}"' for column in columns)
+    # Without INCLUDING DEFAULTS the copy shares no sequence with the source table
+    psql(target, (
+        f"DROP TABLE IF EXISTS {BENCH_TABLE};\n"
+        f"CREATE TABLE {BENCH_TABLE} (LIKE \"{table}\");\n"
+        f"ALTER TABLE {BENCH_TABLE} ADD COLUMN bench_id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, "
+        f"ADD COLUMN bench_touch integer NOT NULL DEFAULT 0;\n"
+        # Cycle the source rows so every bench_id has a realistic row behind it
+        f"INSERT INTO {BENCH_TABLE} ({names}, bench_id) "
+        f"SELECT {source_names}, n FROM generate_series(1, {BENCH_ROWS}) n "
+        f"JOIN LATERAL (SELECT * FROM \"{table}\" OFFSET (n - 1) % greatest((SELECT count(*) FROM \"{table}\"), 1) LIMIT 1) s ON TRUE;\n"
+        f"CREATE TRIGGER {BENCH_TRIGGER} AFTER INSERT OR UPDATE OR DELETE ON {BENCH_TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {TRIGGER_FUNCTION}();\n"
+        f"SELECT setval(pg_get_serial_sequence('{BENCH_TABLE}', 'bench_id'), {BENCH_ROWS});\n"
+        f"ANALYZE {BENCH_TABLE};\n"
+    ))
+    count = psql(target, f"\\pset tuples_only on\nSELECT count(*) FROM {BENCH_TABLE};").strip()
+    if count in ("", "0"):
+        psql(target, f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+        raise ValueError(f"Table {table} is empty; the benchmark needs rows to copy")
+    return columns
+
+
+def benchmark_trigger(target, table="statuses", action="update", seconds=10, rounds=3, clients=1,
+                      log=None, operation=None):
+    """
+    Measure write throughput with notify_data_change() enabled and disabled.
+    
+    Rounds alternate between the two so that drift (autovacuum, caches) hits
+    both sides alike; the median of each side is compared.
+    
+    Args:
+        target (dict): container, database and user.
+        table (str): Triggered table whose rows the scratch table copies.
+        action (str): "update" or "insert".
+        seconds (int): Length of each pgbench round.
+        rounds (int): Rounds per side.
+        clients (int): pgbench clients.
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add one phase per round to.
+    
+    Returns:
+        dict: Median tps and latency per side, the overhead and every round
+    """
+    log = log or (lambda message, color="white": print(message))
+    log(f"Copying {table} into {BENCH_TABLE} ({BENCH_ROWS:,} rows)...", "cyan")
+    columns = create_bench_table(target, table)
+    script = bench_script(columns, action)
+    samples = {"on": [], "off": []}
+    try:
+        for number in range(1, rounds + 1):
+            for side in ("on", "off"):
+                state = "ENABLE" if side == "on" else "DISABLE"
+                psql(target, f"ALTER TABLE {BENCH_TABLE} {state} TRIGGER {BENCH_TRIGGER};")
+                phase_started = time.monotonic()
+                sample = run_pgbench(target, script, seconds, clients)
+                if operation:
+                    operation.add_phase(f"trigger-{side}-{number}", time.monotonic() - phase_started, "ok")
+                samples[side].append(sample)
+                log(f"  round {number}, trigger {side:>3}: {sample['tps']:,.0f} tps"
+                    + (f", {sample['latency']:.3f} ms" if sample["latency"] is not None else ""), "white")
+    finally:
+        psql(target, f"DROP TABLE IF EXISTS {BENCH_TABLE};")
+    
+    def median(side, field):
+        values = [sample[field] for sample in samples[side] if sample[field] is not None]
+        return percentile(values, 50)
+    
+    result = {"table": table, "action": action, "clients": clients, "rounds": samples}
+    for side in ("on", "off"):
+        result[f"tps_{side}"] = median(side, "tps")
+        result[f"latency_{side}"] = median(side, "latency")
+    result["overhead"] = 1 - result["tps_on"] / result["tps_off"] if result["tps_off"] else None
+    if result["latency_on"] is not None and result["latency_off"] is not None:
+        result["cost_us"] = (result["latency_on"] - result["latency_off"]) * 1000
+    else:
+        result["cost_us"] = None
+    return result
+
+
+def benchmark_lines(result):
+    """Render benchmark_trigger() as text."""
+    lines = [f"{result['action']} on a copy of {result['table']}, {result['clients']} client(s), "
+             f"median of {len(result['rounds']['on'])} rounds:",
+             f"  trigger enabled:  {result['tps_on']:,.0f} tps",
+             f"  trigger disabled: {result['tps_off']:,.0f} tps"]
+    if result["overhead"] is not None:
+        lines.append(f"  overhead: {result['overhead'] * 100:.1f}% of throughput"
+                     + (f", {result['cost_us']:,.0f} us per write" if result["cost_us"] is not None else ""))
+    return lines
+
+
+def run_monitor(app, database, seconds, near_limit, stop):
+    """Watch the channel of a local database, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    app.log_local_message(f"\n---- WATCHING {CHANNEL.upper()} ON {target['database']} ----", "yellow")
+    with record_operation("change-feed", target["database"], seconds=seconds) as operation:
+        try:
+            headroom = payload_headroom(target)
+        except RuntimeError as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        if headroom:
+            app.log_local_message("Largest payloads the triggered tables can send:", "cyan")
+            for line, color in headroom_lines(headroom, near_limit):
+                app.log_local_message(line, color)
+        else:
+            app.log_local_message(f"No table has a {TRIGGER_FUNCTION} trigger", "orange")
+        
+        app.log_local_message(f"Listening{f' for {seconds}s' if seconds else ' until stopped'}...", "cyan")
+        stats, elapsed, error = monitor(target, seconds, near_limit, app.log_local_message, stop)
+        operation.add_phase("listen", elapsed, "failed" if error else "ok")
+        operation.details.update(events=stats.count, flagged=len(stats.flagged))
+        if error:
+            app.log_local_message(f"Error: {error}", "red")
+            operation.finish("failed")
+        for line in stats.lines(elapsed):
+            app.log_local_message(line, "green")
+        if stats.flagged:
+            app.log_local_message(f"{len(stats.flagged):,} payloads were close to the NOTIFY limit", "orange")
+
+
+def run_benchmark(app, database, table, action, seconds, rounds, clients):
+    """Benchmark the trigger in a local database, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    app.log_local_message(f"\n---- BENCHMARKING {TRIGGER_FUNCTION.upper()} ON {target['database']} ----", "yellow")
+    with record_operation("change-feed-bench", table, action=action, clients=clients) as operation:
+        try:
+            result = benchmark_trigger(target, table, action, seconds, rounds, clients,
+                                       app.log_local_message, operation)
+        except (RuntimeError, ValueError) as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        operation.details.update(tps_on=result["tps_on"], tps_off=result["tps_off"], overhead=result["overhead"])
+        for line in benchmark_lines(result):
+            app.log_local_message(line, "green")
+
+
+def open_change_feed_dialog(app):
+    """Ask for the monitor or benchmark options and run it in the background."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Change Feed")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    database = tk.StringVar(value="main")
+    seconds = tk.IntVar(value=60)
+    near_limit = tk.IntVar(value=NEAR_LIMIT)
+    table = tk.StringVar(value="statuses")
+    action = tk.StringVar(value="update")
+    round_seconds = tk.IntVar(value=10)
+    rounds = tk.IntVar(value=3)
+    clients = tk.IntVar(value=1)
+    stop = threading.Event()
+    
+    ttk.Label(frame, text="Database:").grid(row=0, column=0, sticky=tk.W, pady=3)
+    database_frame = ttk.Frame(frame)
+    database_frame.grid(row=0, column=1, sticky=tk.W)
+    ttk.Radiobutton(database_frame, text="Main", variable=database, value="main").pack(side=tk.LEFT)
+    ttk.Radiobutton(database_frame, text="Simulation", variable=database, value="sim").pack(side=tk.LEFT, padx=10)
+    
+    monitor_frame = ttk.LabelFrame(frame, text=f"Monitor {CHANNEL}", padding="5")
+    monitor_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+    ttk.Label(monitor_frame, text="Seconds (0 = until stopped):").grid(row=0, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(monitor_frame, from_=0, to=86400, textvariable=seconds, width=8).grid(row=0, column=1, sticky=tk.W)
+    ttk.Label(monitor_frame, text="Flag payloads from (bytes):").grid(row=1, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(monitor_frame, from_=0, to=NOTIFY_LIMIT, textvariable=near_limit, width=8).grid(row=1, column=1, sticky=tk.W)
+    
+    bench_frame = ttk.LabelFrame(frame, text="Benchmark the trigger", padding="5")
+    bench_frame.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+    ttk.Label(bench_frame, text="Table to copy:").grid(row=0, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(bench_frame, textvariable=table, width=24).grid(row=0, column=1, sticky=tk.W)
+    ttk.Label(bench_frame, text="Write:").grid(row=1, column=0, sticky=tk.W, pady=3)
+    ttk.Combobox(bench_frame, textvariable=action, values=["update", "insert"], state="readonly", width=10).grid(
+        row=1, column=1, sticky=tk.W)
+    ttk.Label(bench_frame, text="Seconds per round:").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(bench_frame, from_=1, to=600, textvariable=round_seconds, width=8).grid(row=2, column=1, sticky=tk.W)
+    ttk.Label(bench_frame, text="Rounds per side:").grid(row=3, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(bench_frame, from_=1, to=20, textvariable=rounds, width=8).grid(row=3, column=1, sticky=tk.W)
+    ttk.Label(bench_frame, text="Clients:").grid(row=4, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(bench_frame, from_=1, to=64, textvariable=clients, width=8).grid(row=4, column=1, sticky=tk.W)
+    
+    def start_monitor():
+        try:
+            args = (app, database.get(), seconds.get(), near_limit.get(), stop)
+        except tk.TclError as e:
+            messagebox.showerror("Input Error", str(e), parent=dialog)
+            return
+        stop.clear()
+        threading.Thread(target=run_monitor, args=args, daemon=True).start()
+    
+    def start_benchmark():
+        try:
+            args = (app, database.get(), table.get().strip(), action.get(), round_seconds.get(), rounds.get(), clients.get())
+        except tk.TclError as e:
+            messagebox.showerror("Input Error", str(e), parent=dialog)
+            return
+        dialog.destroy()
+        threading.Thread(target=run_benchmark, args=args, daemon=True).start()
+    
+    def close():
+        stop.set()
+        dialog.destroy()
+    
+    button_frame = ttk.Frame(frame)
+    button_frame.grid(row=3, column=0, columnspan=2, pady=10)
+    ttk.Button(button_frame, text="Start Monitor", command=start_monitor).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Stop Monitor", command=stop.set).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Run Benchmark", command=start_benchmark).pack(side=tk.LEFT, padx=5)
+    dialog.protocol("WM_DELETE_WINDOW", close)
+
+
+def main(argv=None):
+    """Watch the channel or benchmark the trigger from the command line."""
+    parser = argparse.ArgumentParser(description=f"Watch the {CHANNEL} channel or benchmark its trigger")
+    parser.add_argument('--container', required=True, help='Database container')
+    parser.add_argument('--database', default="my_db", help='Database name')
+    parser.add_argument('--user', default="user", help='Database user')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    monitor_parser = subparsers.add_parser("monitor", help="Count the channel's events")
+    monitor_parser.add_argument('--seconds', type=int, default=60, help='How long to listen, 0 for until Ctrl+C')
+    monitor_parser.add_argument('--near-limit', type=int, default=NEAR_LIMIT, help='Flag payloads of at least this many bytes')
+    monitor_parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    
+    bench_parser = subparsers.add_parser("bench", help="Measure write throughput with and without the trigger")
+    bench_parser.add_argument('--table', default="statuses", help='Table whose rows the scratch table copies')
+    bench_parser.add_argument('--action', choices=["update", "insert"], default="update", help='Write to measure')
+    bench_parser.add_argument('--seconds', type=int, default=10, help='Length of each round')
+    bench_parser.add_argument('--rounds', type=int, default=3, help='Rounds per side')
+    bench_parser.add_argument('--clients', type=int, default=1, help='pgbench clients')
+    args = parser.parse_args(argv)
+    
+    target = {"container": args.container, "database": args.database, "user": args.user}
+    if args.command == "bench":
+        with record_operation("change-feed-bench", args.table, action=args.action, clients=args.clients) as operation:
+            try:
+                result = benchmark_trigger(target, args.table, args.action, args.seconds, args.rounds, args.clients,
+                                           operation=operation)
+            except ValueError as e:
+                parser.error(str(e))
+            operation.details.update(tps_on=result["tps_on"], tps_off=result["tps_off"], overhead=result["overhead"])
+        print("\n".join(benchmark_lines(result)))
+        return 0
+    
+    if not args.json:
+        headroom = payload_headroom(target)
+        print("Largest payloads the triggered tables can send:" if headroom else f"No table has a {TRIGGER_FUNCTION} trigger")
+        for line, _ in headroom_lines(headroom, args.near_limit):
+            print(line)
+    with record_operation("change-feed", args.database, seconds=args.seconds) as operation:
+        stats, elapsed, error = monitor(target, args.seconds, args.near_limit,
+                                        (lambda message, color="white": None) if args.json else None)
+        operation.add_phase("listen", elapsed, "failed" if error else "ok")
+        operation.details.update(events=stats.count, flagged=len(stats.flagged))
+        if error:
+            operation.finish("failed")
+    if args.json:
+        print(json.dumps(stats.to_dict(elapsed), indent=2))
+    else:
+        print("\n".join(stats.lines(elapsed)))
+    if error:
+        print(f"Error: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,456 @@
+"""
+Operation history for CLEO SPA setup.
+
+Every operation the tool runs (compose up/rebuild, database initialization,
+terraform commands, super admin creation) is recorded in a SQLite database at
+<project>/.cleo-setup/history.db with its start and end time, exit status, host
+information and a breakdown of the phases it went through. The History tab
+shows percentile summaries and a trend chart per operation.
+"""
+import functools
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import tkinter as tk
+from tkinter import ttk
+
+HISTORY_DB_NAME = "history.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    duration REAL,
+    status TEXT,
+    exit_code INTEGER,
+    host TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS operations_kind_name ON operations (kind, name, started_at);
+CREATE TABLE IF NOT EXISTS phases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    operation_id INTEGER NOT NULL REFERENCES operations (id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    started_at REAL,
+    duration REAL NOT NULL,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS phases_operation ON phases (operation_id);
+"""
+
+_lock = threading.Lock()
+_initialized = set()
+
+
+def get_history_path():
+    """Get the path of the history database of the current project."""
+    from .utils import get_project_root
+    
+    return get_project_root() / ".cleo-setup" / HISTORY_DB_NAME
+
+
+def connect(path=None):
+    """
+    Open the history database, creating it on first use.
+    
+    Args:
+        path (Path, optional): Database path, defaults to the current project's.
+    
+    Returns:
+        sqlite3.Connection: A new connection; close it when done
+    """
+    path = path or get_history_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=10)
+    with _lock:
+        if path not in _initialized:
+            conn.executescript(SCHEMA)
+            _initialized.add(path)
+    return conn
+
+
+@functools.lru_cache(maxsize=None)
+def host_info():
+    """Describe the machine operations run on, so timings can be compared fairly."""
+    info = {
+        "hostname": platform.node(),
+        "os": f"{platform.system()} {platform.release()}",
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "frozen": bool(getattr(sys, 'frozen', False))
+    }
+    try:
+        result = subprocess.run(
+            ["docker", "version", "--format", "{{.Server.Version}}"],
+            capture_output=True, text=True, timeout=10,
+            creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+        )
+        if result.returncode == 0:
+            info["docker"] = result.stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        pass
+    return info
+
+
+class Operation:
+    """
+    A recorded operation.
+    
+    Use as a context manager; the operation is saved when the block exits, with
+    status "error" if it raised and "ok" unless finish() set another status.
+    """
+    
+    def __init__(self, kind, name, details=None, path=None):
+        """Initialize an operation that has not started yet."""
+        self.kind = kind
+        self.name = name
+        self.details = dict(details or {})
+        self.path = path
+        self.phases = []
+        self.status = None
+        self.exit_code = None
+        self.started_at = None
+        self._start = None
+    
+    def __enter__(self):
+        self.started_at = time.time()
+        self._start = time.monotonic()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.status is None:
+            self.status = "error" if exc_type else "ok"
+        if exc_type and "error" not in self.details:
+            self.details["error"] = str(exc_value)
+        self.save()
+        return False
+    
+    @contextmanager
+    def phase(self, name):
+        """Time a block as a phase of the operation."""
+        started_at = time.time()
+        start = time.monotonic()
+        status = "ok"
+        try:
+            yield
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self.add_phase(name, time.monotonic() - start, status, started_at)
+    
+    def add_phase(self, name, duration, status="ok", started_at=None):
+        """Record a phase whose duration was measured elsewhere."""
+        self.phases.append((name, started_at, float(duration), status))
+    
+    def finish(self, status, exit_code=None):
+        """Set the outcome of the operation."""
+        self.status = status
+        self.exit_code = exit_code
+    
+    def save(self):
+        """Write the operation and its phases. Failures are reported but never raised."""
+        ended_at = time.time()
+        duration = time.monotonic() - self._start
+        try:
+            conn = connect(self.path)
+            try:
+                with conn:
+                    cursor = conn.execute(
+                        "INSERT INTO operations (kind, name, started_at, ended_at, duration, status, exit_code, host, details) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (self.kind, self.name, self.started_at, ended_at, duration, self.status,
+                         self.exit_code, json.dumps(host_info()), json.dumps(self.details))
+                    )
+                    conn.executemany(
+                        "INSERT INTO phases (operation_id, name, started_at, duration, status) VALUES (?, ?, ?, ?, ?)",
+                        [(cursor.lastrowid,) + phase for phase in self.phases]
+                    )
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"Could not record {self.kind} {self.name} in history: {e}")
+
+
+def record_operation(kind, name, **details):
+    """
+    Start recording an operation.
+    
+    Example:
+        with record_operation("terraform", "apply") as operation:
+            with operation.phase("apply"):
+                ...
+    """
+    return Operation(kind, name, details)
+
+
+def percentile(values, p):
+    """Return the p-th percentile (0-100) of values, interpolating between ranks."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * p / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def recent_operations(limit=100, kind=None, path=None):
+    """
+    List the most recent operations.
+    
+    Returns:
+        list: Dicts with id, kind, name, started_at, duration, status and exit_code
+    """
+    conn = connect(path)
+    try:
+        query = "SELECT id, kind, name, started_at, duration, status, exit_code FROM operations"
+        params = []
+        if kind:
+            query += " WHERE kind = ?"
+            params.append(kind)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        columns = ["id", "kind", "name", "started_at", "duration", "status", "exit_code"]
+        return [dict(zip(columns, row)) for row in conn.execute(query, params)]
+    finally:
+        conn.close()
+
+
+def latest_details(kind, name, status="ok", path=None):
+    """
+    Get the details of the latest operation with a given outcome.
+    
+    Returns:
+        dict: The details, or None if there is no such operation
+    """
+    conn = connect(path)
+    try:
+        row = conn.execute(
+            "SELECT details FROM operations WHERE kind = ? AND name = ? AND status = ? "
+            "ORDER BY started_at DESC LIMIT 1",
+            (kind, name, status)
+        ).fetchone()
+    finally:
+        conn.close()
+    return json.loads(row[0]) if row and row[0] else None
+
+
+def duration_summary(path=None):
+    """
+    Summarize durations of successful runs per operation.
+    
+    Returns:
+        list: Dicts with kind, name, runs, failures, p50, p90, p95, max and last
+    """
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT kind, name, duration, status FROM operations ORDER BY started_at"
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    grouped = {}
+    for kind, name, duration, status in rows:
+        entry = grouped.setdefault((kind, name), {"durations": [], "failures": 0, "runs": 0})
+        entry["runs"] += 1
+        if status == "ok":
+            entry["durations"].append(duration)
+        else:
+            entry["failures"] += 1
+    
+    summary = []
+    for (kind, name), entry in sorted(grouped.items()):
+        durations = entry["durations"]
+        summary.append({
+            "kind": kind,
+            "name": name,
+            "runs": entry["runs"],
+            "failures": entry["failures"],
+            "p50": percentile(durations, 50),
+            "p90": percentile(durations, 90),
+            "p95": percentile(durations, 95),
+            "max": max(durations) if durations else None,
+            "last": durations[-1] if durations else None
+        })
+    return summary
+
+
+def duration_trend(kind, name, limit=50, path=None):
+    """
+    Get the durations of the latest runs of an operation, oldest first.
+    
+    Returns:
+        list: (started_at, duration, status) tuples
+    """
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT started_at, duration, status FROM operations WHERE kind = ? AND name = ? "
+            "ORDER BY started_at DESC LIMIT ?",
+            (kind, name, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    return list(reversed(rows))
+
+
+def phase_summary(kind, name, limit=50, path=None):
+    """
+    Summarize phase durations over the latest runs of an operation.
+    
+    Returns:
+        list: Dicts with phase, runs, p50, p95 and max, slowest median first
+    """
+    conn = connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT p.name, p.duration FROM phases p JOIN ("
+            "  SELECT id FROM operations WHERE kind = ? AND name = ? ORDER BY started_at DESC LIMIT ?"
+            ") o ON p.operation_id = o.id",
+            (kind, name, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    
+    grouped = {}
+    for phase, duration in rows:
+        grouped.setdefault(phase, []).append(duration)
+    summary = [
+        {"phase": phase, "runs": len(durations), "p50": percentile(durations, 50),
+         "p95": percentile(durations, 95), "max": max(durations)}
+        for phase, durations in grouped.items()
+    ]
+    summary.sort(key=lambda entry: entry["p50"], reverse=True)
+    return summary
+
+
+def _format_seconds(value):
+    """Format a duration for the history tables."""
+    if value is None:
+        return "-"
+    if value >= 60:
+        return f"{int(value // 60)}m {value % 60:04.1f}s"
+    return f"{value:.1f}s"
+
+
+def draw_trend_chart(canvas, points):
+    """Draw durations as a line chart, marking failed runs in red."""
+    canvas.delete("all")
+    # Fall back to the requested size before the canvas is first laid out
+    width = canvas.winfo_width() if canvas.winfo_width() > 1 else int(canvas["width"])
+    height = canvas.winfo_height() if canvas.winfo_height() > 1 else int(canvas["height"])
+    if not points:
+        canvas.create_text(width / 2, height / 2, text="No runs recorded", fill="gray")
+        return
+    
+    margin = 40
+    longest = max(duration for _, duration, _ in points) or 1
+    step = (width - 2 * margin) / max(len(points) - 1, 1)
+    
+    # Axes and scale
+    canvas.create_line(margin, height - margin, width - margin, height - margin, fill="gray")
+    canvas.create_line(margin, margin / 2, margin, height - margin, fill="gray")
+    canvas.create_text(margin - 5, margin / 2, text=_format_seconds(longest), anchor=tk.E, fill="gray")
+    canvas.create_text(margin - 5, height - margin, text="0s", anchor=tk.E, fill="gray")
+    
+    # Median line
+    median = percentile([duration for _, duration, status in points if status == "ok"], 50)
+    if median is not None:
+        y = height - margin - (median / longest) * (height - 1.5 * margin)
+        canvas.create_line(margin, y, width - margin, y, fill="dark green", dash=(4, 2))
+        canvas.create_text(width - margin, y - 8, text=f"p50 {_format_seconds(median)}", anchor=tk.E, fill="dark green")
+    
+    coordinates = []
+    for index, (started_at, duration, status) in enumerate(points):
+        x = margin + index * step
+        y = height - margin - (duration / longest) * (height - 1.5 * margin)
+        coordinates.append((x, y, status))
+    if len(coordinates) > 1:
+        canvas.create_line(*[value for x, y, _ in coordinates for value in (x, y)], fill="steel blue", width=2)
+    for x, y, status in coordinates:
+        color = "steel blue" if status == "ok" else "red"
+        canvas.create_oval(x - 3, y - 3, x + 3, y + 3, fill=color, outline=color)
+    
+    first = datetime.fromtimestamp(points[0][0]).strftime("%Y-%m-%d")
+    last = datetime.fromtimestamp(points[-1][0]).strftime("%Y-%m-%d")
+    canvas.create_text(margin, height - margin + 15, text=first, anchor=tk.W, fill="gray")
+    canvas.create_text(width - margin, height - margin + 15, text=last, anchor=tk.E, fill="gray")
+
+
+def setup_history_tab(app, parent):
+    """Set up the operation history tab UI."""
+    frame = ttk.Frame(parent, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    ttk.Label(
+        frame,
+        text="Timings of past operations in this project. Select an operation to see its trend and phase breakdown.",
+        wraplength=850,
+        justify=tk.LEFT
+    ).pack(fill=tk.X, pady=(0, 10))
+    
+    columns = ("operation", "runs", "failures", "p50", "p90", "p95", "max", "last")
+    summary_tree = ttk.Treeview(frame, columns=columns, show="headings", height=8)
+    for column in columns:
+        summary_tree.heading(column, text=column.title() if column in ("operation", "runs", "failures", "max", "last") else column)
+        summary_tree.column(column, width=220 if column == "operation" else 80, anchor=tk.W if column == "operation" else tk.E)
+    summary_tree.pack(fill=tk.X)
+    
+    chart_frame = ttk.LabelFrame(frame, text="Trend (latest 50 runs)")
+    chart_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+    chart = tk.Canvas(chart_frame, height=200, bg="white")
+    chart.pack(fill=tk.BOTH, expand=True)
+    
+    phase_columns = ("phase", "runs", "p50", "p95", "max")
+    phase_tree = ttk.Treeview(frame, columns=phase_columns, show="headings", height=6)
+    for column in phase_columns:
+        phase_tree.heading(column, text=column.title() if column in ("phase", "runs", "max") else column)
+        phase_tree.column(column, width=380 if column == "phase" else 80, anchor=tk.W if column == "phase" else tk.E)
+    phase_tree.pack(fill=tk.X)
+    
+    def show_selected(_event=None):
+        selection = summary_tree.selection()
+        if not selection:
+            return
+        kind, name = json.loads(selection[0])
+        draw_trend_chart(chart, duration_trend(kind, name))
+        phase_tree.delete(*phase_tree.get_children())
+        for entry in phase_summary(kind, name):
+            phase_tree.insert("", tk.END, values=(
+                entry["phase"], entry["runs"], _format_seconds(entry["p50"]),
+                _format_seconds(entry["p95"]), _format_seconds(entry["max"])
+            ))
+    
+    def refresh():
+        summary_tree.delete(*summary_tree.get_children())
+        try:
+            entries = duration_summary()
+        except Exception as e:
+            app.log_message(f"Could not read operation history: {e}", "red")
+            return
+        for entry in entries:
+            summary_tree.insert("", tk.END, iid=json.dumps([entry["kind"], entry["name"]]), values=(
+                f"{entry['kind']} {entry['name']}", entry["runs"], entry["failures"],
+                _format_seconds(entry["p50"]), _format_seconds(entry["p90"]), _format_seconds(entry["p95"]),
+                _format_seconds(entry["max"]), _format_seconds(entry["last"])
+            ))
+        show_selected()
+    
+    summary_tree.bind("<<TreeviewSelect>>", show_selected)
+    ttk.Button(frame, text="Refresh", command=refresh).pack(anchor=tk.E, pady=(10, 0))
+    
+    # Reload the history whenever the tab is shown
+    parent.bind("<Map>", lambda e: refresh(), add="+")
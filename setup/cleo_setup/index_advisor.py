@@ -0,0 +1,754 @@
+"""
+Suggest indexes from the workload a database has actually run.
+
+Run it after a load test or a SQL function benchmark. The advisor reads
+pg_stat_statements (the busiest statements, including those inside functions)
+and pg_stat_user_tables (sequential scans and write counts). Candidate indexes
+come from the columns those statements filter, join and sort on, plus foreign
+keys without an index. Candidates already covered by an existing index are
+dropped.
+
+Each candidate is then tested in two ways:
+
+- estimated: the planner cost of the affected statements, as EXPLAIN
+  (GENERIC_PLAN) with a hypothetical hypopg index, or with the real index in
+  the trial copy when hypopg is not installed;
+- measured (--trial): the database is copied into a throwaway database where
+  each candidate is built for real, timing the build, its size, the SQL
+  function benchmark suite and bulk inserts with and without it.
+
+pg_stat_statements has to be preloaded; the compose file does that for the
+local stack, tracking top-level statements only. "reset" clears
+pg_stat_statements and tracks the statements inside functions as well, so
+that the next advice only reflects the workload run in between; "advise"
+puts the tracking back to top-level. The table statistics are never reset,
+since autovacuum relies on them, so their counts add up since the server
+started.
+
+Command line:
+    
+    python -m cleo_setup.index_advisor --container cleo-db-1 reset
+    python -m cleo_setup.index_advisor --container cleo-db-1 advise --trial --candidates 5
+"""
+import argparse
+import json
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import record_operation
+from .schema import load_schema
+from .sql_benchmark import run_benchmark
+from .utils.psql import local_target, psql, query
+
+TOP_STATEMENTS = 50
+CANDIDATES = 5
+TRIAL_REPEAT = 5
+INSERT_ROWS = 2000
+# Candidates below both of these are reported but not recommended
+MIN_ESTIMATED_GAIN = 0.10
+MIN_MEASURED_GAIN = 0.05
+
+STATEMENTS_SQL = """
+SELECT queryid::text AS id, calls, total_exec_time AS total_ms, mean_exec_time AS mean_ms, rows,
+       shared_blks_hit + shared_blks_read AS buffers, query
+FROM pg_stat_statements
+WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+  AND query ~* '^\\s*(select|with|update|delete)\\s'
+  AND query !~* '(pg_stat_|pg_catalog|information_schema|hypopg|EXPLAIN)'
+ORDER BY total_exec_time DESC
+LIMIT {limit}
+"""
+TABLES_SQL = """
+SELECT relname AS table, seq_scan, seq_tup_read, coalesce(idx_scan, 0) AS idx_scan, n_live_tup AS rows,
+       n_tup_ins + n_tup_upd + n_tup_del AS writes
+FROM pg_stat_user_tables
+WHERE schemaname = current_schema()
+"""
+# Key columns of the complete btree indexes; an expression is listed as its text, so it
+# never matches a plain column, and INCLUDE columns are left out since they cannot be searched
+INDEXES_SQL = """
+SELECT t.relname AS table, i.relname AS index,
+       array_agg(coalesce(a.attname, pg_get_indexdef(x.indexrelid, k.ord::int, true)) ORDER BY k.ord) AS columns
+FROM pg_index x
+JOIN pg_class t ON t.oid = x.indrelid
+JOIN pg_class i ON i.oid = x.indexrelid
+JOIN pg_am m ON m.oid = i.relam AND m.amname = 'btree'
+JOIN pg_namespace n ON n.oid = t.relnamespace AND n.nspname = current_schema()
+CROSS JOIN LATERAL unnest(x.indkey) WITH ORDINALITY AS k(attnum, ord)
+LEFT JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum AND k.attnum <> 0
+WHERE x.indpred IS NULL AND k.ord <= x.indnkeyatts
+GROUP BY t.relname, i.relname
+"""
+
+_KEYWORDS = {"where", "join", "on", "left", "right", "inner", "outer", "full", "cross", "group", "order", "limit",
+             "offset", "using", "natural", "lateral", "union", "having", "window", "as", "and", "or", "set", "returning"}
+_RELATION_PATTERN = re.compile(r'\b(?:FROM|JOIN|UPDATE)\s+(?:ONLY\s+)?"?(\w+)"?(?:\s+(?:AS\s+)?"?(\w+)"?)?', re.IGNORECASE)
+# alias.column or column followed by an operator that a btree index can serve
+_PREDICATE_PATTERN = re.compile(r'(?:"?(\w+)"?\.)?"?(\w+)"?\s*(?:=|<=|>=|<|>|\bIN\b|\bBETWEEN\b|= ANY)', re.IGNORECASE)
+_ORDER_PATTERN = re.compile(r'\bORDER\s+BY\s+(.+?)(?:\bLIMIT\b|\bOFFSET\b|\)|$)', re.IGNORECASE | re.DOTALL)
+
+
+def query_json(target, sql):
+    """Run a query through psql and return its rows as dicts."""
+    stdout, _ = query(target, f"SELECT coalesce(json_agg(q), '[]') FROM ({sql.strip().rstrip(';')}) q;")
+    return json.loads(stdout.strip() or "[]")
+
+
+def extension_available(target, name):
+    """Tell whether an extension is installed on the server, without creating it."""
+    stdout, _ = query(target, f"SELECT 1 FROM pg_available_extensions WHERE name = '{name}';")
+    return bool(stdout.strip())
+
+
+def statements_available(target):
+    """Tell whether pg_stat_statements is created in the database and its library preloaded."""
+    try:
+        query(target, "SELECT 1 FROM pg_stat_statements LIMIT 1;")
+    except RuntimeError:
+        return False
+    return True
+
+
+def set_tracking(target, track):
+    """
+    Set pg_stat_statements.track for the whole server.
+    
+    Args:
+        target (dict): container, database and user; the user has to be a superuser.
+        track (str): "all" to include the statements inside functions, or None for the default.
+    """
+    setting = f"SET pg_stat_statements.track = '{track}'" if track else "RESET pg_stat_statements.track"
+    psql(target, f"ALTER SYSTEM {setting};\nSELECT pg_reload_conf();")
+
+
+def reset_statistics(target):
+    """
+    Start recording a workload: clear pg_stat_statements and track the statements
+    inside functions too, until the next advice. Creates the extension in the
+    database when the server has it. The table statistics are left alone.
+    
+    Returns:
+        bool: Whether pg_stat_statements is usable
+    """
+    if extension_available(target, "pg_stat_statements"):
+        psql(target, "CREATE EXTENSION IF NOT EXISTS pg_stat_statements;")
+    if not statements_available(target):
+        return False
+    psql(target, "SELECT pg_stat_statements_reset();")
+    set_tracking(target, "all")
+    return True
+
+
+class Candidate:
+    """
+    An index that may help the workload.
+    
+    Args:
+        table (str): Table to index.
+        columns (tuple): Indexed columns, in order.
+        reason (str): Why it was suggested.
+    """
+    
+    def __init__(self, table, columns, reason):
+        self.table = table
+        self.columns = tuple(columns)
+        self.reasons = [reason]
+        self.statements = []
+        self.estimate = None
+        self.trial = None
+    
+    @property
+    def label(self):
+        """The table and columns, for display."""
+        return f"{self.table}({', '.join(self.columns)})"
+    
+    @property
+    def definition(self):
+        """The CREATE INDEX statement, unnamed."""
+        columns = ", ".join(f'"{column}"' for column in self.columns)
+        return f'CREATE INDEX ON "{self.table}" ({columns})'
+    
+    def __repr__(self):
+        return f"Candidate({self.label})"
+    
+    def to_dict(self):
+        """Convert the candidate to a JSON-serializable dictionary."""
+        return {"table": self.table, "columns": list(self.columns), "reasons": self.reasons,
+                "statements": self.statements, "estimate": self.estimate, "trial": self.trial,
+                "verdict": verdict(self)}
+
+
+def statement_columns(query, schema):
+    """
+    Find the columns a statement filters, joins and sorts on.
+    
+    Args:
+        query (str): Statement text, as normalized by pg_stat_statements.
+        schema (Schema): The parsed schema.sql.
+    
+    Returns:
+        dict: {table: {"filter": [columns], "order": [columns]}}, columns in order of appearance
+    """
+    aliases = {}
+    for table, alias in _RELATION_PATTERN.findall(query):
+        if table in schema.tables:
+            aliases[table] = table
+            if alias and alias.lower() not in _KEYWORDS:
+                aliases[alias] = table
+    tables = set(aliases.values())
+    
+    def resolve(qualifier, column):
+        if qualifier:
+            table = aliases.get(qualifier)
+            return table if table and column in schema.tables[table].columns else None
+        owners = [table for table in tables if column in schema.tables[table].columns]
+        return owners[0] if len(owners) == 1 else None
+    
+    found = {}
+    
+    def add(kind, qualifier, column):
+        table = resolve(qualifier, column)
+        if table:
+            columns = found.setdefault(table, {"filter": [], "order": []})[kind]
+            if column not in columns:
+                columns.append(column)
+    
+    # Only look past the select list, where the predicates and sort keys are
+    start = re.search(r'\bFROM\b', query, re.IGNORECASE)
+    body = query[start.start():] if start else query
+    for qualifier, column in _PREDICATE_PATTERN.findall(body):
+        add("filter", qualifier, column)
+    for match in _ORDER_PATTERN.finditer(body):
+        for item in match.group(1).split(","):
+            parts = re.match(r'\s*(?:"?(\w+)"?\.)?"?(\w+)"?', item)
+            if parts:
+                add("order", parts.group(1), parts.group(2))
+    return found
+
+
+def existing_indexes(target):
+    """List the column lists of the indexes of every table."""
+    indexes = {}
+    for row in query_json(target, INDEXES_SQL):
+        indexes.setdefault(row["table"], []).append(tuple(row["columns"] or ()))
+    return indexes
+
+
+def is_covered(table, columns, indexes):
+    """Whether an existing index starts with these columns."""
+    return any(index[:len(columns)] == tuple(columns) for index in indexes.get(table, []))
+
+
+def build_candidates(statements, tables, schema, indexes):
+    """
+    Collect candidate indexes from the statements and from unindexed foreign keys.
+    
+    Args:
+        statements (list): Rows of STATEMENTS_SQL.
+        tables (dict): Rows of TABLES_SQL by table.
+        schema (Schema): The parsed schema.sql.
+        indexes (dict): From existing_indexes.
+    
+    Returns:
+        list: Candidates, with the ids of the statements that touch their table
+    """
+    candidates = {}
+    
+    def add(table, columns, reason, statement=None):
+        if not columns or is_covered(table, columns, indexes):
+            return
+        candidate = candidates.get((table, tuple(columns)))
+        if candidate is None:
+            candidate = candidates[(table, tuple(columns))] = Candidate(table, columns, reason)
+        elif reason not in candidate.reasons:
+            candidate.reasons.append(reason)
+    
+    for statement in statements:
+        for table, columns in statement_columns(statement["query"], schema).items():
+            for column in columns["filter"]:
+                add(table, [column], "filtered or joined on")
+            for column in columns["order"][:1]:
+                add(table, [column], "sorted on")
+                for column_filter in columns["filter"][:2]:
+                    if column_filter != column:
+                        add(table, [column_filter, column], "filtered, then sorted on")
+    
+    for fk in schema.foreign_keys():
+        # Deletes and updates of the referenced row scan the referencing table without one
+        if fk.table in tables:
+            add(fk.table, fk.columns, f"foreign key to {fk.ref_table}")
+    
+    for candidate in candidates.values():
+        candidate.statements = [statement["id"] for statement in statements
+                                if candidate.table in statement_columns(statement["query"], schema)]
+    return list(candidates.values())
+
+
+def _explain_costs(target, queries, setup_sql=""):
+    """
+    Get the planner's total cost of each query, as a generic plan.
+    
+    Args:
+        target (dict): container, database and user.
+        queries (dict): {id: query text with $n parameters}.
+        setup_sql (str): Run first in the same transaction, e.g. to create a hypothetical index.
+    
+    Returns:
+        dict: {id: cost}; queries that cannot be planned are left out
+    """
+    # Everything is rolled back, setup included; a failing statement only rolls back itself
+    script = ["\\set ON_ERROR_ROLLBACK on", "BEGIN;", setup_sql]
+    for query_id, text in queries.items():
+        script.append(f"\\echo @@{query_id}@@")
+        script.append(f"EXPLAIN (GENERIC_PLAN, FORMAT JSON) {text.strip().rstrip(';')};")
+    script.append("ROLLBACK;")
+    stdout, _ = query(target, "\n".join(script) + "\n", stop_on_error=False)
+    costs = {}
+    for query_id, output in re.findall(r'^@@(\S+)@@\n(.*?)(?=^@@|\Z)', stdout, re.MULTILINE | re.DOTALL):
+        try:
+            costs[query_id] = json.loads(output)[0]["Plan"]["Total Cost"]
+        except (ValueError, IndexError, KeyError):
+            continue
+    return costs
+
+
+def estimate(candidate, statements, before, costs_after):
+    """
+    Weigh the cost change of the affected statements by their share of the workload.
+    
+    Args:
+        candidate (Candidate): The candidate.
+        statements (dict): Rows of STATEMENTS_SQL by id.
+        before (dict): {id: cost} without the index.
+        costs_after (dict): {id: cost} with the index.
+    
+    Returns:
+        dict: gain (weighted relative cost reduction), saved_ms over the workload and
+        statements whose plan got cheaper
+    """
+    total_before = total_after = saved_ms = 0.0
+    improved = 0
+    for statement_id in candidate.statements:
+        if statement_id not in before or statement_id not in costs_after or not before[statement_id]:
+            continue
+        weight = statements[statement_id]["calls"]
+        total_before += before[statement_id] * weight
+        total_after += costs_after[statement_id] * weight
+        ratio = costs_after[statement_id] / before[statement_id]
+        if ratio < 0.99:
+            improved += 1
+            saved_ms += statements[statement_id]["total_ms"] * (1 - ratio)
+    return {"gain": 1 - total_after / total_before if total_before else 0.0, "saved_ms": saved_ms, "improved": improved}
+
+
+def estimate_hypothetical(target, candidates, statements, log):
+    """Estimate every candidate with a hypopg index; return False when hypopg is not available."""
+    if not extension_available(target, "hypopg"):
+        return False
+    queries = {statement["id"]: statement["query"] for statement in statements.values()}
+    before = _explain_costs(target, queries)
+    for candidate in candidates:
+        affected = {statement_id: queries[statement_id] for statement_id in candidate.statements}
+        if not affected:
+            continue
+        # The extension is created in the rolled-back transaction, so the database is left as it was
+        setup = f"CREATE EXTENSION IF NOT EXISTS hypopg;\nSELECT 1 FROM hypopg_create_index('{candidate.definition}');"
+        after = _explain_costs(target, affected, setup)
+        candidate.estimate = estimate(candidate, statements, before, after)
+        candidate.estimate["source"] = "hypopg"
+        log(f"  {candidate.label}: estimated {candidate.estimate['gain'] * 100:.0f}% "
+            f"cheaper over {candidate.estimate['improved']} statement(s)", "white")
+    return True
+
+
+def _timed(target, sql):
+    """Run SQL with psql's \\timing and return the milliseconds of each statement."""
+    stdout, _ = query(target, "\\timing on\n" + sql)
+    return [float(value) for value in re.findall(r"^Time: ([\d.]+) ms", stdout, re.MULTILINE)]
+
+
+def insert_cost(target, table, schema, rows=INSERT_ROWS):
+    """
+    Time a bulk insert of copies of existing rows, rolled back.
+    
+    Returns:
+        float: Milliseconds for the insert (best of three), or None if it could not run
+    """
+    columns = [name for name, column in schema.tables[table].columns.items()
+               if not column.serial and name not in schema.tables[table].unique_columns()]
+    if not columns:
+        return None
+    names = ", ".join(f'"{column}"' for column in columns)
+    insert = f'INSERT INTO "{table}" ({names}) SELECT {names} FROM "{table}" LIMIT {rows};'
+    try:
+        times = _timed(target, "\n".join(["BEGIN;", insert, "ROLLBACK;"] * 3) + "\n")
+    except RuntimeError:
+        return None
+    # Every third timing is the insert; BEGIN and ROLLBACK are timed as well
+    inserts = times[1::3]
+    return min(inserts) if inserts else None
+
+
+def suite_total(report):
+    """Sum of the p50 of every call of a benchmark run, in milliseconds."""
+    return sum(entry["p50"] for entry in report["results"].values() if entry["p50"] is not None)
+
+
+def create_trial_database(target, log):
+    """Copy the database into a throwaway database in the same container and return its target."""
+    from .sim_sync import stream_dump
+    trial = dict(target, database=f"{target['database']}_index_trial")
+    admin = dict(target, database="postgres")
+    psql(admin, f'DROP DATABASE IF EXISTS "{trial["database"]}" WITH (FORCE);\nCREATE DATABASE "{trial["database"]}";')
+    log(f"Copying {target['database']} into {trial['database']}...", "cyan")
+    result = stream_dump(target, trial, log=log)
+    if result["error"]:
+        drop_trial_database(trial)
+        raise RuntimeError(f"Could not copy the database: {result['error'][:500]}")
+    return trial
+
+
+def drop_trial_database(trial):
+    """Drop the throwaway database."""
+    psql(dict(trial, database="postgres"), f'DROP DATABASE IF EXISTS "{trial["database"]}" WITH (FORCE);')
+
+
+def trial_candidates(trial, candidates, statements, schema, repeat=TRIAL_REPEAT, estimate_costs=False,
+                     log=None, operation=None):
+    """
+    Build each candidate for real in the trial database and measure it.
+    
+    Args:
+        trial (dict): The throwaway database.
+        candidates (list): Candidates to build, one at a time.
+        statements (dict): Rows of STATEMENTS_SQL by id.
+        schema (Schema): The parsed schema.sql.
+        repeat (int): Timed runs per benchmark call.
+        estimate_costs (bool): Also estimate the planner costs with the real index (when hypopg is missing).
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add a phase per build to.
+    """
+    log = log or (lambda message, color="white": print(message))
+    quiet = lambda message, color="white": None
+    queries = {statement["id"]: statement["query"] for statement in statements.values()}
+    before_costs = _explain_costs(trial, queries) if estimate_costs else {}
+    log("Benchmarking the trial copy without new indexes...", "cyan")
+    baseline = run_benchmark(trial, repeat=repeat, nested=False, log=quiet)
+    baseline_total = suite_total(baseline)
+    baseline_inserts = {}
+    
+    for candidate in candidates:
+        label = candidate.label
+        if candidate.table not in baseline_inserts:
+            baseline_inserts[candidate.table] = insert_cost(trial, candidate.table, schema)
+        name = f"advisor_{candidate.table}_{'_'.join(candidate.columns)}"[:63]
+        try:
+            build_ms = _timed(trial, f'{candidate.definition.replace("CREATE INDEX ON", f"CREATE INDEX {name} ON")};\n'
+                                     f'ANALYZE "{candidate.table}";\n')[0]
+            size = int(query(trial, f"SELECT pg_relation_size('{name}');")[0].strip())
+            if estimate_costs:
+                after = _explain_costs(trial, {statement_id: queries[statement_id] for statement_id in candidate.statements})
+                candidate.estimate = estimate(candidate, statements, before_costs, after)
+                candidate.estimate["source"] = "trial"
+            with_index = run_benchmark(trial, repeat=repeat, nested=False, log=quiet)
+            inserts = insert_cost(trial, candidate.table, schema)
+        except RuntimeError as e:
+            log(f"  {label}: {e}", "red")
+            if operation:
+                operation.add_phase(label, 0, "failed")
+            continue
+        finally:
+            query(trial, f"DROP INDEX IF EXISTS {name};")
+        
+        calls = {}
+        for call, entry in with_index["results"].items():
+            before = baseline["results"].get(call)
+            if before and before["p50"] and entry["p50"] is not None:
+                calls[call] = 1 - entry["p50"] / before["p50"]
+        best = max(calls.items(), key=lambda item: item[1]) if calls else (None, 0.0)
+        base_insert = baseline_inserts[candidate.table]
+        candidate.trial = {
+            "build_ms": build_ms,
+            "size": size,
+            "suite_gain": 1 - suite_total(with_index) / baseline_total if baseline_total else 0.0,
+            "best_call": best[0],
+            "best_gain": best[1],
+            "insert_us_per_row": ((inserts - base_insert) * 1000 / INSERT_ROWS
+                                  if inserts is not None and base_insert is not None else None),
+        }
+        if operation:
+            operation.add_phase(label, build_ms / 1000, "ok")
+        log(f"  {label}: built in {build_ms:,.0f} ms, {size / 1024:,.0f} KiB, "
+            f"suite {candidate.trial['suite_gain'] * 100:+.1f}%", "white")
+
+
+def verdict(candidate):
+    """Recommend, or not, from the estimate and the trial."""
+    estimated = candidate.estimate["gain"] if candidate.estimate else None
+    measured = candidate.trial["suite_gain"] if candidate.trial else None
+    best = candidate.trial["best_gain"] if candidate.trial else None
+    if measured is not None:
+        if measured >= MIN_MEASURED_GAIN or best >= 2 * MIN_MEASURED_GAIN:
+            return "recommend"
+        # The benchmark suite may not run the statements the estimate is based on
+        return "estimated only" if (estimated or 0) >= MIN_ESTIMATED_GAIN else "no measured gain"
+    if estimated is not None:
+        return "try it" if estimated >= MIN_ESTIMATED_GAIN else "no estimated gain"
+    return "untested"
+
+
+def rank(candidates, tables):
+    """Order candidates by estimated savings, then by the sequential reads of their table."""
+    def score(candidate):
+        saved = candidate.estimate["saved_ms"] if candidate.estimate else 0.0
+        return (-saved, -len(candidate.statements), -tables.get(candidate.table, {}).get("seq_tup_read", 0))
+    return sorted(candidates, key=score)
+
+
+def advise(target, top=TOP_STATEMENTS, limit=CANDIDATES, trial=False, repeat=TRIAL_REPEAT, schema=None,
+           log=None, operation=None):
+    """
+    Collect the workload, build candidates and test them.
+    
+    Args:
+        target (dict): container, database and user.
+        top (int): Busiest statements to consider.
+        limit (int): Candidates to report (and to build, with trial).
+        trial (bool): Build the candidates for real in a throwaway copy of the database.
+        repeat (int): Timed runs per benchmark call in the trial.
+        schema (Schema, optional): The parsed schema.sql.
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add phases to.
+    
+    Returns:
+        dict: tables, statements, candidates and notes
+    """
+    log = log or (lambda message, color="white": print(message))
+    schema = schema or load_schema()
+    notes = []
+    statements = {}
+    if statements_available(target):
+        statements = {row["id"]: row for row in query_json(target, STATEMENTS_SQL.format(limit=int(top)))}
+        stdout, _ = query(target, "SHOW pg_stat_statements.track;")
+        if stdout.strip() == "all":
+            set_tracking(target, None)
+        else:
+            notes.append("Only top-level statements were recorded; reset the statistics before the workload "
+                         "to include the statements inside functions.")
+    else:
+        notes.append("pg_stat_statements is not available; candidates only come from foreign keys. Reset the "
+                     "statistics before the workload, and recreate the db service with the current compose file "
+                     "if it is not preloaded.")
+    tables = {row["table"]: row for row in query_json(target, TABLES_SQL)}
+    indexes = existing_indexes(target)
+    log(f"{len(statements)} statements, {sum(row['seq_scan'] for row in tables.values()):,} sequential scans "
+        f"over {len(tables)} tables", "cyan")
+    
+    candidates = build_candidates(list(statements.values()), tables, schema, indexes)
+    log(f"{len(candidates)} candidate indexes not covered by an existing one", "cyan")
+    hypothetical = False
+    if candidates and statements:
+        hypothetical = estimate_hypothetical(target, candidates, statements, log)
+        if not hypothetical:
+            notes.append("hypopg is not installed; estimates come from the real builds in the trial copy"
+                         if trial else "hypopg is not installed; use --trial for estimates and measurements")
+    candidates = rank(candidates, tables)[:limit]
+    
+    if trial and candidates:
+        started = time.monotonic()
+        trial_target = create_trial_database(target, log)
+        if operation:
+            operation.add_phase("copy", time.monotonic() - started, "ok")
+        try:
+            trial_candidates(trial_target, candidates, statements, schema, repeat, not hypothetical, log, operation)
+        finally:
+            drop_trial_database(trial_target)
+        candidates = rank(candidates, tables)
+    
+    return {"tables": tables, "statements": statements, "candidates": candidates, "notes": notes}
+
+
+def _percent(value):
+    """Format a relative gain, or a dash when there is none."""
+    return f"{value * 100:+.0f}%" if value is not None else "-"
+
+
+def advice_lines(advice):
+    """Render the advice as (text, color) lines."""
+    lines = []
+    scanned = sorted(advice["tables"].values(), key=lambda row: row["seq_tup_read"], reverse=True)[:5]
+    if scanned and scanned[0]["seq_tup_read"]:
+        lines.append(("Most sequentially read tables:", "cyan"))
+        for row in scanned:
+            if row["seq_tup_read"]:
+                lines.append((f"  {row['table']:<36} {row['seq_scan']:>8,} scans {row['seq_tup_read']:>12,} rows read "
+                              f"{row['idx_scan']:>8,} index scans {row['writes']:>8,} writes", "white"))
+    if not advice["candidates"]:
+        lines.append(("No candidate indexes", "green"))
+    else:
+        lines.append((f"{'index':<60} {'est.':>6} {'suite':>6} {'best':>6} {'size':>9} {'build':>8} {'insert':>10}  verdict",
+                      "cyan"))
+        for candidate in advice["candidates"]:
+            trial = candidate.trial or {}
+            insert = trial.get("insert_us_per_row")
+            size = f"{trial['size'] / 1024:,.0f} KiB" if trial else "-"
+            build = f"{trial['build_ms']:,.0f} ms" if trial else "-"
+            insert = f"{insert:+.1f} us/row" if insert is not None else "-"
+            result = verdict(candidate)
+            lines.append((
+                f"{candidate.label:<60} {_percent(candidate.estimate['gain'] if candidate.estimate else None):>6} "
+                f"{_percent(trial.get('suite_gain')):>6} {_percent(trial.get('best_gain')):>6} "
+                f"{size:>9} {build:>8} {insert:>10}  {result}",
+                "green" if result == "recommend" else "white"
+            ))
+            lines.append((f"    {'; '.join(candidate.reasons)}; {len(candidate.statements)} statement(s)", "white"))
+            if result == "recommend":
+                lines.append((f"    {candidate.definition};", "green"))
+    for note in advice["notes"]:
+        lines.append((note, "orange"))
+    return lines
+
+
+def save_advice(advice, database):
+    """Write the advice as JSON and return its path."""
+    from .utils import get_project_root
+    
+    directory = get_project_root() / ".cleo-setup" / "index-advisor"
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f"{datetime.now():%Y%m%d-%H%M%S}-{database}.json"
+    data = dict(advice, candidates=[candidate.to_dict() for candidate in advice["candidates"]])
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, default=str)
+    return path
+
+
+def run_index_advisor(app, database, top, limit, trial):
+    """Advise on indexes for a local database, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    app.log_local_message(f"\n---- INDEX ADVISOR ({target['database']}) ----", "yellow")
+    with record_operation("index-advisor", target["database"], trial=trial) as operation:
+        try:
+            advice = advise(target, top, limit, trial, log=app.log_local_message, operation=operation)
+        except (OSError, RuntimeError) as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        path = save_advice(advice, target["database"])
+        operation.details.update(report=str(path), recommended=[candidate.definition for candidate in advice["candidates"]
+                                                               if verdict(candidate) == "recommend"])
+    for line, color in advice_lines(advice):
+        app.log_local_message(line, color)
+    app.log_local_message(f"Advice saved to {path}", "cyan")
+
+
+def run_reset_statistics(app, database):
+    """Reset the workload statistics of a local database."""
+    target = local_target(app, database)
+    if not target:
+        return
+    try:
+        statements = reset_statistics(target)
+    except RuntimeError as e:
+        app.log_local_message(f"Error: {e}", "red")
+        return
+    app.log_local_message(f"Statistics of {target['database']} reset"
+                          + ("" if statements else " (pg_stat_statements is not preloaded)"),
+                          "green" if statements else "orange")
+
+
+def open_index_advisor_dialog(app):
+    """Ask for the advisor options and run it in the background."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Index Advisor")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    database = tk.StringVar(value="main")
+    top = tk.IntVar(value=TOP_STATEMENTS)
+    limit = tk.IntVar(value=CANDIDATES)
+    trial = tk.BooleanVar(value=True)
+    
+    ttk.Label(
+        frame,
+        text="Reset the statistics, run a load test or the SQL function benchmark, then advise.",
+        wraplength=420, justify=tk.LEFT
+    ).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+    ttk.Label(frame, text="Database:").grid(row=1, column=0, sticky=tk.W, pady=3)
+    database_frame = ttk.Frame(frame)
+    database_frame.grid(row=1, column=1, sticky=tk.W)
+    ttk.Radiobutton(database_frame, text="Main", variable=database, value="main").pack(side=tk.LEFT)
+    ttk.Radiobutton(database_frame, text="Simulation", variable=database, value="sim").pack(side=tk.LEFT, padx=10)
+    ttk.Label(frame, text="Busiest statements:").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(frame, from_=1, to=500, textvariable=top, width=8).grid(row=2, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Candidates:").grid(row=3, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(frame, from_=1, to=50, textvariable=limit, width=8).grid(row=3, column=1, sticky=tk.W)
+    ttk.Checkbutton(frame, text="Build and measure the candidates in a throwaway copy", variable=trial).grid(
+        row=4, column=0, columnspan=2, sticky=tk.W, pady=3)
+    
+    def reset():
+        threading.Thread(target=run_reset_statistics, args=(app, database.get()), daemon=True).start()
+    
+    def start():
+        try:
+            args = (app, database.get(), top.get(), limit.get(), trial.get())
+        except tk.TclError as e:
+            messagebox.showerror("Input Error", str(e), parent=dialog)
+            return
+        dialog.destroy()
+        threading.Thread(target=run_index_advisor, args=args, daemon=True).start()
+    
+    button_frame = ttk.Frame(frame)
+    button_frame.grid(row=5, column=0, columnspan=2, pady=10)
+    ttk.Button(button_frame, text="Reset Statistics", command=reset).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Advise", command=start).pack(side=tk.LEFT, padx=5)
+
+
+def main(argv=None):
+    """Advise on indexes from the command line."""
+    parser = argparse.ArgumentParser(description="Suggest and test indexes from the recorded workload")
+    parser.add_argument('--container', required=True, help='Database container')
+    parser.add_argument('--database', default="my_db", help='Database name')
+    parser.add_argument('--user', default="user", help='Database user')
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("reset", help="Clear pg_stat_statements and track the statements inside functions")
+    advise_parser = subparsers.add_parser("advise", help="Suggest and test indexes")
+    advise_parser.add_argument('--top', type=int, default=TOP_STATEMENTS, help='Busiest statements to consider')
+    advise_parser.add_argument('--candidates', type=int, default=CANDIDATES, help='Candidates to report and build')
+    advise_parser.add_argument('--trial', action='store_true', help='Build the candidates in a throwaway copy')
+    advise_parser.add_argument('--repeat', type=int, default=TRIAL_REPEAT, help='Timed runs per benchmark call in the trial')
+    advise_parser.add_argument('--json', action='store_true', help='Print the advice as JSON')
+    args = parser.parse_args(argv)
+    
+    target = {"container": args.container, "database": args.database, "user": args.user}
+    if args.command == "reset":
+        statements = reset_statistics(target)
+        print("Statistics reset" + ("" if statements else " (pg_stat_statements is not preloaded)"))
+        return 0
+    
+    log = (lambda message, color="white": None) if args.json else None
+    with record_operation("index-advisor", args.database, trial=args.trial) as operation:
+        advice = advise(target, args.top, args.candidates, args.trial, args.repeat, log=log, operation=operation)
+        path = save_advice(advice, args.database)
+        operation.details.update(report=str(path), recommended=[candidate.definition for candidate in advice["candidates"]
+                                                               if verdict(candidate) == "recommend"])
+    if args.json:
+        with open(path, encoding="utf-8") as f:
+            print(f.read())
+    else:
+        for line, _ in advice_lines(advice):
+            print(line)
+        print(f"Advice saved to {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,13 +9,24 @@ import sys
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import threading
+import fnmatch
 import shutil
 import tempfile
 from pathlib import Path
-import json
 import zipfile
 import importlib.resources as pkg_resources
 
+from .bundle import load_bundle_manifest, sync_bundle
+from .utils.locations import resolve_installation
+from .store import install_version, register_version, read_config, write_config, VERSIONS_DIR
+
+# Project directories and files that make up an installation
+PROJECT_DIRECTORIES = ['client', 'server', 'terraform', 'seed', 'scripts']
+PROJECT_FILES = ['compose.yml', 'README.md']
+
+# Patterns skipped when installing a versioned release from source
+SOURCE_IGNORE_PATTERNS = ['node_modules', '__pycache__', '*.pyc', '.git*', 'dist', 'build', '.terraform', '*.log']
+
 
 class InstallerApp:
     """Installer application for extracting and setting up CLEO SPA project files."""
@@ -34,6 +45,9 @@ class InstallerApp:
         self.install_dir = tk.StringVar()
         self.install_dir.set(str(Path.home() / "CLEO-SPA"))
         
+        # Install as a versioned release into the shared content store
+        self.versioned_install = tk.BooleanVar(value=False)
+        
         # Installation state
         self.is_installing = False
         
@@ -112,6 +126,12 @@ class InstallerApp:
         )
         warning_label.pack(pady=(10, 0))
         
+        ttk.Checkbutton(
+            dir_frame,
+            text=f"Install as a versioned release in {VERSIONS_DIR} (unchanged files are shared between versions)",
+            variable=self.versioned_install
+        ).pack(anchor=tk.W, pady=(10, 0))
+        
         # Progress frame (initially hidden)
         self.progress_frame = ttk.LabelFrame(main_frame, text="Extraction Progress", padding="10")
         
@@ -164,6 +184,15 @@ class InstallerApp:
         """Start the extraction process."""
         install_path = Path(self.install_dir.get())
         
+        if self.versioned_install.get():
+            # Versioned releases always live in the shared version directory
+            self.install_button.config(state='disabled')
+            self.progress_frame.pack(fill=tk.X, pady=(20, 0))
+            self.progress_bar.start()
+            self.is_installing = True
+            threading.Thread(target=self.perform_versioned_installation, daemon=True).start()
+            return
+        
         # Validate installation directory
         if not install_path.parent.exists():
             messagebox.showerror(
@@ -222,13 +251,82 @@ class InstallerApp:
             self.root.after(1000, lambda: self.installation_complete(install_path))
             
         except Exception as e:
-            self.root.after(0, lambda: self.installation_failed(str(e)))
+            message = str(e)
+            self.root.after(0, lambda: self.installation_failed(message))
+    
+    def perform_versioned_installation(self):
+        """Install the project files as a versioned release in the content store."""
+        try:
+            version = self.get_bundle_version()
+            self.update_progress(f"Storing project files for version {version}...")
+            
+            version_dir = install_version(self.collect_project_files(), version, progress=self.update_progress)
+            register_version(version, version_dir)
+            
+            self.update_progress("Installation completed successfully!")
+            self.root.after(1000, lambda: self.installation_complete(version_dir))
+            
+        except Exception as e:
+            message = str(e)
+            self.root.after(0, lambda: self.installation_failed(message))
+    
+    def get_bundle_version(self):
+        """Get the version of the project files being installed."""
+        manifest = load_bundle_manifest()
+        if manifest and manifest.get("version"):
+            return manifest["version"]
+        from . import __version__
+        return __version__
+    
+    def collect_project_files(self):
+        """
+        List the project files to install.
+        
+        Returns:
+            list: Pairs of (relative path, source file path)
+        """
+        manifest = load_bundle_manifest()
+        if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS') and manifest:
+            bundle_path = Path(sys._MEIPASS) / "cleo_setup" / "resources" / "project_files"
+            links = manifest.get("links", {})
+            return [(rel_path, bundle_path / links.get(rel_path, rel_path)) for rel_path in manifest["files"]]
+        
+        if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+            source_path = Path(sys._MEIPASS) / "cleo_setup" / "resources" / "project_files"
+        else:
+            source_path = Path(__file__).parent.parent.parent
+        
+        files = []
+        for name in PROJECT_DIRECTORIES + PROJECT_FILES:
+            item = source_path / name
+            if item.is_file():
+                files.append((name, item))
+                continue
+            if not item.is_dir():
+                continue
+            for root, dirs, file_names in os.walk(item):
+                dirs[:] = [d for d in dirs if not self._is_ignored(d)]
+                for file_name in file_names:
+                    if not self._is_ignored(file_name):
+                        file_path = Path(root) / file_name
+                        files.append((file_path.relative_to(source_path).as_posix(), file_path))
+        return files
+    
+    @staticmethod
+    def _is_ignored(name):
+        """Check if a source file or directory is left out of versioned installs."""
+        return any(fnmatch.fnmatch(name, pattern) for pattern in SOURCE_IGNORE_PATTERNS)
     
     def extract_from_executable(self, install_path):
         """Extract files from the frozen executable."""
         # In PyInstaller, bundled data is in sys._MEIPASS
         if hasattr(sys, '_MEIPASS'):
             bundle_path = Path(sys._MEIPASS) / "cleo_setup" / "resources" / "project_files"
+            manifest = load_bundle_manifest()
+            if bundle_path.exists() and manifest:
+                # Only copy files that changed since the last extraction
+                sync_bundle(bundle_path, install_path, manifest, progress=self.update_progress)
+                return
             if bundle_path.exists():
                 # Copy all bundled project files
                 for item in bundle_path.iterdir():
@@ -254,21 +352,7 @@ class InstallerApp:
         # When running from source, copy from the parent directory
         source_path = Path(__file__).parent.parent.parent
         
-        # Copy specific directories
-        directories_to_copy = [
-            'client',
-            'server', 
-            'terraform',
-            'seed',
-            'scripts'
-        ]
-        
-        files_to_copy = [
-            'compose.yml',
-            'README.md'
-        ]
-        
-        for dir_name in directories_to_copy:
+        for dir_name in PROJECT_DIRECTORIES:
             source_dir = source_path / dir_name
             if source_dir.exists():
                 target_dir = install_path / dir_name
@@ -276,26 +360,26 @@ class InstallerApp:
                     shutil.rmtree(target_dir)
                 shutil.copytree(source_dir, target_dir)
         
-        for file_name in files_to_copy:
+        for file_name in PROJECT_FILES:
             source_file = source_path / file_name
             if source_file.exists():
                 shutil.copy2(source_file, install_path / file_name)
     
     def create_initial_config(self, install_path):
         """Create initial configuration files."""
-        # Store config in a fixed location in user's home directory
-        config_dir = Path.home() / ".cleo-spa"
-        config_dir.mkdir(exist_ok=True)
-        
-        config_data = {
+        # Store config in a fixed location in user's home directory,
+        # keeping any versioned releases recorded there
+        config_data = read_config()
+        config_data.update({
             "installation_path": str(install_path),
             "version": "1.0.0",
             "installed_at": str(Path(__file__).parent.parent.parent),
             "setup_completed": True
-        }
+        })
+        # A plain installation is not one of the versioned releases
+        config_data.pop("active_version", None)
         
-        with open(config_dir / "config.json", 'w') as f:
-            json.dump(config_data, f, indent=2)
+        write_config(config_data)
     
     def update_progress(self, message):
         """Update the progress message."""
@@ -353,49 +437,13 @@ def check_installation():
     """
     Check if CLEO SPA is already installed and return the installation path.
     
+    The result is memoized and only resolved again when CLEO_SPA_PROJECT_PATH or
+    ~/.cleo-spa/config.json changes.
+    
     Returns:
         Path or None: Installation path if found, None otherwise
     """
-    # Check environment variable first
-    env_path = os.environ.get('CLEO_SPA_PROJECT_PATH')
-    if env_path and Path(env_path).exists():
-        return Path(env_path)
-    
-    # Check fixed config location first (primary method)
-    fixed_config_path = Path.home() / ".cleo-spa" / "config.json"
-    if fixed_config_path.exists():
-        try:
-            with open(fixed_config_path) as f:
-                config = json.load(f)
-            if config.get("setup_completed"):
-                install_path = Path(config.get("installation_path", ""))
-                if install_path.exists():
-                    return install_path
-        except (json.JSONDecodeError, KeyError, FileNotFoundError):
-            pass
-    
-    # Fallback: Check common installation locations for local config files
-    possible_locations = [
-        Path.home() / "CLEO-SPA",
-        Path.home() / "Documents" / "CLEO-SPA",
-        Path("C:/Program Files/CLEO-SPA") if sys.platform == "win32" else None,
-        Path("/opt/cleo-spa") if sys.platform.startswith("linux") else None,
-        Path("/Applications/CLEO-SPA") if sys.platform == "darwin" else None
-    ]
-    
-    for location in possible_locations:
-        if location and location.exists():
-            config_file = location / ".cleo-setup" / "config.json"
-            if config_file.exists():
-                try:
-                    with open(config_file) as f:
-                        config = json.load(f)
-                    if config.get("setup_completed"):
-                        return location
-                except (json.JSONDecodeError, KeyError):
-                    continue
-    
-    return None
+    return resolve_installation()
 
 
 def run_installer():
@@ -0,0 +1,503 @@
+"""
+Load generation against the CLEO SPA backend API.
+
+Logs in once, then drives weighted request scenarios against the backend with
+a fixed number of workers, either as fast as they can (closed loop) or at a
+target arrival rate (open loop). Open-loop latencies are measured from when
+each request was due, so a saturated server shows up as queueing delay rather
+than as a lower request rate. Results are reported as latency percentiles,
+histograms, throughput and error rates, in the console and the history.
+
+The backend's express-rate-limit middleware (server/app.ts) allows 1000
+requests per IP per 15 minutes in development and 100 in production, so a
+load test needs its max raised first. Requests it rejects with 429 are counted
+separately and left out of the latencies, and the run stops at the first one
+unless told to keep going.
+
+Usable from the Load Testing tab or the command line:
+    
+    python -m cleo_setup.load_testing --url http://localhost:3000 --email admin@example.com --password ... --rate 50
+"""
+import argparse
+import json
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+import tkinter as tk
+from tkinter import ttk, scrolledtext, filedialog, messagebox
+
+from .history import record_operation, percentile
+from .provisioning import create_session, login
+from .utils import log_message
+
+# Routes the dashboards hit most, weighted by how often staff open them
+DEFAULT_SCENARIOS = [
+    {"name": "appointments", "weight": 3, "path": "/api/ab/", "params": {"page": "{page}", "limit": "10"}},
+    {"name": "appointments by date", "weight": 2, "path": "/api/ab/date/{date}"},
+    {"name": "services page", "weight": 3, "path": "/api/service/all-page-filter", "params": {"page": "{page}", "limit": "10"}},
+    {"name": "products page", "weight": 2, "path": "/api/product/all-page-filter", "params": {"page": "{page}", "limit": "10"}},
+    {"name": "member vouchers", "weight": 2, "path": "/api/mv/v", "params": {"page": "{page}", "limit": "10"}},
+    {"name": "revenue mv report", "weight": 1, "path": "/api/rr/mrr/mv", "params": {"year": "{year}", "month": "{month}"}},
+    {"name": "revenue mcp report", "weight": 1, "path": "/api/rr/mrr/mcp", "params": {"year": "{year}", "month": "{month}"}},
+    {"name": "deferred revenue", "weight": 1, "path": "/api/rr/dr/mv", "params": {"year": "{year}", "month": "{month}"}},
+]
+
+# Status of responses rejected by the server's rate limiter
+THROTTLED_STATUS = 429
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BOUNDS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+def load_scenarios(path):
+    """
+    Load scenarios from a JSON file.
+    
+    The file holds a list, or an object with a "scenarios" list, of entries with
+    name, weight, path and optionally method, params and json. Paths, params
+    and bodies may use the {page}, {date}, {year} and {month} placeholders.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    scenarios = data.get("scenarios", []) if isinstance(data, dict) else data
+    for scenario in scenarios:
+        if "name" not in scenario or "path" not in scenario:
+            raise ValueError("Every scenario needs a name and a path")
+    return scenarios
+
+
+def _placeholder_values(pages, days):
+    """Pick random values for the scenario placeholders."""
+    day = date.today() - timedelta(days=random.randrange(days))
+    return {"page": random.randint(1, pages), "date": day.isoformat(), "year": day.year, "month": day.month}
+
+
+def _fill(value, values):
+    """Fill placeholders in a string, or in the strings of a dict or list."""
+    if isinstance(value, str):
+        return value.format(**values)
+    if isinstance(value, dict):
+        return {key: _fill(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, values) for item in value]
+    return value
+
+
+def build_histogram(latencies):
+    """Count latencies (in seconds) per bucket of HISTOGRAM_BOUNDS_MS, plus an overflow bucket."""
+    counts = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+    for latency in latencies:
+        latency_ms = latency * 1000
+        for index, bound in enumerate(HISTOGRAM_BOUNDS_MS):
+            if latency_ms <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+    return counts
+
+
+def format_histogram(counts, width=40):
+    """Render histogram counts as text bars, one line per non-empty bucket."""
+    largest = max(counts) if counts else 0
+    lines = []
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        label = f"<= {HISTOGRAM_BOUNDS_MS[index]} ms" if index < len(HISTOGRAM_BOUNDS_MS) else f"> {HISTOGRAM_BOUNDS_MS[-1]} ms"
+        bar = "#" * max(1, round(width * count / largest))
+        lines.append(f"{label:>12} {bar} {count}")
+    return lines
+
+
+def summarize(latencies, errors, statuses, elapsed, throttled=0):
+    """
+    Summarize the samples of one scenario, or of all of them.
+    
+    Requests rejected by the rate limiter are only counted in "throttled";
+    their latencies are not samples and they are not in "requests".
+    """
+    count = len(latencies)
+    return {
+        "requests": count,
+        "throttled": throttled,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "throughput": count / elapsed if elapsed else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+        "max": max(latencies) if latencies else None,
+        "statuses": dict(sorted((str(status), count) for status, count in statuses.items())),
+        "histogram": build_histogram(latencies),
+    }
+
+
+class LoadTest:
+    """
+    One load test run.
+    
+    Args:
+        base_url (str): The server, e.g. http://localhost:3000.
+        email (str): Email of the account to log in with.
+        password (str): Password of that account.
+        scenarios (list, optional): Scenario dicts; DEFAULT_SCENARIOS by default.
+        concurrency (int): Number of workers, and the cap on requests in flight.
+        rate (float): Target requests per second; 0 runs closed loop.
+        duration (float): Seconds to generate load for.
+        poisson (bool): Space open-loop arrivals randomly instead of evenly.
+        pages (int): Upper bound for the {page} placeholder.
+        days (int): How far back {date}, {year} and {month} reach.
+        timeout (float): Seconds per request.
+        stop_when_throttled (bool): Stop at the first 429 from the rate limiter.
+    """
+    
+    def __init__(self, base_url, email, password, scenarios=None, concurrency=10, rate=0.0,
+                 duration=30.0, poisson=False, pages=5, days=90, timeout=30.0, stop_when_throttled=True):
+        self.base_url = base_url.rstrip("/")
+        self.email = email
+        self.password = password
+        self.scenarios = scenarios or DEFAULT_SCENARIOS
+        self.concurrency = max(1, int(concurrency))
+        self.rate = max(0.0, float(rate))
+        self.duration = float(duration)
+        self.poisson = poisson
+        self.pages = max(1, int(pages))
+        self.days = max(1, int(days))
+        self.timeout = timeout
+        self.stop_when_throttled = stop_when_throttled
+        self.stopped_throttled = False
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._samples = {scenario["name"]: ([], [0], {}, [0]) for scenario in self.scenarios}
+        self._weights = [scenario.get("weight", 1) for scenario in self.scenarios]
+        self.elapsed = 0.0
+    
+    def stop(self):
+        """Stop generating load; requests in flight finish."""
+        self._stop.set()
+    
+    def _send(self, session, scenario, due):
+        """Send one request and record its latency measured from when it was due."""
+        values = _placeholder_values(self.pages, self.days)
+        kwargs = {"timeout": self.timeout, "params": _fill(scenario.get("params"), values)}
+        if "json" in scenario:
+            kwargs["json"] = _fill(scenario["json"], values)
+        try:
+            response = session.request(scenario.get("method", "GET"), self.base_url + _fill(scenario["path"], values), **kwargs)
+            # Read the whole body so the latency covers the full response
+            response.content
+            status = response.status_code
+        except Exception as e:
+            status = type(e).__name__
+        latency = time.monotonic() - due
+        
+        latencies, errors, statuses, throttled = self._samples[scenario["name"]]
+        with self._lock:
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == THROTTLED_STATUS:
+                # Rejected before reaching a route, so its latency says nothing about the server
+                throttled[0] += 1
+                if self.stop_when_throttled and not self._stop.is_set():
+                    self.stopped_throttled = True
+                    self._stop.set()
+                return
+            latencies.append(latency)
+            if not isinstance(status, int) or status >= 400:
+                errors[0] += 1
+    
+    def _closed_worker(self, session, deadline):
+        """Send requests back to back until the deadline."""
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            scenario = random.choices(self.scenarios, self._weights)[0]
+            self._send(session, scenario, time.monotonic())
+    
+    def _open_worker(self, session, arrivals):
+        """Send the requests the dispatcher schedules."""
+        while True:
+            item = arrivals.get()
+            if item is None:
+                return
+            self._send(session, *item)
+    
+    def _dispatch(self, arrivals, started, deadline):
+        """Schedule requests at the target rate."""
+        due = started
+        while not self._stop.is_set():
+            due += random.expovariate(self.rate) if self.poisson else 1.0 / self.rate
+            if due >= deadline:
+                break
+            wait = due - time.monotonic()
+            if wait > 0:
+                self._stop.wait(wait)
+            arrivals.put((random.choices(self.scenarios, self._weights)[0], due))
+    
+    def run(self):
+        """
+        Log in and generate load for the configured duration.
+        
+        Returns:
+            dict: The report, with "overall" and per-scenario summaries
+        """
+        session = create_session(self.concurrency)
+        try:
+            login(session, self.base_url, self.email, self.password, self.timeout)
+            started = time.monotonic()
+            deadline = started + self.duration
+            
+            if self.rate:
+                arrivals = queue.Queue()
+                workers = [
+                    threading.Thread(target=self._open_worker, args=(session, arrivals), daemon=True)
+                    for _ in range(self.concurrency)
+                ]
+                for worker in workers:
+                    worker.start()
+                self._dispatch(arrivals, started, deadline)
+                for _ in workers:
+                    arrivals.put(None)
+            else:
+                workers = [
+                    threading.Thread(target=self._closed_worker, args=(session, deadline), daemon=True)
+                    for _ in range(self.concurrency)
+                ]
+                for worker in workers:
+                    worker.start()
+            for worker in workers:
+                worker.join()
+            self.elapsed = time.monotonic() - started
+        finally:
+            session.close()
+        return self.report()
+    
+    def report(self):
+        """Summarize the samples collected so far."""
+        with self._lock:
+            all_latencies, all_errors, all_statuses, all_throttled = [], 0, {}, 0
+            scenarios = {}
+            for name, (latencies, errors, statuses, throttled) in self._samples.items():
+                scenarios[name] = summarize(latencies, errors[0], statuses, self.elapsed, throttled[0])
+                all_latencies.extend(latencies)
+                all_errors += errors[0]
+                all_throttled += throttled[0]
+                for status, count in statuses.items():
+                    all_statuses[status] = all_statuses.get(status, 0) + count
+        return {
+            "base_url": self.base_url,
+            "concurrency": self.concurrency,
+            "rate": self.rate,
+            "duration": round(self.elapsed, 3),
+            "stopped_throttled": self.stopped_throttled,
+            "overall": summarize(all_latencies, all_errors, all_statuses, self.elapsed, all_throttled),
+            "scenarios": scenarios,
+        }
+
+
+def _ms(seconds):
+    """Format seconds as milliseconds."""
+    return "-" if seconds is None else f"{seconds * 1000:.0f}"
+
+
+def format_report(report):
+    """
+    Format a load test report as console lines.
+    
+    Returns:
+        list: (message, color) tuples
+    """
+    overall = report["overall"]
+    mode = f"{report['rate']:g} req/s target" if report["rate"] else "closed loop"
+    lines = [
+        (f"{overall['requests']} requests in {report['duration']:.1f}s with {report['concurrency']} workers ({mode})", "cyan"),
+        (f"Throughput: {overall['throughput']:.1f} req/s, errors: {overall['errors']} ({overall['error_rate']:.1%})",
+         "green" if not overall["errors"] else "orange"),
+        (f"Latency ms: p50 {_ms(overall['p50'])}, p95 {_ms(overall['p95'])}, p99 {_ms(overall['p99'])}, max {_ms(overall['max'])}", "white"),
+        ("", "white"),
+        (f"{'Scenario':<22}{'Req':>7}{'Err%':>7}{'req/s':>8}{'p50':>7}{'p95':>7}{'p99':>7}", "cyan"),
+    ]
+    for name, summary in report["scenarios"].items():
+        lines.append((
+            f"{name[:21]:<22}{summary['requests']:>7}{summary['error_rate'] * 100:>6.1f}%{summary['throughput']:>8.1f}"
+            f"{_ms(summary['p50']):>7}{_ms(summary['p95']):>7}{_ms(summary['p99']):>7}",
+            "red" if summary["error_rate"] > 0.05 else "white"
+        ))
+    lines.append(("", "white"))
+    lines.append(("Latency histogram:", "cyan"))
+    lines.extend((line, "white") for line in format_histogram(overall["histogram"]))
+    statuses = ", ".join(f"{status}: {count}" for status, count in overall["statuses"].items())
+    lines.append((f"Responses: {statuses}", "white"))
+    if overall["throttled"]:
+        lines.append(("", "white"))
+        lines.append((
+            f"WARNING: {overall['throttled']} requests were rejected with {THROTTLED_STATUS} by the backend's rate limiter "
+            f"and are left out of the latencies and throughput"
+            f"{'; the run was stopped at the first one' if report.get('stopped_throttled') else ''}. "
+            f"express-rate-limit in server/app.ts allows 1000 requests per 15 minutes in development and 100 in "
+            f"production; raise its max before load testing.", "red"
+        ))
+    return lines
+
+
+def run_load_test(load_test, log):
+    """
+    Run a load test, log its report and record it in the history.
+    
+    Args:
+        load_test (LoadTest): The configured run.
+        log (callable): Called with (message, color) for each console line.
+    
+    Returns:
+        dict: The report, or None if the run could not start
+    """
+    log(f"Logging in to {load_test.base_url} and generating load for {load_test.duration:g}s...", "cyan")
+    with record_operation("loadtest", "run", url=load_test.base_url, concurrency=load_test.concurrency,
+                          rate=load_test.rate) as operation:
+        try:
+            report = load_test.run()
+        except (ConnectionError, PermissionError) as e:
+            log(str(e), "red")
+            operation.finish("failed")
+            return None
+        for name, summary in report["scenarios"].items():
+            if summary["p95"] is not None:
+                operation.add_phase(f"p95: {name}", summary["p95"], "ok" if not summary["errors"] else "failed")
+        overall = report["overall"]
+        operation.details.update(
+            requests=overall["requests"], throttled=overall["throttled"], throughput=round(overall["throughput"], 2),
+            error_rate=round(overall["error_rate"], 4), p50=overall["p50"], p95=overall["p95"], p99=overall["p99"]
+        )
+        operation.finish("ok" if overall["requests"] and overall["error_rate"] < 0.05 and not overall["throttled"]
+                         else "failed")
+    
+    for message, color in format_report(report):
+        log(message, color)
+    return report
+
+
+def setup_load_testing_tab(app, parent):
+    """Set up the load testing tab in the notebook."""
+    frame = ttk.Frame(parent, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    ttk.Label(
+        frame,
+        text="Generate load against a running backend to size the deployment. The tool logs in once with the "
+             "account below and sends weighted requests to the appointment, service, product, member voucher "
+             "and revenue routes. Set a target rate for an open-loop test, or 0 to send requests back to back. "
+             "The backend's rate limiter (1000 requests per 15 minutes in development) must be raised first; "
+             "the test stops at its first 429.",
+        wraplength=800,
+        justify=tk.LEFT
+    ).pack(fill=tk.X, pady=(0, 10))
+    
+    config_frame = ttk.LabelFrame(frame, text="Load Test Configuration")
+    config_frame.pack(fill=tk.X, pady=10)
+    
+    base_url = tk.StringVar(value=f"http://localhost:{app.backend_port.get()}")
+    email = tk.StringVar(value="admin@example.com")
+    password = tk.StringVar()
+    concurrency = tk.IntVar(value=10)
+    rate = tk.DoubleVar(value=0)
+    duration = tk.DoubleVar(value=30)
+    scenario_file = tk.StringVar()
+    
+    fields = [
+        ("Backend URL:", ttk.Entry(config_frame, textvariable=base_url, width=50)),
+        ("Email:", ttk.Entry(config_frame, textvariable=email, width=50)),
+        ("Password:", ttk.Entry(config_frame, textvariable=password, width=50, show="*")),
+        ("Workers:", ttk.Spinbox(config_frame, from_=1, to=200, textvariable=concurrency, width=8)),
+        ("Target req/s (0 = closed loop):", ttk.Spinbox(config_frame, from_=0, to=5000, textvariable=rate, width=8)),
+        ("Duration (s):", ttk.Spinbox(config_frame, from_=1, to=3600, textvariable=duration, width=8)),
+        ("Scenario file (optional):", ttk.Entry(config_frame, textvariable=scenario_file, width=50)),
+    ]
+    for row, (label, widget) in enumerate(fields):
+        ttk.Label(config_frame, text=label).grid(row=row, column=0, sticky=tk.W, padx=10, pady=5)
+        widget.grid(row=row, column=1, sticky=tk.W, pady=5)
+    ttk.Button(
+        config_frame,
+        text="Browse...",
+        command=lambda: scenario_file.set(filedialog.askopenfilename(filetypes=[("JSON files", "*.json")]) or scenario_file.get())
+    ).grid(row=len(fields) - 1, column=2, sticky=tk.W, padx=5, pady=5)
+    
+    running = {}
+    
+    def start():
+        if running.get("test"):
+            return
+        try:
+            scenarios = load_scenarios(scenario_file.get()) if scenario_file.get() else None
+            load_test = LoadTest(base_url.get(), email.get(), password.get(), scenarios,
+                                 concurrency.get(), rate.get(), duration.get())
+        except (OSError, ValueError, tk.TclError) as e:
+            messagebox.showerror("Input Error", str(e))
+            return
+        running["test"] = load_test
+        
+        def worker():
+            try:
+                run_load_test(load_test, app.log_load_message)
+            finally:
+                running.pop("test", None)
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def stop():
+        if running.get("test"):
+            running["test"].stop()
+            app.log_load_message("Stopping; requests in flight will finish.", "orange")
+    
+    button_frame = ttk.Frame(frame)
+    button_frame.pack(fill=tk.X, pady=5)
+    ttk.Button(button_frame, text="Start Load Test", command=start).pack(side=tk.LEFT, padx=5)
+    ttk.Button(button_frame, text="Stop", command=stop).pack(side=tk.LEFT, padx=5)
+    
+    console_frame = ttk.LabelFrame(frame, text="Load Test Console")
+    console_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+    
+    app.load_console = scrolledtext.ScrolledText(console_frame, wrap=tk.NONE, bg="black", fg="white", font=("Consolas", 10))
+    app.load_console.pack(fill=tk.BOTH, expand=True)
+    app.load_console.config(state=tk.DISABLED)
+    
+    app.load_console.tag_config("red", foreground="#FF6B6B")
+    app.load_console.tag_config("green", foreground="#76FF03")
+    app.load_console.tag_config("cyan", foreground="#4DD0E1")
+    app.load_console.tag_config("white", foreground="white")
+    app.load_console.tag_config("orange", foreground="#FFB74D")
+
+
+def main(argv=None):
+    """Run a load test from the command line."""
+    parser = argparse.ArgumentParser(description="Generate load against the CLEO SPA backend API")
+    parser.add_argument('--url', default="http://localhost:3000", help='Backend base URL')
+    parser.add_argument('--email', required=True, help='Email of the account to log in with')
+    parser.add_argument('--password', required=True, help='Password of that account')
+    parser.add_argument('--scenarios', help='JSON file of weighted scenarios (default: built-in dashboard mix)')
+    parser.add_argument('--concurrency', type=int, default=10, help='Number of workers')
+    parser.add_argument('--rate', type=float, default=0, help='Target requests per second; 0 runs closed loop')
+    parser.add_argument('--poisson', action='store_true', help='Space arrivals randomly at the target rate')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to generate load for')
+    parser.add_argument('--keep-going-when-throttled', action='store_true',
+                        help='Keep generating load after the rate limiter answers 429')
+    parser.add_argument('--json', help='Also write the report to this JSON file')
+    args = parser.parse_args(argv)
+    
+    load_test = LoadTest(
+        args.url, args.email, args.password,
+        load_scenarios(args.scenarios) if args.scenarios else None,
+        args.concurrency, args.rate, args.duration, args.poisson,
+        stop_when_throttled=not args.keep_going_when_throttled
+    )
+    report = run_load_test(load_test, lambda message, color: log_message(None, message, color))
+    if report is None:
+        return 1
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump(report, f, indent=2, default=str)
+    return 0 if report["overall"]["error_rate"] < 0.05 and not report["overall"]["throttled"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+Background prewarming of the Docker images CLEO SPA needs.
+
+When the application starts, the images used by terraform, compose.yml and the
+Dockerfiles it builds are resolved and any that are not present locally are
+loaded from a tarball cache or pulled, one at a time and at low priority, while
+the operator is still filling in the forms.
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from .aws_deployment import TERRAFORM_IMAGE
+from .utils import get_project_root
+
+# Saved images (docker save) used instead of pulling, e.g. on hosts without internet access
+IMAGE_CACHE_DIR = Path(os.environ.get("CLEO_SPA_IMAGE_CACHE", Path.home() / ".cleo-spa" / "image-cache"))
+
+_FROM_PATTERN = re.compile(r"^\s*FROM\s+(?:--\S+\s+)*(\S+)(?:\s+AS\s+(\S+))?", re.IGNORECASE)
+
+
+def _run_low_priority(command):
+    """
+    Run a docker command with a lower scheduling priority.
+    
+    On POSIX the command is started through nice(1) rather than with a
+    preexec_fn, which is not safe while the GUI's other threads are running.
+    """
+    if sys.platform == "win32":
+        flags = getattr(subprocess, 'BELOW_NORMAL_PRIORITY_CLASS', 0) | getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        return subprocess.run(command, capture_output=True, creationflags=flags)
+    if shutil.which("nice"):
+        command = ["nice", "-n", "10"] + command
+    return subprocess.run(command, capture_output=True)
+
+
+def dockerfile_images(dockerfile):
+    """
+    Get the base images of a Dockerfile.
+    
+    Args:
+        dockerfile (Path): The Dockerfile to read.
+    
+    Returns:
+        list: Image references from FROM lines, excluding earlier build stages
+    """
+    images = []
+    stages = set()
+    try:
+        lines = Path(dockerfile).read_text().splitlines()
+    except OSError:
+        return images
+    for line in lines:
+        match = _FROM_PATTERN.match(line)
+        if not match:
+            continue
+        image, stage = match.group(1), match.group(2)
+        # Skip references to earlier stages and images chosen by build arguments
+        if image.lower() not in stages and "$" not in image and image.lower() != "scratch":
+            images.append(image)
+        if stage:
+            stages.add(stage.lower())
+    return images
+
+
+def compose_images(compose_path):
+    """
+    Get the images a compose file runs or builds from.
+    
+    The file is scanned line by line for image: entries and build contexts, which
+    covers the layout of compose.yml without needing a YAML parser.
+    
+    Args:
+        compose_path (Path): The compose file.
+    
+    Returns:
+        list: Image references
+    """
+    compose_path = Path(compose_path)
+    try:
+        lines = compose_path.read_text().splitlines()
+    except OSError:
+        return []
+    
+    images = []
+    builds = []
+    service = None
+    in_services = False
+    for raw_line in lines:
+        line = raw_line.split(" #", 1)[0].rstrip()
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        indent = len(line) - len(line.lstrip())
+        stripped = line.strip()
+        if indent == 0:
+            in_services = stripped == "services:"
+            service = None
+            continue
+        if not in_services:
+            continue
+        if indent == 2 and stripped.endswith(":"):
+            service = {"context": None, "dockerfile": None}
+            builds.append(service)
+            continue
+        if service is None or ":" not in stripped:
+            continue
+        key, value = (part.strip().strip("'\"") for part in stripped.split(":", 1))
+        if key == "image" and value:
+            images.append(value)
+        elif key == "build" and value:
+            service["context"] = value
+        elif key == "context":
+            service["context"] = value
+        elif key == "dockerfile":
+            service["dockerfile"] = value
+    
+    for build in builds:
+        if not build["context"]:
+            continue
+        context_dir = compose_path.parent / build["context"]
+        dockerfile = context_dir / (build["dockerfile"] or "Dockerfile")
+        images.extend(dockerfile_images(dockerfile))
+    return images
+
+
+def required_images(project_root=None):
+    """
+    Resolve every image the current configuration needs.
+    
+    Returns:
+        list: Unique image references, in the order they are first needed
+    """
+    project_root = Path(project_root or get_project_root())
+    images = [TERRAFORM_IMAGE]
+    for name in ("compose.yml", "docker-compose.yml"):
+        compose_path = project_root / name
+        if compose_path.exists():
+            images.extend(compose_images(compose_path))
+            break
+    return list(dict.fromkeys(images))
+
+
+def image_present(image):
+    """Check if an image is available locally."""
+    result = subprocess.run(
+        ["docker", "image", "inspect", image],
+        capture_output=True,
+        creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+    )
+    return result.returncode == 0
+
+
+def cache_path(image):
+    """Get the tarball cache path for an image."""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]", "_", image)
+    return IMAGE_CACHE_DIR / f"{safe_name}.tar"
+
+
+def fetch_image(image):
+    """
+    Make an image available locally, loading it from the tarball cache if possible.
+    
+    Returns:
+        str: "cached" or "pulled" on success, None on failure
+    """
+    tarball = cache_path(image)
+    if tarball.exists():
+        result = _run_low_priority(["docker", "load", "-i", str(tarball)])
+        if result.returncode == 0 and image_present(image):
+            return "cached"
+    
+    result = _run_low_priority(["docker", "pull", image])
+    if result.returncode == 0:
+        return "pulled"
+    return None
+
+
+def export_image_cache(images=None, progress=print):
+    """
+    Save the required images as tarballs for use on hosts without internet access.
+    
+    Returns:
+        int: Number of images saved
+    """
+    IMAGE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    saved = 0
+    for image in images or required_images():
+        if not image_present(image) and not fetch_image(image):
+            progress(f"Could not get {image}")
+            continue
+        tarball = cache_path(image)
+        result = subprocess.run(["docker", "save", "-o", str(tarball), image], capture_output=True)
+        if result.returncode == 0:
+            saved += 1
+            progress(f"Saved {image} to {tarball}")
+        else:
+            progress(f"Failed to save {image}: {result.stderr.decode(errors='replace').strip()}")
+    return saved
+
+
+def prewarm_images(status=None, project_root=None):
+    """
+    Fetch the images that are not available locally, one at a time.
+    
+    Args:
+        status (callable, optional): Called with a short status message.
+        project_root (Path, optional): The project to resolve images for.
+    
+    Returns:
+        dict: Image -> "present", "cached", "pulled" or "failed"
+    """
+    status = status or (lambda message: None)
+    results = {}
+    try:
+        images = required_images(project_root)
+        missing = [image for image in images if not image_present(image)]
+    except (OSError, subprocess.SubprocessError):
+        status("Docker images: Docker not available")
+        return results
+    
+    for image in images:
+        if image not in missing:
+            results[image] = "present"
+    
+    for index, image in enumerate(missing, start=1):
+        status(f"Docker images: fetching {image} ({index}/{len(missing)})...")
+        try:
+            results[image] = fetch_image(image) or "failed"
+        except (OSError, subprocess.SubprocessError):
+            results[image] = "failed"
+    
+    failed = [image for image, result in results.items() if result == "failed"]
+    if failed:
+        status(f"Docker images: {len(images) - len(failed)}/{len(images)} ready, failed: {', '.join(failed)}")
+    else:
+        status(f"Docker images: all {len(images)} ready")
+    return results
+
+
+def start_prewarm(app):
+    """Prewarm images in a background thread, reporting progress in the app's status bar."""
+    def set_status(message):
+        app.root.after(0, app.prewarm_status.set, message)
+    
+    thread = threading.Thread(target=prewarm_images, args=(set_status,), daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,339 @@
+"""
+Bulk user provisioning for CLEO SPA.
+
+Creates many staff accounts through the backend API: the super admin logs in
+once, then every user is created with POST /api/auth/create and, when a
+password is given or generated, activated with an invitation JWT through
+POST /api/auth/invites. Requests share one keep-alive session, run with bounded
+concurrency and are retried with exponential backoff on connection errors,
+timeouts, 429 and 5xx responses.
+"""
+import csv
+import random
+import secrets
+import string
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+import jwt
+import requests
+from requests.adapters import HTTPAdapter
+
+from .history import record_operation
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REPORT_FIELDS = ["username", "email", "role_name", "status", "http_status", "attempts", "seconds", "password", "message"]
+
+
+def generate_password(length=16):
+    """Generate a random password for an account without one."""
+    alphabet = string.ascii_letters + string.digits
+    return ''.join(secrets.choice(alphabet) for _ in range(length))
+
+
+def _read_csv_dir(directory):
+    """Read every CSV file in a seed table directory."""
+    rows = []
+    for csv_file in sorted(Path(directory).glob("*.csv")):
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            rows.extend(csv.DictReader(f))
+    return rows
+
+
+def load_users_from_seed(seed_dir):
+    """
+    Load users and their roles from seed tables (users, user_to_role, roles).
+    
+    Args:
+        seed_dir (Path): A directory like seed/pre holding one directory per table.
+    
+    Returns:
+        list: Dicts with username, email and role_name
+    """
+    seed_dir = Path(seed_dir)
+    role_names = {row["id"]: row["role_name"] for row in _read_csv_dir(seed_dir / "roles")}
+    user_roles = {row["user_auth_id"]: role_names.get(row["role_id"], "") for row in _read_csv_dir(seed_dir / "user_to_role")}
+    return [
+        {"username": row["username"], "email": row["email"], "role_name": user_roles.get(row.get("user_auth_id"), "")}
+        for row in _read_csv_dir(seed_dir / "users")
+    ]
+
+
+def load_users_csv(path):
+    """
+    Load users from a CSV file with username, email and role_name columns.
+    
+    An optional password column sets each account's password. A directory is
+    read as seed tables instead.
+    
+    Returns:
+        list: Dicts with username, email, role_name and optionally password
+    """
+    path = Path(path)
+    if path.is_dir():
+        return load_users_from_seed(path)
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {"username", "email", "role_name"} - set(reader.fieldnames or [])
+        if missing:
+            raise ValueError(f"{path.name} is missing columns: {', '.join(sorted(missing))}")
+        return [{key: (value or "").strip() for key, value in row.items() if key} for row in reader]
+
+
+def create_session(concurrency):
+    """Create a keep-alive session with a connection pool sized for the workers."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Content-Type": "application/json"})
+    return session
+
+
+def request_with_retry(session, method, url, retries=3, backoff=0.5, timeout=10, **kwargs):
+    """
+    Send a request, retrying transient failures with exponential backoff and jitter.
+    
+    Returns:
+        tuple: (response or None, attempts, error message or None)
+    """
+    error = None
+    for attempt in range(1, retries + 2):
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+            if response.status_code not in RETRY_STATUSES or attempt > retries:
+                return response, attempt, None
+            error = f"HTTP {response.status_code}"
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error = str(e)
+            if attempt > retries:
+                break
+        time.sleep(backoff * (2 ** (attempt - 1)) * (1 + random.random()))
+    return None, retries + 1, error
+
+
+def login(session, base_url, email, password, timeout=10):
+    """Log the session in as the super admin."""
+    response, _, error = request_with_retry(
+        session, "POST", f"{base_url}/api/auth/login",
+        json={"username": email, "password": password}, timeout=timeout
+    )
+    if response is None:
+        raise ConnectionError(f"Login failed: {error}")
+    if response.status_code != 200:
+        raise PermissionError(f"Login failed with status {response.status_code}: {response.text[:200]}")
+
+
+def _response_message(response):
+    """Get the message of an API response."""
+    try:
+        return response.json().get("message", "")
+    except ValueError:
+        return response.text[:200]
+
+
+def provision_user(session, base_url, user, inv_jwt_secret=None, retries=3, timeout=10):
+    """
+    Create one user and, if a password is known and a secret is given, activate it.
+    
+    Returns:
+        dict: The per-user result row for the report
+    """
+    started = time.monotonic()
+    result = {
+        "username": user.get("username", ""),
+        "email": user.get("email", ""),
+        "role_name": user.get("role_name", ""),
+        "password": ""
+    }
+    
+    response, attempts, error = request_with_retry(
+        session, "POST", f"{base_url}/api/auth/create", retries=retries, timeout=timeout,
+        json={"username": result["username"], "email": result["email"], "role_name": result["role_name"]}
+    )
+    result["attempts"] = attempts
+    if response is None:
+        result.update(status="failed", http_status="", message=error)
+    elif response.status_code == 201:
+        result.update(status="created", http_status=201, message=_response_message(response))
+    elif response.status_code == 409:
+        # Also the outcome of a retried request whose first attempt succeeded
+        result.update(status="exists", http_status=409, message=_response_message(response))
+    else:
+        result.update(status="failed", http_status=response.status_code, message=_response_message(response))
+    
+    # Set the password through the invitation flow, with a token minted like the server's own
+    if result["status"] == "created" and inv_jwt_secret:
+        password = user.get("password") or generate_password()
+        token = jwt.encode(
+            {"email": result["email"], "exp": datetime.now(timezone.utc) + timedelta(hours=1)},
+            inv_jwt_secret, algorithm="HS256"
+        )
+        response, attempts, error = request_with_retry(
+            session, "POST", f"{base_url}/api/auth/invites", retries=retries, timeout=timeout,
+            params={"token": token}, json={"password": password}
+        )
+        result["attempts"] += attempts
+        if response is not None and response.status_code == 200:
+            result["status"] = "activated"
+            result["password"] = "" if user.get("password") else password
+        else:
+            result["message"] = f"Created, but setting the password failed: {error or _response_message(response)}"
+    
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def provision_users(base_url, admin_email, admin_password, users, inv_jwt_secret=None,
+                    concurrency=8, retries=3, timeout=10, progress=None):
+    """
+    Create many users concurrently.
+    
+    Args:
+        base_url (str): The server, e.g. http://localhost:3000.
+        admin_email (str): Super admin email.
+        admin_password (str): Super admin password.
+        users (list): Dicts with username, email, role_name and optional password.
+        inv_jwt_secret (str, optional): INV_JWT_SECRET, to set passwords on the new accounts.
+        concurrency (int): Maximum requests in flight.
+        retries (int): Retries per request on transient failures.
+        timeout (float): Seconds per request.
+        progress (callable, optional): Called with each result as it completes.
+    
+    Returns:
+        list: Per-user results, in input order
+    """
+    base_url = base_url.rstrip("/")
+    session = create_session(concurrency)
+    try:
+        login(session, base_url, admin_email, admin_password, timeout)
+        results = [None] * len(users)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(provision_user, session, base_url, user, inv_jwt_secret, retries, timeout): index
+                for index, user in enumerate(users)
+            }
+            for future in as_completed(futures):
+                result = future.result()
+                results[futures[future]] = result
+                if progress:
+                    progress(result)
+        return results
+    finally:
+        session.close()
+
+
+def write_report(results, path):
+    """Write the per-user results as CSV."""
+    with open(path, "w", newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=REPORT_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+    return path
+
+
+def _base_url(request_url):
+    """Get the server's base URL from the super admin request URL."""
+    return request_url.split("/api/", 1)[0].rstrip("/")
+
+
+def run_bulk_provisioning(app, request_url, csv_path, admin_email, admin_password, concurrency):
+    """Provision the users in a CSV file, logging progress to the super admin console."""
+    try:
+        users = load_users_csv(csv_path)
+    except (OSError, ValueError, KeyError) as e:
+        app.log_su_message(f"Could not read users: {e}", "red")
+        return
+    if not users:
+        app.log_su_message("No users found in the CSV file.", "red")
+        return
+    
+    base_url = _base_url(request_url)
+    app.log_su_message(f"Provisioning {len(users)} users on {base_url} ({concurrency} at a time)...", "cyan")
+    colors = {"created": "green", "activated": "green", "exists": "orange", "failed": "red"}
+    
+    def report_progress(result):
+        app.log_su_message(
+            f"  {result['email']}: {result['status']} ({result['seconds']}s, {result['attempts']} requests)"
+            + (f" - {result['message']}" if result["status"] == "failed" else ""),
+            colors.get(result["status"], "white")
+        )
+    
+    with record_operation("provisioning", "bulk", users=len(users), concurrency=concurrency) as operation:
+        try:
+            results = provision_users(
+                base_url, admin_email, admin_password, users,
+                inv_jwt_secret=app.inv_jwt_secret.get() or None,
+                concurrency=concurrency, progress=report_progress
+            )
+        except (ConnectionError, PermissionError) as e:
+            app.log_su_message(str(e), "red")
+            operation.finish("failed")
+            return
+        for result in results:
+            operation.add_phase(result["email"], result["seconds"], "failed" if result["status"] == "failed" else "ok")
+        failed = sum(1 for result in results if result["status"] == "failed")
+        operation.finish("ok" if not failed else "failed")
+    
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    report_path = write_report(results, Path(csv_path).with_suffix(".report.csv") if Path(csv_path).is_file()
+                               else Path(csv_path) / "provisioning_report.csv")
+    app.log_su_message(
+        "Done: " + ", ".join(f"{count} {status}" for status, count in sorted(counts.items())), "green" if not failed else "orange"
+    )
+    app.log_su_message(f"Report written to {report_path} (contains generated passwords)", "cyan")
+
+
+def setup_bulk_provisioning_section(parent, app, server_url):
+    """Add the bulk provisioning controls to the super admin tab."""
+    bulk_frame = ttk.LabelFrame(parent, text="Bulk User Provisioning")
+    bulk_frame.pack(fill=tk.X, pady=10)
+    
+    ttk.Label(
+        bulk_frame,
+        text="Create staff accounts from a CSV with username, email, role_name and optional password columns, "
+             "or from a seed directory with users, user_to_role and roles tables. Logs in as the super admin below.",
+        wraplength=820,
+        justify=tk.LEFT
+    ).grid(row=0, column=0, columnspan=4, sticky=tk.W, padx=10, pady=5)
+    
+    csv_path = tk.StringVar()
+    admin_email = tk.StringVar(value="admin@example.com")
+    admin_password = tk.StringVar()
+    concurrency = tk.IntVar(value=8)
+    
+    ttk.Label(bulk_frame, text="Users CSV:").grid(row=1, column=0, sticky=tk.W, padx=10, pady=5)
+    ttk.Entry(bulk_frame, textvariable=csv_path, width=50).grid(row=1, column=1, sticky=tk.W, pady=5)
+    ttk.Button(
+        bulk_frame,
+        text="Browse...",
+        command=lambda: csv_path.set(filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")]) or csv_path.get())
+    ).grid(row=1, column=2, sticky=tk.W, padx=5, pady=5)
+    
+    ttk.Label(bulk_frame, text="Admin Email:").grid(row=2, column=0, sticky=tk.W, padx=10, pady=5)
+    ttk.Entry(bulk_frame, textvariable=admin_email, width=50).grid(row=2, column=1, sticky=tk.W, pady=5)
+    
+    ttk.Label(bulk_frame, text="Admin Password:").grid(row=3, column=0, sticky=tk.W, padx=10, pady=5)
+    ttk.Entry(bulk_frame, textvariable=admin_password, width=50, show="*").grid(row=3, column=1, sticky=tk.W, pady=5)
+    
+    ttk.Label(bulk_frame, text="Concurrency:").grid(row=4, column=0, sticky=tk.W, padx=10, pady=5)
+    ttk.Spinbox(bulk_frame, from_=1, to=32, textvariable=concurrency, width=5).grid(row=4, column=1, sticky=tk.W, pady=5)
+    
+    def start():
+        if not csv_path.get() or not admin_password.get():
+            messagebox.showerror("Input Error", "Choose a users CSV and enter the super admin password.")
+            return
+        threading.Thread(
+            target=run_bulk_provisioning,
+            args=(app, server_url.get(), csv_path.get(), admin_email.get(), admin_password.get(), max(1, concurrency.get())),
+            daemon=True
+        ).start()
+    
+    ttk.Button(bulk_frame, text="Provision Users", command=start).grid(row=4, column=2, sticky=tk.W, padx=5, pady=5)
@@ -0,0 +1,195 @@
+"""
+Readiness probing for the local CLEO SPA stack.
+
+docker-compose up -d returns as soon as the containers are created; the
+backend may still be compiling or connecting to the databases. This module
+checks the main and simulation databases, the backend API and the frontend
+concurrently until each one answers, using one keep-alive HTTP session and a
+backoff that shortens again whenever a service gets closer to ready.
+"""
+import socket
+import struct
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+INITIAL_DELAY = 0.25
+MAX_DELAY = 3.0
+PG_PROTOCOL_VERSION = 196608  # 3.0
+PG_STARTING_UP = "57P03"
+
+# Progress of a service, from least to most ready
+UNREACHABLE, ANSWERING, READY = 0, 1, 2
+
+
+def probe_postgres(host, port, user, database, timeout=2):
+    """
+    Check whether PostgreSQL accepts connections, the way pg_isready does.
+    
+    Sends a startup message and reads the first reply: an authentication
+    request or any error other than "the database system is starting up"
+    means the server is accepting connections.
+    
+    Returns:
+        tuple: (state, detail)
+    """
+    params = f"user\0{user}\0database\0{database}\0\0".encode()
+    startup = struct.pack("!ii", 8 + len(params), PG_PROTOCOL_VERSION) + params
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout) as sock:
+            sock.sendall(startup)
+            reply = sock.recv(1024)
+            if reply[:1] == b"E":
+                fields = dict(
+                    (field[:1].decode(), field[1:].decode(errors="replace"))
+                    for field in reply[5:].split(b"\0") if field
+                )
+                if fields.get("C") == PG_STARTING_UP:
+                    return ANSWERING, "starting up"
+            elif reply[:1] != b"R":
+                return ANSWERING, "unexpected reply" if reply else "connection closed"
+            # Terminate politely instead of leaving a half-open startup
+            sock.sendall(b"X" + struct.pack("!i", 4))
+            return READY, "accepting connections"
+    except OSError as e:
+        return UNREACHABLE, str(e) or type(e).__name__
+
+
+def probe_http(session, url, timeout=3):
+    """
+    Check whether an HTTP service answers without a server error.
+    
+    Returns:
+        tuple: (state, detail)
+    """
+    try:
+        response = session.get(url, timeout=timeout, allow_redirects=False)
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+        return UNREACHABLE, type(e).__name__
+    if response.status_code >= 500:
+        return ANSWERING, f"HTTP {response.status_code}"
+    return READY, f"HTTP {response.status_code}"
+
+
+def wait_until_ready(probe, deadline, started):
+    """
+    Probe a service until it is ready or the deadline passes.
+    
+    The delay between attempts grows by half each time and resets whenever
+    the service moves to a more ready state, e.g. from refusing connections
+    to answering 502.
+    
+    Returns:
+        dict: ready, time_to_ready, latency of the first successful request, attempts, detail
+    """
+    delay = INITIAL_DELAY
+    best_state = UNREACHABLE
+    attempts = 0
+    while True:
+        attempts += 1
+        request_started = time.monotonic()
+        state, detail = probe()
+        latency = time.monotonic() - request_started
+        if state == READY:
+            return {
+                "ready": True, "time_to_ready": request_started + latency - started,
+                "latency": latency, "attempts": attempts, "detail": detail
+            }
+        if state > best_state:
+            best_state = state
+            delay = INITIAL_DELAY
+        if time.monotonic() + delay > deadline:
+            return {
+                "ready": False, "time_to_ready": None, "latency": None,
+                "attempts": attempts, "detail": detail
+            }
+        time.sleep(delay)
+        delay = min(delay * 1.5, MAX_DELAY)
+
+
+def stack_services(app):
+    """List the local services and how to probe them."""
+    return [
+        ("Main Database", "postgres", ("localhost", app.db_port.get(), app.local_db_user.get(), app.local_db_name.get())),
+        ("Simulation Database", "postgres", ("localhost", app.sim_db_port.get(), app.local_db_user.get(), app.local_sim_db_name.get())),
+        ("Backend API", "http", f"http://localhost:{app.backend_port.get()}/api/auth/status"),
+        ("Frontend", "http", f"http://localhost:{app.frontend_port.get()}/"),
+    ]
+
+
+def probe_stack(services, timeout=120, started=None):
+    """
+    Probe all services concurrently.
+    
+    Args:
+        services (list): (name, kind, target) tuples, as from stack_services.
+        timeout (float): Seconds to wait for the slowest service, from now.
+        started (float, optional): time.monotonic() that time_to_ready is measured
+            from, e.g. when the containers were started; now by default.
+    
+    Returns:
+        dict: Results by service name
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=len(services), pool_maxsize=2, max_retries=0)
+    session.mount("http://", adapter)
+    deadline = time.monotonic() + timeout
+    started = started if started is not None else time.monotonic()
+    
+    def probe_for(kind, target):
+        if kind == "postgres":
+            return lambda: probe_postgres(*target)
+        return lambda: probe_http(session, target)
+    
+    try:
+        with ThreadPoolExecutor(max_workers=len(services)) as executor:
+            futures = {
+                name: executor.submit(wait_until_ready, probe_for(kind, target), deadline, started)
+                for name, kind, target in services
+            }
+            return {name: future.result() for name, future in futures.items()}
+    finally:
+        session.close()
+
+
+def check_stack_readiness(app, operation=None, timeout=120, started=None):
+    """
+    Wait for the local stack to take requests, logging each service's readiness.
+    
+    Args:
+        app: The application instance.
+        operation (Operation, optional): History operation to add readiness phases to.
+        timeout (float): Seconds to wait for the slowest service.
+        started (float, optional): time.monotonic() when the containers were started;
+            times to ready are measured from it, so they include database initialization.
+    
+    Returns:
+        bool: True if every service is ready
+    """
+    app.log_local_message(f"Waiting for services to become ready (up to {timeout}s)...", "cyan")
+    results = probe_stack(stack_services(app), timeout, started)
+    
+    for name, result in results.items():
+        if result["ready"]:
+            app.log_local_message(
+                f"  {name}: ready after {result['time_to_ready']:.1f}s "
+                f"(first response {result['latency'] * 1000:.0f} ms, {result['attempts']} probes, {result['detail']})",
+                "green"
+            )
+        else:
+            app.log_local_message(f"  {name}: not ready after {result['attempts']} probes ({result['detail']})", "red")
+        if operation:
+            operation.add_phase(
+                f"ready: {name}",
+                result["time_to_ready"] if result["ready"] else timeout,
+                "ok" if result["ready"] else "failed"
+            )
+    
+    all_ready = all(result["ready"] for result in results.values())
+    if all_ready:
+        app.log_local_message("The local stack is ready to take requests.", "green")
+    else:
+        app.log_local_message("Some services are not ready; check 'View Logs' for details.", "yellow")
+    return all_ready
@@ -0,0 +1,361 @@
+"""
+Parser for server/sql/schema.sql.
+
+Reads the tables, columns, enums, keys and indexes the project's schema
+declares, so tools can work from the same definition the databases are
+initialized with instead of querying a running database.
+"""
+import re
+from pathlib import Path
+
+_CREATE_TABLE = re.compile(r'CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?\s*\((.*)\)\s*$', re.I | re.S)
+_CREATE_ENUM = re.compile(r'CREATE\s+TYPE\s+"?(\w+)"?\s+AS\s+ENUM\s*\((.*)\)', re.I | re.S)
+_ALTER_TABLE = re.compile(r'ALTER\s+TABLE\s+(?:ONLY\s+)?"?(\w+)"?\s+ADD\s+CONSTRAINT\s+"?(\w+)"?\s+(.*)$', re.I | re.S)
+_CREATE_INDEX = re.compile(
+    r'CREATE\s+(UNIQUE\s+)?INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?"?(\w+)"?\s+ON\s+"?(\w+)"?\s*(?:USING\s+(\w+)\s*)?\((.*)\)', re.I | re.S
+)
+_FOREIGN_KEY = re.compile(
+    r'FOREIGN\s+KEY\s*\(([^)]*)\)\s*REFERENCES\s+"?(\w+)"?\s*\(([^)]*)\)(?:.*?ON\s+DELETE\s+(SET\s+NULL|SET\s+DEFAULT|CASCADE|RESTRICT|NO\s+ACTION))?',
+    re.I | re.S
+)
+_KEY = re.compile(r'(PRIMARY\s+KEY|UNIQUE)\s*\(([^)]*)\)', re.I)
+_COLUMN = re.compile(r'"?(\w+)"?\s+(.+?)$', re.S)
+_TYPE = re.compile(r'^("?[\w ]+?"?)\s*(?:\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\))?(\[\])?(?=\s|$)', re.I)
+
+# Type names as written in schema.sql, mapped to a small set of base types
+BASE_TYPES = {
+    "bigserial": "integer", "serial": "integer", "smallserial": "integer",
+    "bigint": "integer", "integer": "integer", "int": "integer", "int4": "integer", "int8": "integer", "smallint": "integer",
+    "decimal": "decimal", "numeric": "decimal", "real": "float", "double precision": "float",
+    "varchar": "text", "character varying": "text", "char": "text", "character": "text", "text": "text",
+    "boolean": "boolean", "bool": "boolean",
+    "timestamptz": "timestamptz", "timestamp with time zone": "timestamptz",
+    "timestamp": "timestamp", "timestamp without time zone": "timestamp",
+    "date": "date", "time": "time", "interval": "interval",
+    "json": "json", "jsonb": "json", "uuid": "uuid", "bytea": "bytea",
+}
+
+
+class Column:
+    """A column of a table."""
+    
+    def __init__(self, name, type_name, length=None, scale=None, nullable=True, default=None,
+                 is_array=False, enum_values=None):
+        self.name = name
+        self.type_name = type_name
+        self.length = length
+        self.scale = scale
+        self.nullable = nullable
+        self.default = default
+        self.is_array = is_array
+        self.enum_values = enum_values
+        self.serial = type_name.endswith("serial")
+    
+    @property
+    def base_type(self):
+        """The column's type reduced to integer, decimal, text, timestamptz, enum and so on."""
+        if self.enum_values is not None:
+            return "enum"
+        return BASE_TYPES.get(self.type_name, "text")
+    
+    def __repr__(self):
+        return f"Column({self.name!r}, {self.type_name!r})"
+
+
+class ForeignKey:
+    """A foreign key from columns of one table to columns of another."""
+    
+    def __init__(self, name, table, columns, ref_table, ref_columns, on_delete=None):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.ref_table = ref_table
+        self.ref_columns = ref_columns
+        self.on_delete = on_delete
+    
+    def __repr__(self):
+        return f"ForeignKey({self.table}({', '.join(self.columns)}) -> {self.ref_table}({', '.join(self.ref_columns)}))"
+
+
+class Index:
+    """An index declared with CREATE INDEX."""
+    
+    def __init__(self, name, table, columns, unique=False, method="btree"):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.unique = unique
+        self.method = method
+
+
+class Table:
+    """A table with its columns, keys and indexes."""
+    
+    def __init__(self, name):
+        self.name = name
+        self.columns = {}
+        self.primary_key = []
+        self.unique = []
+        self.foreign_keys = []
+        self.indexes = []
+    
+    def column_names(self):
+        """List the column names in declaration order."""
+        return list(self.columns)
+    
+    def unique_columns(self):
+        """Columns that are unique on their own, through a constraint, an index or the primary key."""
+        single = [columns[0] for columns in self.unique if len(columns) == 1]
+        single += [index.columns[0] for index in self.indexes if index.unique and len(index.columns) == 1]
+        if len(self.primary_key) == 1:
+            single.append(self.primary_key[0])
+        return set(single)
+    
+    def __repr__(self):
+        return f"Table({self.name!r}, {len(self.columns)} columns)"
+
+
+class Schema:
+    """The tables and enums of a schema."""
+    
+    def __init__(self):
+        self.tables = {}
+        self.enums = {}
+    
+    def foreign_keys(self):
+        """List the foreign keys of every table."""
+        return [fk for table in self.tables.values() for fk in table.foreign_keys]
+    
+    def referencing(self, table_name):
+        """List the foreign keys that point at a table."""
+        return [fk for fk in self.foreign_keys() if fk.ref_table == table_name]
+    
+    def cascaded_tables(self, table_names):
+        """
+        List the tables outside table_names that TRUNCATE ... CASCADE also empties.
+        
+        Args:
+            table_names (iterable): The tables being truncated.
+        
+        Returns:
+            list: Table names, sorted
+        """
+        wanted = set(table_names)
+        affected = set()
+        pending = list(wanted)
+        while pending:
+            for fk in self.referencing(pending.pop()):
+                if fk.table not in wanted and fk.table not in affected:
+                    affected.add(fk.table)
+                    pending.append(fk.table)
+        return sorted(affected)
+    
+    def dependency_order(self, table_names=None):
+        """
+        Order tables so every table comes after the tables it references.
+        
+        Self references are ignored. Tables caught in a cycle are appended
+        at the end in name order.
+        
+        Args:
+            table_names (iterable, optional): Tables to order; all tables by default.
+        
+        Returns:
+            list: Table names, parents first
+        """
+        names = sorted(table_names if table_names is not None else self.tables)
+        wanted = set(names)
+        parents = {
+            name: {fk.ref_table for fk in self.tables[name].foreign_keys
+                   if fk.ref_table in wanted and fk.ref_table != name}
+            for name in names if name in self.tables
+        }
+        ordered = []
+        done = set()
+        while parents:
+            ready = sorted(name for name, deps in parents.items() if deps <= done)
+            if not ready:
+                ordered.extend(sorted(parents))
+                break
+            for name in ready:
+                ordered.append(name)
+                done.add(name)
+                del parents[name]
+        return ordered
+
+
+def _split_statements(sql):
+    """Split SQL into statements, ignoring comments and semicolons inside quotes."""
+    statements = []
+    current = []
+    quote = None
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if quote:
+            current.append(char)
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+            current.append(char)
+        elif sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end == -1 else end + 2
+            continue
+        elif char == ";":
+            statements.append("".join(current).strip())
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    if "".join(current).strip():
+        statements.append("".join(current).strip())
+    return statements
+
+
+def _split_top_level(body):
+    """Split a comma-separated list, ignoring commas inside parentheses and quotes."""
+    parts = []
+    depth = 0
+    quote = None
+    current = []
+    for char in body:
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in ("'", '"'):
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    if "".join(current).strip():
+        parts.append("".join(current).strip())
+    return parts
+
+
+def _names(column_list):
+    """Parse a list of possibly quoted column names."""
+    return [name.strip().strip('"') for name in column_list.split(",") if name.strip()]
+
+
+def _parse_column(definition, enums):
+    """Parse a column definition from a CREATE TABLE body."""
+    match = _COLUMN.match(definition)
+    name, rest = match.group(1), match.group(2).strip()
+    type_match = _TYPE.match(rest)
+    type_name = type_match.group(1).strip('"').strip().lower()
+    length = int(type_match.group(2)) if type_match.group(2) else None
+    scale = int(type_match.group(3)) if type_match.group(3) else None
+    modifiers = rest[type_match.end():]
+    default = re.search(r'DEFAULT\s+(.+?)(?:\s+NOT\s+NULL|\s+NULL|\s+PRIMARY|\s+UNIQUE|\s+REFERENCES|\s+CHECK|$)', modifiers, re.I | re.S)
+    return Column(
+        name,
+        type_name,
+        length=length,
+        scale=scale,
+        nullable=not re.search(r'NOT\s+NULL|PRIMARY\s+KEY', modifiers, re.I),
+        default=default.group(1).strip() if default else None,
+        is_array=bool(type_match.group(4)),
+        enum_values=enums.get(type_name)
+    )
+
+
+def _add_constraint(schema, table, name, definition):
+    """Add a table or ALTER TABLE constraint to a table."""
+    fk = _FOREIGN_KEY.search(definition)
+    if fk:
+        on_delete = " ".join(fk.group(4).upper().split()) if fk.group(4) else None
+        table.foreign_keys.append(
+            ForeignKey(name, table.name, _names(fk.group(1)), fk.group(2), _names(fk.group(3)), on_delete)
+        )
+        return
+    key = _KEY.search(definition)
+    if key:
+        columns = _names(key.group(2))
+        if key.group(1).upper().startswith("PRIMARY"):
+            table.primary_key = columns
+            for column in columns:
+                if column in table.columns:
+                    table.columns[column].nullable = False
+        else:
+            table.unique.append(columns)
+
+
+def parse_schema(sql):
+    """
+    Parse schema SQL.
+    
+    Understands CREATE TYPE ... AS ENUM, CREATE TABLE, ALTER TABLE ... ADD
+    CONSTRAINT and CREATE [UNIQUE] INDEX; other statements are skipped.
+    
+    Returns:
+        Schema: The parsed schema
+    """
+    schema = Schema()
+    for statement in _split_statements(sql):
+        match = _CREATE_ENUM.match(statement)
+        if match:
+            schema.enums[match.group(1).lower()] = re.findall(r"'((?:[^']|'')*)'", match.group(2))
+            continue
+        
+        match = _CREATE_TABLE.match(statement)
+        if match:
+            table = Table(match.group(1))
+            constraints = []
+            for part in _split_top_level(match.group(2)):
+                if re.match(r'(CONSTRAINT|PRIMARY\s+KEY|UNIQUE|FOREIGN\s+KEY|CHECK)\b', part, re.I):
+                    constraints.append(part)
+                else:
+                    column = _parse_column(part, schema.enums)
+                    table.columns[column.name] = column
+                    if re.search(r'PRIMARY\s+KEY', part, re.I):
+                        table.primary_key = [column.name]
+            for part in constraints:
+                name = re.match(r'CONSTRAINT\s+"?(\w+)"?', part, re.I)
+                _add_constraint(schema, table, name.group(1) if name else None, part)
+            schema.tables[table.name] = table
+            continue
+        
+        match = _ALTER_TABLE.match(statement)
+        if match and match.group(1) in schema.tables:
+            _add_constraint(schema, schema.tables[match.group(1)], match.group(2), match.group(3))
+            continue
+        
+        match = _CREATE_INDEX.match(statement)
+        if match and match.group(3) in schema.tables:
+            schema.tables[match.group(3)].indexes.append(Index(
+                match.group(2), match.group(3), _names(match.group(5)),
+                unique=bool(match.group(1)), method=(match.group(4) or "btree").lower()
+            ))
+    return schema
+
+
+def get_schema_path():
+    """Get the path of the project's schema.sql."""
+    from .utils import get_project_root
+    return get_project_root() / "server" / "sql" / "schema.sql"
+
+
+def load_schema(path=None):
+    """
+    Load and parse schema.sql.
+    
+    Args:
+        path (Path, optional): The schema file; the project's server/sql/schema.sql by default.
+    
+    Returns:
+        Schema: The parsed schema
+    """
+    path = Path(path) if path else get_schema_path()
+    return parse_schema(path.read_text(encoding='utf-8'))
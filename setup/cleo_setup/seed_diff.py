@@ -0,0 +1,643 @@
+"""
+Move a database between seed states without reloading it.
+
+A seed state is the data one seeding run would leave in each table: seed/pre,
+seed/post, or pre and post merged by id, the way the server seeds them. Two
+states, or a state and a live database, are compared by primary key using a
+digest of each row, and the difference becomes the smallest set of INSERT,
+UPDATE and DELETE batches. The batches are applied in foreign key order in
+one transaction, so tables that did not change are never touched.
+
+Command line:
+    
+    python -m cleo_setup.seed_diff --from pre --to merged                      # compare two seed states
+    python -m cleo_setup.seed_diff --from db --to merged --container cleo-db-1 --apply
+"""
+import argparse
+import hashlib
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import record_operation
+from .schema import load_schema
+from .seed_validation import COPY_NULL, NULL_VALUES, load_copy_file, load_csv_file
+from .seeds import SEED_PHASES, get_seed_root
+from .synthetic_data import EXCLUDED_TABLES
+from .utils.psql import local_target, normalize_timestamp, psql, setval_statements
+
+SEED_STATES = ("pre", "post", "merged")
+BATCH_ROWS = 500
+_TRUE = {"true", "t", "1", "yes", "y", "on"}
+# Serial pseudo-types cannot be cast to
+_SERIAL_TYPES = {"smallserial": "smallint", "serial": "integer", "bigserial": "bigint"}
+_COPY_UNESCAPE = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f", "v": "\v"}
+
+
+def _js_number(value):
+    """The text the server's seeder stores for a numeric-looking value, or None if it is not numeric."""
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    if number != number or number in (float("inf"), float("-inf")) or value.lower().lstrip("+-") in ("nan", "inf", "infinity"):
+        return None
+    if number.is_integer() and abs(number) < 1e21:
+        return str(int(number))
+    return repr(number)
+
+
+def canonical(value, column):
+    """
+    Reduce a value to one text form per column type, so seed text and database output compare equal.
+    
+    Args:
+        value (str): The value, or None for NULL.
+        column (Column): The value's column.
+    
+    Returns:
+        str: The canonical text, or None for NULL
+    """
+    if value is None:
+        return None
+    base_type = column.base_type
+    try:
+        if base_type == "integer":
+            return str(int(Decimal(value)))
+        if base_type in ("decimal", "float"):
+            return format(Decimal(value).normalize(), "f")
+        if base_type == "boolean":
+            return "t" if value.strip().lower() in _TRUE else "f"
+        if base_type in ("timestamptz", "timestamp", "date"):
+            parsed = _parse_datetime(value)
+            if parsed is None:
+                return value
+            if base_type == "date":
+                return parsed.date().isoformat()
+            if base_type == "timestamp":
+                # timestamp without time zone ignores any offset
+                return parsed.replace(tzinfo=None).isoformat(sep=" ")
+            if parsed.tzinfo is None:
+                parsed = parsed.replace(tzinfo=timezone.utc)
+            return parsed.astimezone(timezone.utc).isoformat(sep=" ")
+        if base_type == "json":
+            return json.dumps(json.loads(value), sort_keys=True, separators=(",", ":"))
+    except (InvalidOperation, ValueError, OverflowError):
+        return value
+    return value
+
+
+def _parse_datetime(value):
+    """Parse a timestamp or date as PostgreSQL reads it, or return None."""
+    value = normalize_timestamp(value)
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        pass
+    for pattern in ("%m/%d/%Y", "%m/%d/%Y %H:%M", "%m/%d/%Y %H:%M:%S"):
+        try:
+            return datetime.strptime(value, pattern)
+        except ValueError:
+            continue
+    return None
+
+
+def seed_value(value, column):
+    """Convert a seed CSV value the way the server's seeder does, then make it canonical."""
+    if value in NULL_VALUES:
+        return None
+    if column.base_type in ("text", "enum"):
+        # The seeder sends numeric-looking strings as numbers, so '007' is stored as '7'
+        value = _js_number(value) or value
+    return canonical(value, column)
+
+
+def copy_unescape(value):
+    """Undo COPY text format escaping."""
+    if "\\" not in value:
+        return value
+    result = []
+    i = 0
+    while i < len(value):
+        char = value[i]
+        if char == "\\" and i + 1 < len(value):
+            result.append(_COPY_UNESCAPE.get(value[i + 1], value[i + 1]))
+            i += 2
+            continue
+        result.append(char)
+        i += 1
+    return "".join(result)
+
+
+class TableState:
+    """The rows of one table in a seed state or database, keyed by primary key."""
+    
+    def __init__(self, name, columns, key, source):
+        self.name = name
+        self.columns = columns
+        self.key = key
+        self.source = source
+        self.rows = {}
+        self.unkeyed = []
+    
+    def add(self, record):
+        """Add a row from a {column: canonical value} dict; later rows with the same key replace earlier ones."""
+        key = tuple(record.get(name) for name in self.key)
+        row = tuple(record.get(name) for name in self.columns)
+        if None in key:
+            self.unkeyed.append(row)
+            return
+        self.rows[key] = row
+    
+    def digests(self, columns):
+        """Digest each row over some columns, for comparing rows without comparing every value."""
+        positions = [self.columns.index(name) if name in self.columns else None for name in columns]
+        digests = {}
+        for key, row in self.rows.items():
+            parts = ["\x00" if position is None or row[position] is None else row[position] for position in positions]
+            digests[key] = hashlib.blake2b("\x1f".join(parts).encode("utf-8"), digest_size=16).digest()
+        return digests
+    
+    def value(self, key, name):
+        """One value of a row, or None if this state does not have the column."""
+        if name not in self.columns:
+            return None
+        return self.rows[key][self.columns.index(name)]
+
+
+def state_files(state, seed_root=None, choices=None):
+    """
+    Pick the files that make up a seed state.
+    
+    Each table is seeded from one file. With several candidates the one named
+    in choices is used, otherwise the first by name. In the merged state a
+    table with files of the same name in pre and post gets both, pre first;
+    other tables fall back to their post file, then their pre file.
+    
+    Args:
+        state (str): "pre", "post", "merged", or a directory of <table>/*.csv or synthetic data.
+        seed_root (Path, optional): The seed directory; the project's by default.
+        choices (dict, optional): {table: file name without .csv}.
+    
+    Returns:
+        dict: {table: [paths]}, applied in order
+    """
+    choices = choices or {}
+    if state not in SEED_STATES:
+        directory = Path(state)
+        if (directory / "manifest.json").exists():
+            # Synthetic data shards are parts of one dataset, not alternatives
+            return {d.name: sorted(d.glob("*.tsv")) for d in sorted(directory.iterdir()) if d.is_dir() and any(d.glob("*.tsv"))}
+        candidates = {d.name: {path.stem: path for path in sorted(d.glob("*.csv"))} for d in sorted(directory.iterdir()) if d.is_dir()}
+        return {table: [_choose(table, files, choices)] for table, files in candidates.items() if files}
+    
+    seed_root = Path(seed_root) if seed_root else get_seed_root()
+    phases = {
+        phase: {d.name: {path.stem: path for path in sorted(d.glob("*.csv"))}
+                for d in sorted((seed_root / phase).glob("*")) if d.is_dir()}
+        for phase in SEED_PHASES
+    }
+    if state != "merged":
+        return {table: [_choose(table, files, choices)] for table, files in phases[state].items() if files}
+    
+    result = {}
+    for table in sorted(set(phases["pre"]) | set(phases["post"])):
+        pre, post = phases["pre"].get(table, {}), phases["post"].get(table, {})
+        shared = {stem: [pre[stem], post[stem]] for stem in pre if stem in post}
+        if shared:
+            result[table] = shared.get(choices.get(table)) or shared[sorted(shared)[0]]
+        elif post or pre:
+            result[table] = [_choose(table, post or pre, choices)]
+    return result
+
+
+def _choose(table, files, choices):
+    """Pick one of a table's alternative seed files."""
+    if table in choices:
+        if choices[table] not in files:
+            raise ValueError(f"{table} has no seed file {choices[table]!r}; it has {', '.join(files)}")
+        return files[choices[table]]
+    return files[sorted(files)[0]]
+
+
+def load_seed_state(files, schema):
+    """
+    Load the rows of a seed state.
+    
+    Args:
+        files (dict): {table: [paths]}, as from state_files.
+        schema (Schema): The parsed schema.
+    
+    Returns:
+        dict: {table: TableState}
+    """
+    manifest = {}
+    states = {}
+    for name, paths in files.items():
+        table = schema.tables.get(name)
+        if table is None or not paths:
+            continue
+        if paths[0].suffix == ".tsv" and not manifest:
+            manifest = json.loads((paths[0].parent.parent / "manifest.json").read_text(encoding='utf-8'))["columns"]
+        
+        loaded = []
+        for path in paths:
+            if path.suffix == ".tsv":
+                table_file = load_copy_file(name, path, manifest[name])
+                to_value = lambda value, column: None if value == COPY_NULL else canonical(copy_unescape(value), column)
+            else:
+                table_file = load_csv_file(name, path)
+                to_value = seed_value
+            loaded.append((table_file, to_value))
+        
+        columns = []
+        for table_file, _ in loaded:
+            columns += [column for column in table_file.header if column in table.columns and column not in columns]
+        state = TableState(name, columns, table.primary_key, ", ".join(path.name for path in paths))
+        for table_file, to_value in loaded:
+            skipped = {index for index, _ in table_file.ragged}
+            known = [(position, table.columns[column]) for position, column in enumerate(table_file.header) if column in table.columns]
+            for index, row in enumerate(zip(*table_file.columns)):
+                if index in skipped:
+                    continue
+                # Repeated header names keep their last value, as in the seeder's row objects
+                state.add({column.name: to_value(row[position], column) for position, column in known})
+        states[name] = state
+    return states
+
+
+def load_database_state(target, schema, tables, columns=None):
+    """
+    Read tables from a database into TableStates.
+    
+    Args:
+        target (dict): container, database and user of the database.
+        schema (Schema): The parsed schema.
+        tables (list): Tables to read.
+        columns (dict, optional): {table: [columns]} to read; every column by default.
+    
+    Returns:
+        dict: {table: TableState}
+    """
+    states = {}
+    for name in tables:
+        table = schema.tables[name]
+        wanted = list(columns.get(name, table.column_names())) if columns else table.column_names()
+        wanted = [column for column in table.primary_key if column not in wanted] + wanted
+        quoted = ", ".join(f'"{column}"' for column in wanted)
+        output = psql(target, f"SET TimeZone = 'UTC';\nCOPY (SELECT {quoted} FROM \"{name}\") TO STDOUT;\n")
+        
+        state = TableState(name, wanted, table.primary_key, f"{target['database']}.{name}")
+        typed = [table.columns[column] for column in wanted]
+        for line in output.splitlines():
+            values = line.split("\t")
+            state.add({column.name: None if value == COPY_NULL else canonical(copy_unescape(value), column)
+                       for column, value in zip(typed, values)})
+        states[name] = state
+    return states
+
+
+class TableDiff:
+    """The changes that turn one table's rows into another's."""
+    
+    def __init__(self, name, key, columns):
+        self.name = name
+        self.key = key
+        self.columns = columns
+        self.inserts = []
+        self.updates = OrderedDict()
+        self.deletes = []
+        self.unchanged = 0
+    
+    @property
+    def changed(self):
+        """Number of rows inserted, updated or deleted."""
+        return len(self.inserts) + sum(len(rows) for rows in self.updates.values()) + len(self.deletes)
+
+
+def diff_states(source, target, schema, tables=None):
+    """
+    Compare two states table by table.
+    
+    Only the columns the target state has are compared and written, so a seed
+    file that leaves out a column leaves it as it is. Tables without a primary
+    key in the target's files cannot be compared and are listed separately.
+    
+    Args:
+        source (dict): {table: TableState} of the current state.
+        target (dict): {table: TableState} of the wanted state.
+        schema (Schema): The parsed schema.
+        tables (iterable, optional): Tables to compare; every table of the target by default.
+    
+    Returns:
+        tuple: ({table: TableDiff}, [tables that cannot be compared])
+    """
+    diffs = {}
+    skipped = []
+    for name in tables or target:
+        wanted = target[name]
+        if not wanted.key or any(column not in wanted.columns for column in wanted.key) or wanted.unkeyed:
+            skipped.append(name)
+            continue
+        current = source.get(name) or TableState(name, wanted.columns, wanted.key, "empty")
+        columns = [column for column in wanted.columns if column not in wanted.key]
+        diff = TableDiff(name, wanted.key, columns)
+        
+        old, new = current.digests(columns), wanted.digests(columns)
+        for key, digest in new.items():
+            if key not in old:
+                diff.inserts.append((key, wanted.rows[key]))
+            elif old[key] == digest:
+                diff.unchanged += 1
+            else:
+                changed = tuple(column for column in columns if current.value(key, column) != wanted.value(key, column))
+                diff.updates.setdefault(changed, []).append((key, tuple(wanted.value(key, column) for column in changed)))
+        diff.deletes = sorted((key for key in old if key not in new), key=_key_order)
+        diff.inserts.sort(key=lambda item: _key_order(item[0]))
+        diffs[name] = diff
+    return diffs, skipped
+
+
+def _key_order(key):
+    """Sort key that puts numeric ids in numeric order."""
+    return [(len(value), value) for value in key]
+
+
+def _literal(value):
+    """Quote a canonical value as an SQL literal."""
+    if value is None:
+        return "NULL"
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _cast(column):
+    """The type to cast a text literal to for a column."""
+    if column.enum_values is not None:
+        return f'"{column.type_name}"'
+    return _SERIAL_TYPES.get(column.type_name, column.type_name) + ("[]" if column.is_array else "")
+
+
+def _batches(items):
+    """Split a list into BATCH_ROWS-sized lists."""
+    return [items[start:start + BATCH_ROWS] for start in range(0, len(items), BATCH_ROWS)]
+
+
+def build_statements(diffs, schema, wanted_columns):
+    """
+    Turn diffs into SQL batches.
+    
+    Inserts and updates run parents first, so new rows can point at new
+    parents; deletes run children first, after the rows pointing at them
+    were updated.
+    
+    Args:
+        diffs (dict): {table: TableDiff}.
+        schema (Schema): The parsed schema.
+        wanted_columns (dict): {table: [columns]} of the target state, in insert order.
+    
+    Returns:
+        list: SQL statements
+    """
+    order = schema.dependency_order([name for name, diff in diffs.items() if diff.changed])
+    statements = []
+    for name in order:
+        diff = diffs[name]
+        table = schema.tables[name]
+        columns = wanted_columns[name]
+        quoted = ", ".join(f'"{column}"' for column in columns)
+        for batch in _batches(diff.inserts):
+            values = ",\n  ".join("(" + ", ".join(_literal(value) for value in row) + ")" for _, row in batch)
+            statements.append(f'INSERT INTO "{name}" ({quoted}) VALUES\n  {values};')
+        
+        for changed, rows in diff.updates.items():
+            names = list(diff.key) + list(changed)
+            assignments = ", ".join(f'"{column}" = v."{column}"::{_cast(table.columns[column])}' for column in changed)
+            match = " AND ".join(f't."{column}" = v."{column}"::{_cast(table.columns[column])}' for column in diff.key)
+            for batch in _batches(rows):
+                values = ",\n  ".join("(" + ", ".join(_literal(value) for value in key + row) + ")" for key, row in batch)
+                statements.append(
+                    f'UPDATE "{name}" AS t SET {assignments}\nFROM (VALUES\n  {values}\n) AS v({", ".join(_quoted(names))})\nWHERE {match};'
+                )
+        
+        if diff.inserts:
+            statements += setval_statements(name, [column.name for column in table.columns.values() if column.serial])
+    
+    for name in reversed(order):
+        diff = diffs[name]
+        table = schema.tables[name]
+        for batch in _batches(diff.deletes):
+            if len(diff.key) == 1:
+                column = diff.key[0]
+                keys = ", ".join(_literal(key[0]) for key in batch)
+                statements.append(f'DELETE FROM "{name}" WHERE "{column}" IN ({keys});')
+            else:
+                keys = ", ".join("(" + ", ".join(_literal(value) for value in key) + ")" for key in batch)
+                statements.append(f'DELETE FROM "{name}" WHERE ({", ".join(_quoted(diff.key))}) IN ({keys});')
+    return statements
+
+
+def _quoted(names):
+    """Double-quote column names."""
+    return [f'"{name}"' for name in names]
+
+
+def diff_script(statements):
+    """Wrap statements in one transaction."""
+    return "BEGIN;\n" + "\n".join(statements) + "\nCOMMIT;\n"
+
+
+def summary_lines(diffs, skipped, source_files=None, target_files=None):
+    """
+    Describe diffs for the console.
+    
+    Returns:
+        list: (message, color) tuples
+    """
+    lines = []
+    for name, diff in sorted(diffs.items()):
+        updated = sum(len(rows) for rows in diff.updates.values())
+        color = "white" if not diff.changed else "cyan"
+        lines.append((f"{name:<40} +{len(diff.inserts):<7,} ~{updated:<7,} -{len(diff.deletes):<7,} ={diff.unchanged:,}", color))
+        if target_files and name in target_files:
+            lines.append((f"    from {', '.join(f'{path.parent.parent.name}/{path.name}' for path in target_files[name])}", "white"))
+    for name in skipped:
+        lines.append((f"{name}: no primary key in every row of the target files; it needs a full reload", "orange"))
+    total = sum(diff.changed for diff in diffs.values())
+    unchanged = sum(diff.unchanged for diff in diffs.values())
+    lines.append((f"{total:,} rows to change, {unchanged:,} unchanged", "green" if total else "white"))
+    return lines
+
+
+def apply_seed_diff(target, to_state, schema=None, choices=None, tables=None, apply=True, log=None, operation=None):
+    """
+    Move a database to a seed state.
+    
+    Args:
+        target (dict): container, database and user of the database.
+        to_state (str): The seed state, as for state_files.
+        schema (Schema, optional): The parsed schema; the project's by default.
+        choices (dict, optional): {table: seed file name} for tables with several files.
+        tables (iterable, optional): Tables to move; the state's tables except logins by default.
+        apply (bool): Run the changes; otherwise only compare.
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add phases to.
+    
+    Returns:
+        dict: diffs, skipped tables and the statements run
+    """
+    log = log or (lambda message, color="white": print(message))
+    schema = schema or load_schema()
+    started = time.monotonic()
+    
+    files = state_files(to_state, choices=choices)
+    wanted = tables or [name for name in files if name not in EXCLUDED_TABLES]
+    target_state = load_seed_state({name: files[name] for name in wanted if name in files}, schema)
+    read_started = time.monotonic()
+    current = load_database_state(target, schema, list(target_state),
+                                  {name: state.columns for name, state in target_state.items()})
+    if operation:
+        operation.add_phase("read seeds", read_started - started, "ok")
+        operation.add_phase("read database", time.monotonic() - read_started, "ok")
+    
+    diffs, skipped = diff_states(current, target_state, schema)
+    for message, color in summary_lines(diffs, skipped, target_files=files):
+        log(message, color)
+    statements = build_statements(diffs, schema, {name: state.columns for name, state in target_state.items()})
+    if apply and statements:
+        apply_started = time.monotonic()
+        psql(target, diff_script(statements))
+        if operation:
+            operation.add_phase("apply", time.monotonic() - apply_started, "ok")
+        log(f"Applied {len(statements)} statements in {time.monotonic() - apply_started:.1f}s", "green")
+    elif not statements:
+        log("Already in this seed state", "green")
+    return {"diffs": diffs, "skipped": skipped, "statements": statements}
+
+
+def run_seed_diff(app, database, to_state, apply):
+    """Compare a local database with a seed state and optionally move it there, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    app.log_local_message(f"\n---- SEED DIFF: {target['database']} -> {to_state} ----", "yellow")
+    with record_operation("seed-diff", target["database"], state=to_state, apply=apply) as operation:
+        try:
+            result = apply_seed_diff(target, to_state, apply=apply, log=app.log_local_message, operation=operation)
+        except (OSError, ValueError, RuntimeError) as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        operation.details["changed"] = sum(diff.changed for diff in result["diffs"].values())
+
+
+def open_seed_diff_dialog(app):
+    """Ask for a seed state and compare or move a local database to it."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Apply Seed State")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    database = tk.StringVar(value="main")
+    state = tk.StringVar(value="merged")
+    
+    ttk.Label(
+        frame,
+        text="Changes only the rows that differ from the seed state, in one transaction. "
+             "Logins (users, roles) are kept.",
+        wraplength=420, justify=tk.LEFT
+    ).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+    ttk.Label(frame, text="Database:").grid(row=1, column=0, sticky=tk.W, pady=3)
+    ttk.Combobox(frame, textvariable=database, values=["main", "sim"], state="readonly", width=8).grid(row=1, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Seed state:").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Combobox(frame, textvariable=state, values=list(SEED_STATES), state="readonly", width=10).grid(row=2, column=1, sticky=tk.W)
+    
+    def start(apply):
+        if apply and not messagebox.askyesno("Confirm", "This changes the data in the selected database. Continue?", parent=dialog):
+            return
+        dialog.destroy()
+        threading.Thread(target=run_seed_diff, args=(app, database.get(), state.get(), apply), daemon=True).start()
+    
+    buttons = ttk.Frame(frame)
+    buttons.grid(row=3, column=0, columnspan=2, pady=10)
+    ttk.Button(buttons, text="Compare", command=lambda: start(False)).pack(side=tk.LEFT, padx=5)
+    ttk.Button(buttons, text="Apply", command=lambda: start(True)).pack(side=tk.LEFT, padx=5)
+
+
+def _parse_choices(items):
+    """Parse TABLE=FILE arguments."""
+    choices = {}
+    for item in items or []:
+        table, _, name = item.partition("=")
+        if not name:
+            raise ValueError(f"Expected table=file, got {item!r}")
+        choices[table.strip()] = name.strip().removesuffix(".csv")
+    return choices
+
+
+def main(argv=None):
+    """Compare seed states or move a database to one from the command line."""
+    parser = argparse.ArgumentParser(description="Move a database between seed states by changing only the rows that differ")
+    parser.add_argument('--from', dest='source', default="db",
+                        help='Current state: db, pre, post, merged or a seed directory (default: db)')
+    parser.add_argument('--to', dest='target', required=True, help='Wanted state: pre, post, merged or a seed directory')
+    parser.add_argument('--file', action='append', metavar='TABLE=FILE', help='Seed file to use for a table with several')
+    parser.add_argument('--tables', nargs='+', help='Only these tables (default: the state\'s tables except logins)')
+    parser.add_argument('--schema', help='schema.sql to read (default: the project\'s)')
+    parser.add_argument('--container', help='Database container, for --from db')
+    parser.add_argument('--database', default="my_db", help='Database name')
+    parser.add_argument('--user', default="user", help='Database user')
+    parser.add_argument('--sql', help='Write the changes as an SQL script to this file')
+    parser.add_argument('--apply', action='store_true', help='Run the changes in the database')
+    args = parser.parse_args(argv)
+    
+    try:
+        choices = _parse_choices(args.file)
+        schema = load_schema(args.schema)
+        target_files = state_files(args.target, choices=choices)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    tables = args.tables or [name for name in target_files if name not in EXCLUDED_TABLES]
+    target_files = {name: target_files[name] for name in tables if name in target_files}
+    target_state = load_seed_state(target_files, schema)
+    
+    if args.source == "db":
+        if not args.container:
+            parser.error("give --container to compare with a database")
+        database = {"container": args.container, "database": args.database, "user": args.user}
+        current = load_database_state(database, schema, list(target_state),
+                                      {name: state.columns for name, state in target_state.items()})
+    else:
+        if args.apply:
+            parser.error("--apply needs --from db")
+        current = load_seed_state(state_files(args.source, choices=choices), schema)
+    
+    started = time.monotonic()
+    diffs, skipped = diff_states(current, target_state, schema)
+    statements = build_statements(diffs, schema, {name: state.columns for name, state in target_state.items()})
+    for message, _ in summary_lines(diffs, skipped, target_files=target_files):
+        print(message)
+    print(f"Compared in {time.monotonic() - started:.2f}s, {len(statements)} statements")
+    
+    if args.sql:
+        with open(args.sql, "w", encoding='utf-8') as f:
+            f.write(diff_script(statements))
+    if args.apply and statements:
+        with record_operation("seed-diff", args.database, state=args.target, apply=True) as operation:
+            with operation.phase("apply"):
+                psql(database, diff_script(statements))
+            operation.details["changed"] = sum(diff.changed for diff in diffs.values())
+        print("Applied")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,517 @@
+"""
+Seed states compiled to PostgreSQL binary COPY files.
+
+Compiling reads each seed state once (see cleo_setup.seed_diff), converts its
+values the way the server's seeder would, and writes one <table>.pgcopy file
+per table plus a manifest.json with the table order, column order, row counts
+and checksums. Loading copies the files into the database container and
+runs \\copy ... (FORMAT binary) on them unchanged, all tables in one
+transaction, so nothing is parsed on the machine that loads them.
+
+The installer build compiles the fixtures into cleo_setup/resources/seed_fixtures.
+
+Command line:
+    
+    python -m cleo_setup.seed_fixtures compile --output /tmp/fixtures
+    python -m cleo_setup.seed_fixtures load --state merged --container cleo-db-1
+"""
+import argparse
+import hashlib
+import json
+import struct
+import subprocess
+import sys
+import threading
+import time
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import record_operation
+from .schema import load_schema
+from .seed_diff import SEED_STATES, load_seed_state, state_files
+from .seeds import get_seed_root
+from .synthetic_data import EXCLUDED_TABLES, kept_tables, load_effects, reference_columns
+from .utils.psql import local_target, psql_command, setval_statements, upsert_statement
+
+FIXTURE_DIR_NAME = "seed_fixtures"
+PGCOPY_SIGNATURE = b"PGCOPY\n\xff\r\n\x00"
+PGCOPY_HEADER = PGCOPY_SIGNATURE + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+CHUNK_BYTES = 1024 * 1024
+# Echoed by the load script after each table
+LOADED_MARKER = "cleo-fixture-loaded:"
+
+_POSTGRES_EPOCH = datetime(2000, 1, 1, tzinfo=timezone.utc)
+_POSTGRES_EPOCH_DAYS = date(2000, 1, 1).toordinal()
+_INTEGER_FORMATS = {
+    "smallint": ">h", "smallserial": ">h",
+    "integer": ">i", "int": ">i", "int4": ">i", "serial": ">i",
+    "bigint": ">q", "int8": ">q", "bigserial": ">q",
+}
+
+
+def _encode_numeric(value):
+    """Encode a decimal in PostgreSQL's binary numeric format: base-10000 digits with weight and scale."""
+    number = Decimal(value)
+    if number.is_nan():
+        return struct.pack(">hhHH", 0, 0, 0xC000, 0)
+    sign = 0x4000 if number.is_signed() and number != 0 else 0
+    text = format(abs(number), "f")
+    whole, _, fraction = text.partition(".")
+    scale = len(fraction)
+    whole = whole.lstrip("0")
+    whole = whole.zfill(-(-len(whole) // 4) * 4) if whole else ""
+    fraction = fraction.ljust(-(-len(fraction) // 4) * 4, "0")
+    groups = [int(whole[i:i + 4]) for i in range(0, len(whole), 4)] + [int(fraction[i:i + 4]) for i in range(0, len(fraction), 4)]
+    weight = len(whole) // 4 - 1
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+    while groups and groups[-1] == 0:
+        groups.pop()
+    if not groups:
+        weight = 0
+    return struct.pack(f">hhHH{len(groups)}H", len(groups), weight, sign, scale, *groups)
+
+
+def _micros(delta):
+    """A timedelta in whole microseconds."""
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+def encode_value(value, column):
+    """
+    Encode a canonical value in PostgreSQL's binary format for its column.
+    
+    Args:
+        value (str): The value as cleo_setup.seed_diff.canonical gives it.
+        column (Column): The value's column.
+    
+    Returns:
+        bytes: The field, without its length prefix
+    """
+    type_name = column.type_name
+    if column.is_array:
+        raise ValueError(f"{type_name}[] columns are not supported")
+    if type_name in _INTEGER_FORMATS:
+        return struct.pack(_INTEGER_FORMATS[type_name], int(value))
+    base_type = column.base_type
+    if base_type == "decimal":
+        return _encode_numeric(value)
+    if type_name == "real":
+        return struct.pack(">f", float(value))
+    if base_type == "float":
+        return struct.pack(">d", float(value))
+    if base_type == "boolean":
+        return b"\x01" if value == "t" else b"\x00"
+    if base_type == "timestamptz":
+        parsed = datetime.fromisoformat(value)
+        return struct.pack(">q", _micros(parsed.astimezone(timezone.utc) - _POSTGRES_EPOCH))
+    if base_type == "timestamp":
+        parsed = datetime.fromisoformat(value)
+        return struct.pack(">q", _micros(parsed.replace(tzinfo=timezone.utc) - _POSTGRES_EPOCH))
+    if base_type == "date":
+        return struct.pack(">i", date.fromisoformat(value).toordinal() - _POSTGRES_EPOCH_DAYS)
+    if type_name == "jsonb":
+        return b"\x01" + value.encode("utf-8")
+    if base_type == "uuid":
+        return bytes.fromhex(value.replace("-", ""))
+    if base_type in ("time", "interval", "bytea"):
+        raise ValueError(f"{type_name} columns are not supported")
+    return value.encode("utf-8")
+
+
+def encode_rows(rows, columns):
+    """
+    Encode rows as one binary COPY stream.
+    
+    Args:
+        rows (iterable): Tuples of canonical values, None for NULL.
+        columns (list): The Column of each position.
+    
+    Returns:
+        tuple: (bytes, row count)
+    """
+    parts = [PGCOPY_HEADER]
+    field_count = struct.pack(">h", len(columns))
+    null = struct.pack(">i", -1)
+    count = 0
+    for row in rows:
+        parts.append(field_count)
+        for value, column in zip(row, columns):
+            if value is None:
+                parts.append(null)
+                continue
+            try:
+                field = encode_value(value, column)
+            except (ValueError, ArithmeticError, struct.error) as e:
+                raise ValueError(f"row {count + 1}, {column.name} = {value!r}: {e}") from e
+            parts.append(struct.pack(">i", len(field)))
+            parts.append(field)
+        count += 1
+    parts.append(PGCOPY_TRAILER)
+    return b"".join(parts), count
+
+
+def _sha256(path):
+    """Checksum a file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def compile_state(state, output_dir, schema=None, choices=None, tables=None, log=None):
+    """
+    Compile one seed state into binary COPY files.
+    
+    A table is skipped when its rows cannot be loaded as they are: a NOT NULL
+    column without a default is left empty, or a value does not convert.
+    The tables that reference a skipped table are skipped too, since their
+    foreign keys would point at rows that are not loaded.
+    
+    Args:
+        state (str): "pre", "post" or "merged".
+        output_dir (Path): Directory to write <state>/<table>.pgcopy and <state>/manifest.json to.
+        schema (Schema, optional): The parsed schema; the project's by default.
+        choices (dict, optional): {table: seed file name} for tables with several files.
+        tables (iterable, optional): Tables to compile; the state's tables except logins by default.
+        log (callable, optional): log(message, color) for progress.
+    
+    Returns:
+        dict: The manifest, with the reason each skipped table was left out
+    """
+    log = log or (lambda message, color="white": print(message))
+    schema = schema or load_schema()
+    seed_root = get_seed_root()
+    files = state_files(state, seed_root, choices)
+    if tables:
+        wanted = [name for name in tables if name in files]
+    else:
+        wanted = [name for name in files if name not in EXCLUDED_TABLES]
+    states = load_seed_state({name: files[name] for name in wanted}, schema)
+    
+    state_dir = Path(output_dir) / state
+    state_dir.mkdir(parents=True, exist_ok=True)
+    manifest = {"state": state, "order": [], "tables": {}, "skipped": {}}
+    for name in schema.dependency_order(states):
+        table_state = states[name]
+        columns = [schema.tables[name].columns[column] for column in table_state.columns]
+        rows = list(table_state.rows.values()) + table_state.unkeyed
+        parents = sorted({fk.ref_table for fk in schema.tables[name].foreign_keys
+                          if fk.ref_table != name and fk.ref_table in manifest["skipped"]})
+        _, problems = reference_columns(schema.tables[name], [dict(zip(table_state.columns, row)) for row in rows])
+        if parents:
+            reason = f"references skipped {', '.join(parents)}"
+        elif problems:
+            reason = f"NOT NULL columns left empty: {', '.join(problems)}"
+        else:
+            try:
+                data, count = encode_rows(rows, columns)
+                reason = None
+            except ValueError as e:
+                reason = str(e)
+        if reason:
+            manifest["skipped"][name] = reason
+            log(f"  {state}/{name}: skipped, {reason}", "orange")
+            continue
+        path = state_dir / f"{name}.pgcopy"
+        path.write_bytes(data)
+        manifest["order"].append(name)
+        manifest["tables"][name] = {
+            "file": path.name,
+            "columns": table_state.columns,
+            "rows": count,
+            "bytes": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "serial": [column.name for column in schema.tables[name].columns.values() if column.serial],
+            "sources": {source.relative_to(seed_root).as_posix(): _sha256(source) for source in files[name]},
+        }
+        log(f"  {state}/{name}: {count:,} rows, {len(data):,} bytes", "white")
+    
+    with open(state_dir / "manifest.json", "w", encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def compile_fixtures(output_dir, states=SEED_STATES, schema=None, log=None):
+    """Compile several seed states; returns {state: manifest}."""
+    schema = schema or load_schema()
+    return {state: compile_state(state, output_dir, schema, log=log) for state in states}
+
+
+def get_fixture_dir():
+    """Get the compiled fixtures shipped with the installer."""
+    from .utils.utils import get_resources_dir
+    return get_resources_dir() / FIXTURE_DIR_NAME
+
+
+def stale_tables(manifest, seed_root=None):
+    """
+    List tables whose seed files changed after they were compiled.
+    
+    Only seed files that exist are compared, so an installation without the
+    seed directory trusts its fixtures.
+    """
+    seed_root = Path(seed_root) if seed_root else get_seed_root()
+    stale = []
+    for name, entry in manifest["tables"].items():
+        for source, digest in entry["sources"].items():
+            path = seed_root / source
+            if path.exists() and _sha256(path) != digest:
+                stale.append(name)
+                break
+    return stale
+
+
+def load_script(manifest, order, directory, schema, skip_triggers=False):
+    """
+    Build the psql script that loads fixture files, already copied into the
+    database container, in one transaction.
+    
+    Tables that logins reference (see synthetic_data.kept_tables) are merged
+    on their primary key through a staging table; the others are truncated
+    together first. After each table a marker line is echoed for progress.
+    
+    Args:
+        manifest (dict): The state's manifest.
+        order (list): Tables to load, in foreign key order.
+        directory (str): Where the files are inside the container.
+        schema (Schema): The parsed schema.sql.
+        skip_triggers (bool): Skip foreign key checks and triggers.
+    
+    Returns:
+        str: The script
+    """
+    kept = set(kept_tables(schema, order))
+    truncated = [name for name in order if name not in kept]
+    lines = ["BEGIN;"]
+    if skip_triggers:
+        lines.append("SET LOCAL session_replication_role = replica;")
+    if truncated:
+        lines.append("TRUNCATE " + ", ".join(f'"{name}"' for name in truncated) + " RESTART IDENTITY CASCADE;")
+    for name in order:
+        entry = manifest["tables"][name]
+        column_list = ", ".join(f'"{column}"' for column in entry["columns"])
+        path = f"{directory}/{entry['file']}"
+        if name in kept:
+            staging = f"{name}_upsert"
+            lines.append(f'CREATE TEMP TABLE "{staging}" ON COMMIT DROP AS SELECT {column_list} FROM "{name}" WITH NO DATA;')
+            lines.append(f"\\copy \"{staging}\" ({column_list}) FROM '{path}' WITH (FORMAT binary)")
+            lines.append(upsert_statement(name, staging, entry["columns"], schema.tables[name].primary_key) + ";")
+        else:
+            lines.append(f"\\copy \"{name}\" ({column_list}) FROM '{path}' WITH (FORMAT binary)")
+        lines.append(f"\\echo {LOADED_MARKER}{name}")
+    for name in order:
+        lines += setval_statements(name, manifest["tables"][name]["serial"])
+    lines.append("ANALYZE " + ", ".join(f'"{name}"' for name in order) + ";")
+    lines.append("COMMIT;")
+    return "\n".join(lines) + "\n"
+
+
+def load_fixtures(target, state_dir, tables=None, log=None, operation=None, schema=None):
+    """
+    Replace tables' data with compiled fixtures, in one transaction.
+    
+    The state directory is copied into the database container, then one
+    psql session truncates the tables (with the tables that reference them),
+    runs \\copy ... (FORMAT binary) for each file in foreign key order and
+    moves sequences past the loaded ids before committing. If any table
+    fails, the database is left as it was.
+    
+    Args:
+        target (dict): container, database, user and skip_triggers of the database.
+        state_dir (Path): A compiled state directory with manifest.json.
+        tables (iterable, optional): Tables to load; every compiled table by default.
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add phases to.
+        schema (Schema, optional): The parsed schema; the project's by default.
+    
+    Returns:
+        dict: rows, bytes, seconds and errors
+    
+    Raises:
+        RuntimeError: When the truncate would cascade into logins, or the files cannot be copied.
+    """
+    log = log or (lambda message, color="white": print(message))
+    schema = schema or load_schema()
+    state_dir = Path(state_dir)
+    with open(state_dir / "manifest.json", encoding='utf-8') as f:
+        manifest = json.load(f)
+    order = [name for name in manifest["order"] if not tables or name in tables]
+    skipped = [name for name in manifest.get("skipped", {}) if not tables or name in tables]
+    if skipped:
+        log(f"Not in these fixtures, since their seeds cannot be loaded as they are: {', '.join(skipped)}", "orange")
+    stale = [name for name in stale_tables(manifest) if name in order]
+    if stale:
+        log(f"Seed files changed since these fixtures were compiled: {', '.join(stale)}", "orange")
+    kept = kept_tables(schema, order)
+    wiped = sorted(set(schema.cascaded_tables([name for name in order if name not in kept])) & EXCLUDED_TABLES)
+    if wiped:
+        raise RuntimeError(f"Truncating these tables would also empty {', '.join(wiped)}; nothing was changed")
+    for line in load_effects(schema, order):
+        log(line, "orange")
+    
+    creationflags = subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+    directory = f"/tmp/cleo-fixtures-{manifest['state']}-{int(time.time() * 1000)}"
+    started = time.monotonic()
+    copied = subprocess.run(["docker", "cp", str(state_dir), f"{target['container']}:{directory}"],
+                            capture_output=True, text=True, creationflags=creationflags)
+    if copied.returncode != 0:
+        raise RuntimeError(f"Could not copy the fixtures into {target['container']}: {copied.stderr.strip()}")
+    log(f"Copied the fixtures into {target['container']} in {time.monotonic() - started:.2f}s", "white")
+    
+    script = load_script(manifest, order, directory, schema, target.get("skip_triggers", False))
+    output = []
+    loaded = []
+    try:
+        process = subprocess.Popen(
+            psql_command(target, "-X", "-q", "-v", "ON_ERROR_STOP=1"),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, encoding='utf-8', creationflags=creationflags
+        )
+        process.stdin.write(script)
+        process.stdin.close()
+        table_started = time.monotonic()
+        for line in process.stdout:
+            if not line.startswith(LOADED_MARKER):
+                output.append(line.rstrip())
+                continue
+            name = line[len(LOADED_MARKER):].strip()
+            seconds = time.monotonic() - table_started
+            table_started = time.monotonic()
+            loaded.append(name)
+            log(f"  {name}: {manifest['tables'][name]['rows']:,} rows in {seconds:.2f}s", "white")
+            if operation:
+                operation.add_phase(name, seconds, "ok")
+        process.wait()
+    finally:
+        subprocess.run(["docker", "exec", target["container"], "rm", "-rf", directory],
+                       capture_output=True, creationflags=creationflags)
+    
+    elapsed = time.monotonic() - started
+    if process.returncode != 0:
+        failed = next((name for name in order if name not in loaded), None)
+        if operation and failed:
+            operation.add_phase(failed, time.monotonic() - table_started, "failed")
+        error = "\n".join(line for line in output if "ERROR" in line or "FATAL" in line) or "\n".join(output[-5:])
+        errors = [f"{failed or 'load'}: {error or f'psql exited with {process.returncode}'}"]
+        log(f"Load failed at {failed or 'the end'}, rolled back; {target['database']} is unchanged: {error[:300]}", "red")
+        return {"rows": 0, "bytes": 0, "seconds": elapsed, "errors": errors}
+    
+    total_rows = sum(manifest["tables"][name]["rows"] for name in order)
+    total_bytes = sum(manifest["tables"][name]["bytes"] for name in order)
+    log(f"Loaded {total_rows:,} rows ({total_bytes / 1e6:,.1f} MB) in {elapsed:.1f}s", "green")
+    return {"rows": total_rows, "bytes": total_bytes, "seconds": elapsed, "errors": []}
+
+
+def run_fixture_load(app, database, state):
+    """Load a compiled seed state into a local database, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    state_dir = get_fixture_dir() / state
+    if not (state_dir / "manifest.json").exists():
+        app.log_local_message(
+            f"No compiled fixtures at {state_dir}; run python -m cleo_setup.seed_fixtures compile", "red"
+        )
+        return
+    target["skip_triggers"] = False
+    app.log_local_message(f"\n---- LOADING SEED FIXTURES ({state} -> {target['database']}) ----", "yellow")
+    with record_operation("seed-fixtures", target["database"], state=state) as operation:
+        try:
+            result = load_fixtures(target, state_dir, log=app.log_local_message, operation=operation)
+        except (OSError, RuntimeError) as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        operation.details["rows"] = result["rows"]
+        operation.finish("ok" if not result["errors"] else "failed")
+
+
+def open_fixture_dialog(app):
+    """Ask for a seed state and load its compiled fixtures in the background."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Load Seed Fixtures")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    database = tk.StringVar(value="main")
+    state = tk.StringVar(value="merged")
+    
+    ttk.Label(
+        frame,
+        text="Replaces the data in the seeded tables, and the tables that reference them, "
+             "with the precompiled seed state in one transaction. Logins (users, roles) are kept.",
+        wraplength=420, justify=tk.LEFT
+    ).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+    ttk.Label(frame, text="Database:").grid(row=1, column=0, sticky=tk.W, pady=3)
+    ttk.Combobox(frame, textvariable=database, values=["main", "sim"], state="readonly", width=8).grid(row=1, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Seed state:").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Combobox(frame, textvariable=state, values=list(SEED_STATES), state="readonly", width=10).grid(row=2, column=1, sticky=tk.W)
+    
+    def start():
+        try:
+            with open(get_fixture_dir() / state.get() / "manifest.json", encoding='utf-8') as f:
+                order = json.load(f)["order"]
+            effects = load_effects(load_schema(), order)
+        except (OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Fixtures Error", f"Could not read the {state.get()} fixtures: {e}", parent=dialog)
+            return
+        message = "\n\n".join([f"This replaces the data in {len(order)} tables of the {database.get()} database."]
+                              + effects + ["Continue?"])
+        if not messagebox.askyesno("Confirm", message, parent=dialog):
+            return
+        dialog.destroy()
+        threading.Thread(target=run_fixture_load, args=(app, database.get(), state.get()), daemon=True).start()
+    
+    ttk.Button(frame, text="Load", command=start).grid(row=3, column=0, columnspan=2, pady=10)
+
+
+def main(argv=None):
+    """Compile or load seed fixtures from the command line."""
+    parser = argparse.ArgumentParser(description="Compile seed states to binary COPY files, or load them")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    compile_parser = commands.add_parser("compile", help="Compile seed states")
+    compile_parser.add_argument('--output', default=None, help='Output directory (default: the bundled fixtures directory)')
+    compile_parser.add_argument('--state', action='append', choices=SEED_STATES, help='Seed state to compile (default: all)')
+    compile_parser.add_argument('--schema', help='schema.sql to read (default: the project\'s)')
+    
+    load_parser = commands.add_parser("load", help="Load a compiled seed state")
+    load_parser.add_argument('--state', default="merged", help='Seed state to load')
+    load_parser.add_argument('--fixtures', default=None, help='Compiled fixtures directory (default: the bundled one)')
+    load_parser.add_argument('--tables', nargs='+', help='Only these tables')
+    load_parser.add_argument('--container', required=True, help='Database container to COPY into')
+    load_parser.add_argument('--database', default="my_db", help='Database name')
+    load_parser.add_argument('--user', default="user", help='Database user')
+    load_parser.add_argument('--skip-triggers', action='store_true', help='Skip foreign key checks and triggers while loading')
+    args = parser.parse_args(argv)
+    
+    if args.command == "compile":
+        output = Path(args.output) if args.output else get_fixture_dir()
+        started = time.monotonic()
+        manifests = compile_fixtures(output, args.state or SEED_STATES, load_schema(args.schema))
+        total = sum(entry["bytes"] for manifest in manifests.values() for entry in manifest["tables"].values())
+        print(f"Compiled {len(manifests)} seed states ({total:,} bytes) to {output} in {time.monotonic() - started:.2f}s")
+        return 0
+    
+    state_dir = Path(args.fixtures or get_fixture_dir()) / args.state
+    if not (state_dir / "manifest.json").exists():
+        parser.error(f"no compiled fixtures at {state_dir}")
+    target = {"container": args.container, "database": args.database, "user": args.user,
+              "skip_triggers": args.skip_triggers}
+    with record_operation("seed-fixtures", args.database, state=args.state) as operation:
+        result = load_fixtures(target, state_dir, args.tables, operation=operation)
+        operation.finish("ok" if not result["errors"] else "failed")
+    return 0 if not result["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
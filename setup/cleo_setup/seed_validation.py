@@ -0,0 +1,497 @@
+"""
+Integrity checks for seed sets.
+
+A seed set is every table file that can be loaded together: the CSVs of
+seed/pre, of seed/pre and seed/post combined, or a directory written by
+cleo_setup.synthetic_data. Each file is loaded column by column and checked
+against schema.sql in one pass:
+
+- the header names known, distinct columns, and no required column is missing
+- every row has as many fields as the header
+- primary keys are unique within the file
+- NOT NULL columns have values
+- values parse as their column's type and fit its length
+- foreign keys point at ids present in the referenced table's files
+
+Checks run on whole columns: each distinct value is validated once and
+foreign keys are checked with set differences, so row numbers are only
+looked up for values that fail.
+
+Command line:
+    
+    python -m cleo_setup.seed_validation                  # seed/pre and seed/pre + seed/post
+    python -m cleo_setup.seed_validation --set /tmp/dataset --json report.json
+"""
+import argparse
+import csv
+import json
+import re
+import sys
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+
+from .history import record_operation
+from .schema import load_schema
+from .seeds import get_seed_root
+from .utils import log_message
+
+# Values the server's seeder stores as NULL
+NULL_VALUES = {"", "NULL"}
+COPY_NULL = "\\N"
+MAX_EXAMPLES = 5
+
+_INTEGER = re.compile(r'[+-]?\d+')
+_DECIMAL = re.compile(r'[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?')
+_BOOLEAN = {"true", "false", "t", "f", "yes", "no", "on", "off", "1", "0", "y", "n"}
+_ISO_DATE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})')
+_SLASH_DATE = re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})')
+_ISO_TIMESTAMP = re.compile(
+    r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[ T](\d{1,2}):(\d{2})(?::(\d{2})(?:\.\d+)?)?)?\s*(Z|[+-]\d{2}(?::?\d{2})?)?'
+)
+_UUID = re.compile(r'[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{12}')
+INTEGER_LIMITS = {
+    "smallint": 2 ** 15, "integer": 2 ** 31, "int": 2 ** 31, "int4": 2 ** 31, "serial": 2 ** 31,
+    "bigint": 2 ** 63, "int8": 2 ** 63, "bigserial": 2 ** 63, "smallserial": 2 ** 15,
+}
+
+
+class SeedTableFile:
+    """One table file of a seed set, loaded as columns."""
+    
+    def __init__(self, table, path, header, columns, row_count, ragged, multiline=0, line_numbers=None, first_line=2):
+        self.table = table
+        self.path = Path(path)
+        self.header = header
+        self.columns = columns
+        self.row_count = row_count
+        self.ragged = ragged
+        self.multiline = multiline
+        self.line_numbers = line_numbers
+        self.first_line = first_line
+    
+    def line_number(self, index):
+        """The file line of a data row, counting from 1."""
+        if self.line_numbers:
+            return self.line_numbers[index]
+        return index + self.first_line
+
+
+def load_csv_file(table, path):
+    """
+    Load a seed CSV column by column, the way the server's seeder reads it.
+    
+    Values are stripped. Rows whose field count differs from the header's are
+    set aside as ragged, because the seeder skips them.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        text = f.read()
+    numbered = [(number, line) for number, line in enumerate(text.splitlines(), 1) if line.strip()]
+    lines = [line for _, line in numbered]
+    rows = list(csv.reader(lines))
+    multiline = len(lines) - len(rows)
+    header = [name.strip() for name in rows[0]] if rows else []
+    data = rows[1:]
+    width = len(header)
+    
+    ragged = [(index, len(row)) for index, row in enumerate(data) if len(row) != width]
+    if ragged:
+        skipped = {index for index, _ in ragged}
+        data = [row if index not in skipped else [""] * width for index, row in enumerate(data)]
+    columns = [list(map(str.strip, column)) for column in zip(*data)] if data else [[] for _ in header]
+    # Rows map to lines only while no quoted value spans lines
+    line_numbers = [number for number, _ in numbered[1:]] if not multiline else None
+    return SeedTableFile(table, path, header, columns, len(data), ragged, multiline, line_numbers)
+
+
+def load_copy_file(table, path, header):
+    """Load a COPY text file written by the synthetic data generator."""
+    with open(path, encoding='utf-8') as f:
+        data = [line.rstrip("\n").split("\t") for line in f if line.strip()]
+    width = len(header)
+    ragged = [(index, len(row)) for index, row in enumerate(data) if len(row) != width]
+    if ragged:
+        skipped = {index for index, _ in ragged}
+        data = [row if index not in skipped else [COPY_NULL] * width for index, row in enumerate(data)]
+    columns = [list(column) for column in zip(*data)] if data else [[] for _ in header]
+    return SeedTableFile(table, path, header, columns, len(data), ragged, first_line=1)
+
+
+def seed_sets(seed_root=None):
+    """
+    The seed sets of a seed directory: seed/pre on its own and seed/pre with seed/post.
+    
+    Returns:
+        dict: {set name: {table: [paths]}}
+    """
+    seed_root = Path(seed_root) if seed_root else get_seed_root()
+    pre = {d.name: sorted(d.glob("*.csv")) for d in sorted((seed_root / "pre").glob("*")) if d.is_dir()}
+    post = {d.name: sorted(d.glob("*.csv")) for d in sorted((seed_root / "post").glob("*")) if d.is_dir()}
+    combined = {table: pre.get(table, []) + post.get(table, []) for table in sorted(set(pre) | set(post))}
+    return {"pre": pre, "pre+post": combined}
+
+
+def directory_set(path):
+    """
+    A seed set from one directory of <table>/*.csv, or a synthetic data directory with manifest.json.
+    
+    Returns:
+        dict: {table: [paths]}
+    """
+    path = Path(path)
+    pattern = "*.tsv" if (path / "manifest.json").exists() else "*.csv"
+    return {d.name: sorted(d.glob(pattern)) for d in sorted(path.iterdir()) if d.is_dir() and any(d.glob(pattern))}
+
+
+class ValidationReport:
+    """Violations grouped by file, column and rule, with a few example rows each."""
+    
+    def __init__(self):
+        self.groups = {}
+        self.files = 0
+        self.rows = 0
+    
+    def add(self, severity, table_file, column, rule, rows=(), message=None):
+        """
+        Record a violation for some rows of a file.
+        
+        Args:
+            severity (str): "error" or "warning".
+            table_file (SeedTableFile): The file.
+            column (str): The column, or None for file-level problems.
+            rule (str): Short name of the check, e.g. "foreign key".
+            rows (iterable): (row index, value) pairs that violate the rule.
+            message (str, optional): Explanation.
+        """
+        rows = list(rows)
+        key = (severity, table_file.table, str(table_file.path), column, rule)
+        group = self.groups.setdefault(key, {"count": 0, "rows": bool(rows), "examples": [], "message": message})
+        group["count"] += len(rows) or 1
+        for index, value in rows[:MAX_EXAMPLES - len(group["examples"])]:
+            group["examples"].append((table_file.line_number(index), value))
+    
+    def sorted_groups(self):
+        """Violations ordered by severity, table, file, column and rule."""
+        return sorted(self.groups.items(), key=lambda item: tuple(part or "" for part in item[0]))
+    
+    def count(self, severity):
+        """Total rows violating rules of a severity."""
+        return sum(group["count"] for key, group in self.groups.items() if key[0] == severity)
+    
+    def to_dict(self):
+        """The report as JSON-friendly data."""
+        return {
+            "files": self.files,
+            "rows": self.rows,
+            "errors": self.count("error"),
+            "warnings": self.count("warning"),
+            "violations": [
+                {"severity": severity, "table": table, "file": path, "column": column, "rule": rule,
+                 "count": group["count"], "message": group["message"],
+                 "examples": [{"line": line, "value": value} for line, value in group["examples"]]}
+                for (severity, table, path, column, rule), group in self.sorted_groups()
+            ],
+        }
+    
+    def lines(self):
+        """
+        Format the report as console lines.
+        
+        Returns:
+            list: (message, color) tuples
+        """
+        result = []
+        for (severity, table, path, column, rule), group in self.sorted_groups():
+            location = f"{table}/{Path(path).name}" + (f" [{column}]" if column else "")
+            message = f" - {group['message']}" if group["message"] else ""
+            count = f", {group['count']} rows" if group["rows"] else ""
+            result.append((f"{severity.upper()} {location}: {rule}{count}{message}",
+                           "red" if severity == "error" else "orange"))
+            if group["examples"]:
+                examples = ", ".join(f"line {line}: {value!r}" for line, value in group["examples"])
+                result.append((f"    e.g. {examples}", "white"))
+        return result
+
+
+def _date_problem(value):
+    """Check a date value; returns (severity, message) or None."""
+    match = _ISO_DATE.fullmatch(value)
+    if match:
+        year, month, day = map(int, match.groups())
+    else:
+        match = _SLASH_DATE.fullmatch(value)
+        if not match:
+            return "error", "not a date"
+        month, day, year = map(int, match.groups())
+        try:
+            date(year, month, day)
+        except ValueError:
+            return "error", "not a valid month/day/year date"
+        return "warning", "non-ISO date, read as month/day/year only under PostgreSQL's default DateStyle"
+    try:
+        date(year, month, day)
+    except ValueError:
+        return "error", "not a valid date"
+    return None
+
+
+def _timestamp_problem(value):
+    """Check a timestamp value; returns (severity, message) or None."""
+    match = _ISO_TIMESTAMP.fullmatch(value)
+    if not match:
+        # A bare non-ISO date is still read as midnight of that day
+        problem = _date_problem(value)
+        if problem and problem[0] == "error":
+            return "error", "not a timestamp"
+        return problem
+    year, month, day = int(match.group(1)), int(match.group(2)), int(match.group(3))
+    hour, minute = int(match.group(4) or 0), int(match.group(5) or 0)
+    second = int(match.group(6) or 0)
+    try:
+        datetime(year, month, day, hour, minute, second)
+    except ValueError:
+        return "error", "not a valid timestamp"
+    return None
+
+
+def value_problem(value, column):
+    """
+    Check a non-NULL value against its column's type.
+    
+    Returns:
+        tuple: (severity, message), or None if the value is fine
+    """
+    base_type = column.base_type
+    if base_type == "integer":
+        if not _INTEGER.fullmatch(value):
+            return "error", "not an integer"
+        limit = INTEGER_LIMITS.get(column.type_name, 2 ** 63)
+        if not -limit <= int(value) < limit:
+            return "error", f"out of range for {column.type_name}"
+    elif base_type in ("decimal", "float"):
+        if not _DECIMAL.fullmatch(value):
+            return "error", "not a number"
+        if column.length and column.scale is not None:
+            whole = value.lstrip("+-").split(".")[0].split("e")[0].split("E")[0].lstrip("0")
+            if len(whole) > column.length - column.scale:
+                return "error", f"too large for DECIMAL({column.length},{column.scale})"
+    elif base_type == "boolean":
+        if value.lower() not in _BOOLEAN:
+            return "error", "not a boolean"
+    elif base_type == "date":
+        return _date_problem(value)
+    elif base_type in ("timestamptz", "timestamp"):
+        return _timestamp_problem(value)
+    elif base_type == "enum":
+        if value not in column.enum_values:
+            return "error", f"not one of {', '.join(column.enum_values)}"
+    elif base_type == "uuid":
+        if not _UUID.fullmatch(value):
+            return "error", "not a UUID"
+    elif base_type == "json":
+        try:
+            json.loads(value)
+        except ValueError:
+            return "error", "not valid JSON"
+    elif base_type == "text" and column.length and len(value) > column.length:
+        return "error", f"longer than {column.type_name.upper()}({column.length})"
+    return None
+
+
+def _rows_with(values, wanted):
+    """Find the rows of a column whose value is in a set."""
+    return [(index, value) for index, value in enumerate(values) if value in wanted]
+
+
+def check_file(table_file, table, report, null_values):
+    """Run the checks that need only the file itself."""
+    header = table_file.header
+    known = [name for name in header if name in table.columns]
+    
+    for name, count in Counter(header).items():
+        if count > 1 and name:
+            report.add("error", table_file, name, "duplicate column",
+                       message=f"appears {count} times; the seeder keeps only the last value")
+    for name in header:
+        if not name:
+            report.add("error", table_file, None, "empty column name", message="the header has a blank name")
+        elif name not in table.columns:
+            report.add("error", table_file, name, "unknown column", message=f"{table.name} has no column {name!r}")
+    for column in table.columns.values():
+        if column.name not in header and not column.nullable and column.default is None and not column.serial:
+            report.add("error", table_file, column.name, "missing column", message="NOT NULL without a default")
+    if table_file.ragged:
+        report.add("error", table_file, None, "field count",
+                   [(index, f"{count} fields") for index, count in table_file.ragged],
+                   message=f"header has {len(header)}; the seeder skips these rows")
+    if table_file.multiline:
+        report.add("error", table_file, None, "multi-line value",
+                   message="quoted line breaks split rows, since the seeder reads line by line")
+    
+    positions = {}
+    for position, name in enumerate(header):
+        positions.setdefault(name, position)
+    for name in known:
+        column = table.columns[name]
+        values = table_file.columns[positions[name]]
+        distinct = set(values)
+        
+        nulls = distinct & null_values
+        if nulls and not column.nullable and column.default is None:
+            report.add("error", table_file, name, "NOT NULL", _rows_with(values, nulls))
+        
+        problems = {}
+        for value in distinct - null_values:
+            problem = value_problem(value, column)
+            if problem:
+                problems.setdefault(problem, set()).add(value)
+        for (severity, message), bad in problems.items():
+            report.add(severity, table_file, name, "type", _rows_with(values, bad), message=message)
+    
+    for name in table.primary_key:
+        if name not in positions:
+            continue
+        values = table_file.columns[positions[name]]
+        if len(set(values)) != len(values):
+            duplicates = {value for value, count in Counter(values).items() if count > 1} - null_values
+            if duplicates:
+                report.add("error", table_file, name, "duplicate primary key", _rows_with(values, duplicates))
+
+
+def validate_set(tables, schema=None, null_values=None, loader=None):
+    """
+    Validate one seed set.
+    
+    Args:
+        tables (dict): {table: [paths]}, as from seed_sets or directory_set.
+        schema (Schema, optional): The parsed schema; the project's schema.sql by default.
+        null_values (set, optional): Values read as NULL.
+        loader (callable, optional): Loads (table, path) into a SeedTableFile; CSV by default.
+    
+    Returns:
+        ValidationReport: Every violation found
+    """
+    schema = schema or load_schema()
+    null_values = null_values or NULL_VALUES
+    loader = loader or load_csv_file
+    report = ValidationReport()
+    files = {}
+    
+    for name, paths in tables.items():
+        table = schema.tables.get(name)
+        for path in paths:
+            table_file = loader(name, path)
+            report.files += 1
+            report.rows += table_file.row_count
+            if table is None:
+                report.add("error", table_file, None, "unknown table", message=f"schema.sql has no table {name!r}")
+                continue
+            check_file(table_file, table, report, null_values)
+            files.setdefault(name, []).append(table_file)
+    
+    # Ids present anywhere in each table's files; any of them may be the one loaded
+    key_sets = {}
+    
+    def keys(table_name, column_name):
+        if (table_name, column_name) not in key_sets:
+            present = set()
+            for table_file in files.get(table_name, []):
+                if column_name in table_file.header:
+                    present.update(table_file.columns[table_file.header.index(column_name)])
+            key_sets[(table_name, column_name)] = present - null_values
+        return key_sets[(table_name, column_name)]
+    
+    for name, table_files in files.items():
+        for fk in schema.tables[name].foreign_keys:
+            if len(fk.columns) != 1:
+                continue
+            column, ref_column = fk.columns[0], fk.ref_columns[0]
+            for table_file in table_files:
+                if column not in table_file.header:
+                    continue
+                values = table_file.columns[table_file.header.index(column)]
+                referenced = set(values) - null_values
+                if not referenced:
+                    continue
+                if fk.ref_table not in files:
+                    report.add("warning", table_file, column, "foreign key",
+                               message=f"{fk.ref_table} is not in this seed set, so its ids cannot be checked")
+                    continue
+                missing = referenced - keys(fk.ref_table, ref_column)
+                if missing:
+                    report.add("error", table_file, column, "foreign key", _rows_with(values, missing),
+                               message=f"no matching {fk.ref_table}.{ref_column}")
+    return report
+
+
+def validate_directory(path, schema=None):
+    """Validate a seed directory or a synthetic data directory as one set."""
+    path = Path(path)
+    manifest = path / "manifest.json"
+    if manifest.exists():
+        columns = json.loads(manifest.read_text(encoding='utf-8'))["columns"]
+        return validate_set(directory_set(path), schema, {COPY_NULL},
+                            lambda table, file_path: load_copy_file(table, file_path, columns[table]))
+    return validate_set(directory_set(path), schema)
+
+
+def run_seed_validation(app):
+    """Validate the project's seed sets, logging to the local development console."""
+    app.log_local_message("\n---- VALIDATING SEED SETS ----", "yellow")
+    try:
+        schema = load_schema()
+        sets = seed_sets()
+    except OSError as e:
+        app.log_local_message(f"Could not read the schema or seeds: {e}", "red")
+        return
+    with record_operation("seeds", "validate") as operation:
+        failed = False
+        for name, tables in sets.items():
+            with operation.phase(f"validate {name}"):
+                report = validate_set(tables, schema)
+            errors, warnings = report.count("error"), report.count("warning")
+            failed = failed or bool(errors)
+            app.log_local_message(
+                f"{name}: {report.files} files, {report.rows:,} rows, {errors} errors, {warnings} warnings",
+                "green" if not errors else "red"
+            )
+            for message, color in report.lines():
+                app.log_local_message(message, color)
+        operation.finish("failed" if failed else "ok")
+
+
+def main(argv=None):
+    """Validate seed sets from the command line."""
+    parser = argparse.ArgumentParser(description="Check seed CSVs against schema.sql before loading them")
+    parser.add_argument('--set', action='append', dest='sets', metavar='DIR',
+                        help='Validate this directory as one set (default: the project\'s seed/pre and seed/pre + seed/post)')
+    parser.add_argument('--schema', help='schema.sql to check against (default: the project\'s)')
+    parser.add_argument('--json', help='Also write the reports to this JSON file')
+    parser.add_argument('--strict', action='store_true', help='Exit with an error on warnings too')
+    args = parser.parse_args(argv)
+    
+    schema = load_schema(args.schema)
+    for path in args.sets or []:
+        if not Path(path).is_dir():
+            parser.error(f"not a directory: {path}")
+    if args.sets:
+        reports = {path: validate_directory(path, schema) for path in args.sets}
+    else:
+        reports = {name: validate_set(tables, schema) for name, tables in seed_sets().items()}
+    
+    for name, report in reports.items():
+        print(f"{name}: {report.files} files, {report.rows:,} rows, "
+              f"{report.count('error')} errors, {report.count('warning')} warnings")
+        for message, color in report.lines():
+            log_message(None, message, color)
+    if args.json:
+        with open(args.json, "w", encoding='utf-8') as f:
+            json.dump({name: report.to_dict() for name, report in reports.items()}, f, indent=2)
+    
+    errors = sum(report.count("error") for report in reports.values())
+    warnings = sum(report.count("warning") for report in reports.values())
+    return 1 if errors or (args.strict and warnings) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Access to the project's seed CSVs.
+
+Seeds live in seed/pre/<table>/*.csv and seed/post/<table>/*.csv. Each file
+is one dataset for its table; the server merges a pre and a post file by id
+when seeding, with post rows taking precedence.
+"""
+import csv
+from pathlib import Path
+
+SEED_PHASES = ("pre", "post")
+
+
+def get_seed_root():
+    """Get the project's seed directory."""
+    from .utils import get_project_root
+    return get_project_root() / "seed"
+
+
+def seed_files(seed_root=None, phases=SEED_PHASES):
+    """
+    Find the seed CSVs of every table.
+    
+    Returns:
+        dict: {table: {phase: [paths]}}, tables and paths sorted by name
+    """
+    seed_root = Path(seed_root) if seed_root else get_seed_root()
+    files = {}
+    for phase in phases:
+        phase_dir = seed_root / phase
+        if not phase_dir.is_dir():
+            continue
+        for table_dir in sorted(d for d in phase_dir.iterdir() if d.is_dir()):
+            paths = sorted(table_dir.glob("*.csv"))
+            if paths:
+                files.setdefault(table_dir.name, {})[phase] = paths
+    return dict(sorted(files.items()))
+
+
+def read_seed_csv(path):
+    """
+    Read a seed CSV.
+    
+    Returns:
+        tuple: (header, rows) with the header as a list and rows as lists of strings
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        rows = [row for row in reader if any(value.strip() for value in row)]
+    return header, rows
+
+
+def read_seed_rows(paths):
+    """Read seed CSVs as dicts keyed by column name; repeated header names keep their first value."""
+    for path in paths:
+        header, rows = read_seed_csv(path)
+        for row in rows:
+            record = {}
+            for name, value in zip(header, row):
+                record.setdefault(name, value)
+            yield record
+
+
+def merged_seed_rows(table_files):
+    """
+    Merge a table's seed rows by id, the way the server does: post rows replace pre rows.
+    
+    Rows without an id are kept as they are.
+    
+    Args:
+        table_files (dict): {phase: [paths]} for one table, as from seed_files.
+    
+    Returns:
+        list: Row dicts
+    """
+    merged = {}
+    anonymous = []
+    for phase in SEED_PHASES:
+        for row in read_seed_rows(table_files.get(phase, [])):
+            key = row.get("id", "").strip()
+            if key:
+                merged[key] = row
+            else:
+                anonymous.append(row)
+    return list(merged.values()) + anonymous
@@ -0,0 +1,320 @@
+"""
+Refresh the simulation database from the main database.
+
+pg_dump runs in the db container and its output is streamed, chunk by
+chunk, into psql in the db-sim container; nothing is written to disk on
+either side. The whole restore runs in one transaction, so the simulation
+database keeps its old data if anything fails. Afterwards set_simulation is
+called in the main database to switch the server to the simulation data.
+
+Without table filters the whole database is replaced. With --table only the
+data of those tables is copied: they are truncated (with the tables that
+reference them) and reloaded. --compress gzips the stream in transit, which
+pays off when Docker runs on another machine.
+
+Command line:
+    
+    python -m cleo_setup.sim_sync --source cleo-db-1 --target cleo-db-sim-1
+    python -m cleo_setup.sim_sync --source cleo-db-1 --target cleo-db-sim-1 --table members --table sale_transactions --compress 1
+"""
+import argparse
+import gzip
+import shlex
+import subprocess
+import sys
+import threading
+import time
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import record_operation
+from .schema import load_schema
+from .utils.psql import local_target, psql
+
+CHUNK_BYTES = 1024 * 1024
+PROGRESS_SECONDS = 5
+
+
+def dump_command(source, tables=None, exclude_table_data=None, compress=0):
+    """
+    Build the docker exec pg_dump command for the main database.
+    
+    Args:
+        source (dict): container, database and user of the main database.
+        tables (list, optional): Copy only the data of these tables.
+        exclude_table_data (list, optional): Tables whose rows are left out.
+        compress (int): gzip level of the output, 0 for none.
+    
+    Returns:
+        list: The command
+    """
+    command = [
+        "docker", "exec", source["container"],
+        "pg_dump", "-h", "localhost", "-p", "5432", "-U", source["user"], "-d", source["database"],
+        "--no-owner", "--no-privileges"
+    ]
+    if tables:
+        command.append("--data-only")
+        for table in tables:
+            command += ["--table", f'"{table}"']
+    else:
+        command += ["--clean", "--if-exists"]
+    for table in exclude_table_data or []:
+        command += ["--exclude-table-data", f'"{table}"']
+    if compress:
+        command += ["--compress", str(compress)]
+    return command
+
+
+def restore_command(target, compressed=False):
+    """Build the docker exec psql command that runs the dump in the simulation database."""
+    client = ["psql", "-h", "localhost", "-p", "5432", "-U", target["user"], "-d", target["database"],
+            "-v", "ON_ERROR_STOP=1", "-q", "-X"]
+    if compressed:
+        return ["docker", "exec", "-i", target["container"], "sh", "-c", "gzip -dc | " + shlex.join(client)]
+    return ["docker", "exec", "-i", target["container"]] + client
+
+
+def _drain(stream, lines):
+    """Collect a process's stderr so a full pipe never stalls it."""
+    for line in iter(stream.readline, b""):
+        lines.append(line.decode("utf-8", errors="replace").rstrip())
+    stream.close()
+
+
+def stream_dump(source, target, tables=None, exclude_table_data=None, compress=0, log=None):
+    """
+    Pipe pg_dump in the main database into psql in the simulation database.
+    
+    The dump is wrapped in BEGIN/COMMIT. If pg_dump fails the COMMIT is never
+    sent, so psql exits with the transaction rolled back.
+    
+    Args:
+        source (dict): container, database and user of the main database.
+        target (dict): container, database and user of the simulation database.
+        tables (list, optional): Copy only the data of these tables.
+        exclude_table_data (list, optional): Tables whose rows are left out.
+        compress (int): gzip level in transit, 0 for none.
+        log (callable, optional): log(message, color) for progress.
+    
+    Returns:
+        dict: bytes streamed, seconds and error (None on success)
+    """
+    log = log or (lambda message, color="white": print(message))
+    prefix = "BEGIN;\n"
+    if tables:
+        quoted = ", ".join(f'"{table}"' for table in tables)
+        prefix += f"TRUNCATE {quoted} RESTART IDENTITY CASCADE;\n"
+    suffix = "COMMIT;\nANALYZE;\n"
+    # Concatenated gzip members decompress as one stream, so the wrapper can be compressed separately
+    encode = (lambda text: gzip.compress(text.encode("utf-8"), compress)) if compress else (lambda text: text.encode("utf-8"))
+    
+    creationflags = subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+    dump = subprocess.Popen(dump_command(source, tables, exclude_table_data, compress),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, creationflags=creationflags)
+    restore = subprocess.Popen(restore_command(target, bool(compress)),
+                               stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                               creationflags=creationflags)
+    dump_errors, restore_errors = [], []
+    drains = [threading.Thread(target=_drain, args=(dump.stderr, dump_errors), daemon=True),
+              threading.Thread(target=_drain, args=(restore.stderr, restore_errors), daemon=True)]
+    for drain in drains:
+        drain.start()
+    
+    started = time.monotonic()
+    reported = started
+    streamed = 0
+    error = None
+    try:
+        restore.stdin.write(encode(prefix))
+        for chunk in iter(lambda: dump.stdout.read(CHUNK_BYTES), b""):
+            restore.stdin.write(chunk)
+            streamed += len(chunk)
+            now = time.monotonic()
+            if now - reported >= PROGRESS_SECONDS:
+                reported = now
+                log(f"  {streamed / 1e6:,.0f} MB streamed ({streamed / 1e6 / (now - started):,.1f} MB/s)", "white")
+        if dump.wait() == 0:
+            restore.stdin.write(encode(suffix))
+        restore.stdin.close()
+    except BrokenPipeError:
+        # psql stopped at an error; stop the dump as well
+        dump.kill()
+    dump.wait()
+    restore.wait()
+    for drain in drains:
+        drain.join(timeout=5)
+    
+    if dump.returncode != 0:
+        error = "pg_dump: " + ("\n".join(dump_errors) or f"exited with {dump.returncode}")
+    elif restore.returncode != 0:
+        error = "psql: " + ("\n".join(line for line in restore_errors if "ERROR" in line or "FATAL" in line)
+                            or "\n".join(restore_errors[-5:]) or f"exited with {restore.returncode}")
+    return {"bytes": streamed, "seconds": time.monotonic() - started, "error": error}
+
+
+def set_simulation(source, active=True, start=None, end=None):
+    """Call set_simulation in the main database to switch the server to or from the simulation data."""
+    def literal(value):
+        return "NULL" if not value else "'" + value.replace("'", "''") + "'::timestamp"
+    
+    psql(source, f"SELECT set_simulation({'TRUE' if active else 'FALSE'}, {literal(start)}, {literal(end)});")
+
+
+def sync_simulation(source, target, tables=None, exclude_table_data=None, compress=0, activate=True,
+                    start=None, end=None, schema=None, log=None, operation=None):
+    """
+    Refresh the simulation database from the main database and switch to it.
+    
+    Args:
+        source (dict): container, database and user of the main database.
+        target (dict): container, database and user of the simulation database.
+        tables (list, optional): Copy only the data of these tables; the whole database by default.
+        exclude_table_data (list, optional): Tables whose rows are left out.
+        compress (int): gzip level in transit, 0 for none.
+        activate (bool): Call set_simulation(TRUE, start, end) afterwards.
+        start (str, optional): Simulation start, UTC.
+        end (str, optional): Simulation end, UTC.
+        schema (Schema, optional): Used to name the tables a filtered sync also empties.
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add phases to.
+    
+    Returns:
+        dict: bytes, seconds and error
+    """
+    log = log or (lambda message, color="white": print(message))
+    if tables:
+        schema = schema or load_schema()
+        unknown = [table for table in tables if table not in schema.tables]
+        if unknown:
+            raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+        cascaded = schema.cascaded_tables(tables)
+        if cascaded:
+            log(f"Also emptied in {target['database']}: {', '.join(cascaded)}", "orange")
+    
+    scope = ", ".join(tables) if tables else "all tables"
+    log(f"Streaming {source['database']} -> {target['database']} ({scope}"
+        f"{f', gzip {compress}' if compress else ''})...", "cyan")
+    result = stream_dump(source, target, tables, exclude_table_data, compress, log)
+    if operation:
+        operation.add_phase("stream", result["seconds"], "failed" if result["error"] else "ok")
+    if result["error"]:
+        log(f"Sync failed, {target['database']} is unchanged: {result['error'][:500]}", "red")
+        return result
+    
+    rate = result["bytes"] / 1e6 / result["seconds"] if result["seconds"] else 0
+    log(f"Streamed {result['bytes'] / 1e6:,.1f} MB in {result['seconds']:.1f}s ({rate:,.1f} MB/s)", "green")
+    if activate:
+        phase_started = time.monotonic()
+        set_simulation(source, True, start, end)
+        if operation:
+            operation.add_phase("set_simulation", time.monotonic() - phase_started, "ok")
+        log("Simulation mode switched on; the server picks it up on its next status check", "green")
+    return result
+
+
+def _local_databases(app):
+    """The main and simulation databases of the local stack."""
+    source = local_target(app, "main")
+    target = local_target(app, "sim")
+    if not source or not target:
+        return None, None
+    return source, target
+
+
+def run_sim_sync(app, tables, compress, activate, start, end):
+    """Refresh the local simulation database, logging to the local console."""
+    source, target = _local_databases(app)
+    if not source:
+        return
+    app.log_local_message("\n---- SYNCING SIMULATION DATABASE ----", "yellow")
+    with record_operation("sim-sync", target["database"], tables=tables or "all", compress=compress) as operation:
+        try:
+            result = sync_simulation(source, target, tables, compress=compress, activate=activate,
+                                     start=start, end=end, log=app.log_local_message, operation=operation)
+        except (OSError, ValueError, RuntimeError) as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        operation.details["bytes"] = result["bytes"]
+        operation.finish("failed" if result["error"] else "ok")
+
+
+def open_sim_sync_dialog(app):
+    """Ask for the sync options and refresh the simulation database in the background."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Sync Simulation Database")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    tables = tk.StringVar(value="")
+    compress = tk.IntVar(value=0)
+    activate = tk.BooleanVar(value=True)
+    start = tk.StringVar(value="")
+    end = tk.StringVar(value="")
+    
+    ttk.Label(
+        frame,
+        text="Streams the main database into the simulation database in one transaction. "
+             "Leave the tables empty to copy everything.",
+        wraplength=420, justify=tk.LEFT
+    ).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+    ttk.Label(frame, text="Tables (optional):").grid(row=1, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=tables, width=40).grid(row=1, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Compression (0-9):").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(frame, from_=0, to=9, textvariable=compress, width=6).grid(row=2, column=1, sticky=tk.W)
+    ttk.Checkbutton(frame, text="Switch to simulation mode afterwards", variable=activate).grid(
+        row=3, column=0, columnspan=2, sticky=tk.W, pady=3)
+    ttk.Label(frame, text="Simulation start (UTC, optional):").grid(row=4, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=start, width=22).grid(row=4, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Simulation end (UTC, optional):").grid(row=5, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=end, width=22).grid(row=5, column=1, sticky=tk.W)
+    
+    def begin():
+        try:
+            args = (app, tables.get().replace(",", " ").split(), compress.get(), activate.get(),
+                    start.get().strip() or None, end.get().strip() or None)
+        except tk.TclError as e:
+            messagebox.showerror("Input Error", str(e), parent=dialog)
+            return
+        if not messagebox.askyesno("Confirm", "This replaces the data in the simulation database. Continue?", parent=dialog):
+            return
+        dialog.destroy()
+        threading.Thread(target=run_sim_sync, args=args, daemon=True).start()
+    
+    ttk.Button(frame, text="Sync", command=begin).grid(row=6, column=0, columnspan=2, pady=10)
+
+
+def main(argv=None):
+    """Refresh a simulation database from the command line."""
+    parser = argparse.ArgumentParser(description="Stream the main database into the simulation database")
+    parser.add_argument('--source', required=True, help='Main database container')
+    parser.add_argument('--target', required=True, help='Simulation database container')
+    parser.add_argument('--database', default="my_db", help='Main database name')
+    parser.add_argument('--sim-database', default="sim_db", help='Simulation database name')
+    parser.add_argument('--user', default="user", help='Database user')
+    parser.add_argument('--table', action='append', dest='tables', help='Copy only this table\'s data (repeatable)')
+    parser.add_argument('--exclude-table-data', action='append', metavar='TABLE', help='Leave out this table\'s rows (repeatable)')
+    parser.add_argument('--compress', type=int, default=0, choices=range(10), metavar='0-9', help='gzip level in transit')
+    parser.add_argument('--no-activate', action='store_true', help='Do not call set_simulation afterwards')
+    parser.add_argument('--start', help='Simulation start for set_simulation, UTC')
+    parser.add_argument('--end', help='Simulation end for set_simulation, UTC')
+    args = parser.parse_args(argv)
+    
+    source = {"container": args.source, "database": args.database, "user": args.user}
+    target = {"container": args.target, "database": args.sim_database, "user": args.user}
+    with record_operation("sim-sync", args.sim_database, tables=args.tables or "all", compress=args.compress) as operation:
+        try:
+            result = sync_simulation(source, target, args.tables, args.exclude_table_data, args.compress,
+                                     not args.no_activate, args.start, args.end, operation=operation)
+        except ValueError as e:
+            parser.error(str(e))
+        operation.details["bytes"] = result["bytes"]
+        operation.finish("failed" if result["error"] else "ok")
+    return 0 if not result["error"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
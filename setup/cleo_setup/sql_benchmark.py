@@ -0,0 +1,617 @@
+"""
+Benchmark the stored functions in server/sql.
+
+Each case calls one function with every combination of its parameter sweep
+(page size, search text, date range, month), runs each call a number of
+times through psql in the database container and reports timing percentiles
+with the rows and bytes returned. One more call per combination runs under
+EXPLAIN (ANALYZE, BUFFERS); with auto_explain available the plans of the
+statements inside the function are captured as well.
+
+Results are recorded in the history, and the full report with its plans is
+written to <project>/.cleo-setup/sql-bench. Each run is compared with the
+previous successful run under the same tag: calls that got slower, read more
+buffers or changed plan are flagged, together with the function files that
+changed in between.
+
+--install loads the function files of the working copy before measuring, and
+--scale first replaces the data with a synthetic dataset of that scale,
+generated from --seed (the synthetic data dialog's default unless given).
+Both are part of the default tag, so only runs on the same data are compared.
+
+Command line:
+    
+    python -m cleo_setup.sql_benchmark --container cleo-db-1 --install
+    python -m cleo_setup.sql_benchmark --container cleo-db-1 --scale 10 --function get_voucher_paginated_json --repeat 50
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import re
+import sys
+import threading
+from datetime import datetime
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import latest_details, percentile, record_operation
+from .schema import load_schema
+from .seeds import seed_files
+from .synthetic_data import DEFAULT_SEED, DatasetPlan, generate_dataset
+from .utils.psql import local_target, psql, query
+
+# Calls the dashboards make, with the parameters worth sweeping. {placeholders}
+# are filled from the sweep and from resolve_context().
+DEFAULT_CASES = [
+    {"function": "get_services_with_pagination", "file": "service/get-services-pagination-search-filter.sql",
+     "call": "get_services_with_pagination({page}, {page_size}, {search})",
+     "sweep": {"page_size": [10, 50, 200], "search": [None, "a", "zzzz"], "page": [1, 5]}},
+    {"function": "get_products_with_pagination", "file": "product/get-products-pagination-search-filter.sql",
+     "call": "get_products_with_pagination({page}, {page_size}, {search})",
+     "sweep": {"page_size": [10, 50, 200], "search": [None, "a", "zzzz"], "page": [1, 5]}},
+    {"function": "get_voucher_paginated_json", "file": "mv/get_voucher_paginated_json.sql",
+     "call": "get_voucher_paginated_json({page_size}, {search}, {start}, {end}, p_page => {page})",
+     "sweep": {"page_size": [10, 50, 200], "search": [None, "a"], "range": ["all", "30 days", "365 days"], "page": [1]}},
+    {"function": "get_member_voucher_transaction_logs_paginated_json",
+     "file": "mv/get_member_voucher_transaction_logs_paginated_json.sql",
+     "call": "get_member_voucher_transaction_logs_paginated_json({page_size}, {start}, {end}, "
+             "p_page => {page}, p_member_voucher_id => {member_voucher_id})",
+     "sweep": {"page_size": [10, 50, 200], "range": ["all", "30 days", "365 days"], "page": [1]}},
+    {"function": "get_mcp_income_by_month", "file": "revenue/revenue_related_functions.sql",
+     "call": "get_mcp_income_by_month({year}, {month})",
+     "sweep": {"months_back": [0, 1, 11]}},
+    {"function": "get_sales_history_for_each_service", "file": "service/get_sales_history_for_each_service.sql",
+     "call": "get_sales_history_for_each_service({service_id}, {year}, {month})",
+     "sweep": {"months_back": [0, 1]}},
+]
+
+WARMUP = 2
+REPEAT = 20
+# A call is flagged when it is this much slower (or reads this many more buffers)
+# than in the previous run, and by more than the absolute floor
+THRESHOLD = 0.2
+MIN_DELTA_MS = 0.5
+MIN_DELTA_BUFFERS = 10
+
+CONTEXT_SQL = """
+SELECT
+    coalesce((SELECT max(created_at) FROM sale_transactions), now()),
+    coalesce((SELECT service_id FROM member_care_package_transaction_logs WHERE service_id IS NOT NULL
+              GROUP BY 1 ORDER BY count(*) DESC LIMIT 1), (SELECT min(id) FROM services), 0),
+    coalesce((SELECT member_voucher_id FROM member_voucher_transaction_logs
+              GROUP BY 1 ORDER BY count(*) DESC LIMIT 1), 0);
+"""
+_TIME_PATTERN = re.compile(r"^Time: ([\d.]+) ms", re.MULTILINE)
+# auto_explain with log_format=json: "NOTICE:  duration: 0.123 ms  plan:" then the plan, closed by "}" on its own line
+_NESTED_PATTERN = re.compile(r"NOTICE:\s+duration: ([\d.]+) ms\s+plan:\n(\{\n.*?\n\})", re.DOTALL)
+AUTO_EXPLAIN_SQL = """LOAD 'auto_explain';
+SET auto_explain.log_min_duration = 0;
+SET auto_explain.log_analyze = on;
+SET auto_explain.log_buffers = on;
+SET auto_explain.log_nested_statements = on;
+SET auto_explain.log_format = json;
+SET auto_explain.log_level = notice;
+"""
+
+
+def load_cases(path):
+    """
+    Load cases from a JSON file.
+    
+    The file holds a list, or an object with a "cases" list, of entries with
+    function, call and optionally file and sweep, shaped like DEFAULT_CASES.
+    """
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    cases = data.get("cases", []) if isinstance(data, dict) else data
+    for case in cases:
+        if "function" not in case or "call" not in case:
+            raise ValueError("Every case needs a function and a call")
+    return cases
+
+
+def get_results_dir():
+    """Get the directory the full benchmark reports are written to."""
+    from .utils import get_project_root
+    
+    return get_project_root() / ".cleo-setup" / "sql-bench"
+
+
+def get_sql_dir():
+    """Get the server/sql directory of the current project."""
+    from .utils import get_project_root
+    
+    return get_project_root() / "server" / "sql"
+
+
+def resolve_context(target):
+    """
+    Look up the values the calls need from the data: the latest sale (dates
+    are taken relative to it), the busiest service and the busiest member voucher.
+    
+    Returns:
+        dict: anchor (datetime), service_id and member_voucher_id
+    """
+    stdout, _ = query(target, "SET TIME ZONE 'UTC';\n" + CONTEXT_SQL)
+    anchor, service_id, member_voucher_id = stdout.strip().splitlines()[-1].split("|")
+    return {"anchor": datetime.fromisoformat(anchor.strip()[:19]), "service_id": int(service_id),
+            "member_voucher_id": int(member_voucher_id)}
+
+
+def sql_literal(value):
+    """Render a sweep value as SQL."""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def case_calls(case, context):
+    """
+    Expand a case into one call per combination of its sweep.
+    
+    Args:
+        case (dict): A case, as in DEFAULT_CASES.
+        context (dict): As from resolve_context.
+    
+    Returns:
+        list: (label, params, SQL call) tuples
+    """
+    sweep = case.get("sweep") or {}
+    names = list(sweep)
+    calls = []
+    for combination in itertools.product(*(sweep[name] for name in names)):
+        params = dict(zip(names, combination))
+        values = {name: sql_literal(value) for name, value in params.items()}
+        values["service_id"] = str(context["service_id"])
+        values["member_voucher_id"] = str(context["member_voucher_id"])
+        
+        anchor = context["anchor"]
+        date_range = params.get("range", "all")
+        if date_range == "all":
+            values["start"] = values["end"] = "NULL"
+        else:
+            values["start"] = f"'{anchor.isoformat()}+00'::timestamptz - interval {sql_literal(date_range)}"
+            values["end"] = f"'{anchor.isoformat()}+00'::timestamptz"
+        month = anchor.year * 12 + anchor.month - 1 - int(params.get("months_back", 0))
+        values["year"], values["month"] = str(month // 12), str(month % 12 + 1)
+        
+        label = case["function"] + (" [" + " ".join(f"{name}={params[name]}" for name in names) + "]" if names else "")
+        calls.append((label, params, case["call"].format(**values)))
+    return calls
+
+
+def _measured_query(call):
+    """Wrap a call so that its whole result is produced but only counted."""
+    return f"SELECT count(*), coalesce(sum(octet_length(r::text)), 0) FROM {call} AS r;"
+
+
+def time_call(target, call, warmup=WARMUP, repeat=REPEAT):
+    """
+    Run a call repeatedly in one session, timed by psql.
+    
+    Returns:
+        dict: times (ms, warmup excluded), rows and bytes of the result
+    """
+    statement = _measured_query(call)
+    stdout, _ = query(target, "\\timing on\n" + "\n".join([statement] * (warmup + repeat)) + "\n")
+    times = [float(value) for value in _TIME_PATTERN.findall(stdout)][warmup:]
+    if not times:
+        raise RuntimeError("psql printed no timings")
+    results = [line for line in stdout.splitlines() if "|" in line and not line.startswith("Time:")]
+    rows, size = results[-1].split("|") if results else (0, 0)
+    return {"times": times, "rows": int(rows), "bytes": int(size)}
+
+
+def plan_shape(plan):
+    """Render the node types and relations of a plan tree, without costs or counts."""
+    name = plan.get("Node Type", "?")
+    relation = plan.get("Relation Name") or plan.get("Index Name") or plan.get("Function Name")
+    if relation:
+        name += f" on {relation}"
+    children = plan.get("Plans") or []
+    return name + ("(" + ", ".join(plan_shape(child) for child in children) + ")" if children else "")
+
+
+def plan_buffers(plan):
+    """Shared buffers hit and read by a plan node, including its children."""
+    return plan.get("Shared Hit Blocks", 0), plan.get("Shared Read Blocks", 0)
+
+
+def explain_call(target, call, nested=True):
+    """
+    Run a call once under EXPLAIN (ANALYZE, BUFFERS).
+    
+    Args:
+        target (dict): container, database and user.
+        call (str): The SQL call.
+        nested (bool): Also capture the plans inside the function through auto_explain.
+    
+    Returns:
+        dict: plan, execution and planning time (ms), buffers, shape, and the
+        nested statements (None when auto_explain could not be loaded)
+    """
+    explain = f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {_measured_query(call)}\n"
+    stdout, stderr = query(target, (AUTO_EXPLAIN_SQL if nested else "") + explain, stop_on_error=not nested)
+    try:
+        explained = json.loads(stdout.strip())[0]
+    except (ValueError, IndexError):
+        errors = [line for line in stderr.splitlines() if "ERROR" in line]
+        raise RuntimeError("\n".join(errors) or f"Unexpected EXPLAIN output: {stdout.strip()[:200]}")
+    
+    statements = None
+    if nested and "auto_explain" not in stderr:
+        statements = []
+        for match in _NESTED_PATTERN.finditer(stderr):
+            try:
+                logged = json.loads(match.group(2))
+            except ValueError:
+                continue
+            text = logged.get("Query Text", "")
+            if text.lstrip().upper().startswith("EXPLAIN"):
+                continue
+            hit, read = plan_buffers(logged.get("Plan", {}))
+            statements.append({"query": text.strip(), "ms": float(match.group(1)), "hit": hit, "read": read,
+                               "shape": plan_shape(logged.get("Plan", {})), "plan": logged.get("Plan")})
+    
+    hit, read = plan_buffers(explained["Plan"])
+    shapes = [plan_shape(explained["Plan"])] + [statement["shape"] for statement in statements or []]
+    return {
+        "plan": explained["Plan"],
+        "execution_ms": explained.get("Execution Time"),
+        "planning_ms": explained.get("Planning Time"),
+        "hit": hit,
+        "read": read,
+        "shape": hashlib.blake2b("\n".join(shapes).encode("utf-8"), digest_size=8).hexdigest(),
+        "statements": statements,
+    }
+
+
+def summarize_call(timing, explained):
+    """Combine the timing and EXPLAIN of one call into its result entry."""
+    times = timing["times"]
+    return {
+        "runs": len(times),
+        "p50": percentile(times, 50),
+        "p95": percentile(times, 95),
+        "p99": percentile(times, 99),
+        "max": max(times) if times else None,
+        "rows": timing["rows"],
+        "bytes": timing["bytes"],
+        "buffers": explained["hit"] + explained["read"],
+        "read": explained["read"],
+        "execution_ms": explained["execution_ms"],
+        "shape": explained["shape"],
+    }
+
+
+def file_hashes(cases, sql_dir=None):
+    """Hash the function files of the cases, to tell which changed between runs."""
+    sql_dir = sql_dir or get_sql_dir()
+    hashes = {}
+    for case in cases:
+        path = sql_dir / case["file"] if case.get("file") else None
+        if path and path.exists():
+            hashes[case["file"]] = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+    return hashes
+
+
+def install_functions(target, cases, sql_dir=None, log=None):
+    """Load the function files of the cases, so the working copy is what gets measured."""
+    log = log or (lambda message, color="white": print(message))
+    sql_dir = sql_dir or get_sql_dir()
+    for file in sorted({case["file"] for case in cases if case.get("file")}):
+        log(f"Installing {file}...", "cyan")
+        psql(target, (sql_dir / file).read_text(encoding="utf-8"))
+
+
+def compare_results(current, previous, threshold=THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """
+    Compare the calls of two runs.
+    
+    Args:
+        current (dict): {label: entry} of this run.
+        previous (dict): {label: entry} of the run to compare with.
+        threshold (float): Relative change that counts, 0.2 for 20%.
+        min_delta_ms (float): Smaller changes in p50 are never flagged.
+    
+    Returns:
+        list: (label, kind, message) tuples; kind is "regression", "improvement" or
+        "changed" (a different plan or result, which may explain a regression)
+    """
+    findings = []
+    for label, entry in current.items():
+        before = previous.get(label)
+        if not before or entry["p50"] is None or before.get("p50") is None:
+            continue
+        delta = entry["p50"] - before["p50"]
+        if delta > min_delta_ms and entry["p50"] > before["p50"] * (1 + threshold):
+            findings.append((label, "regression", f"p50 {before['p50']:.2f} -> {entry['p50']:.2f} ms "
+                                                   f"(+{delta / before['p50'] * 100 if before['p50'] else 0:.0f}%)"))
+        elif -delta > min_delta_ms and entry["p50"] < before["p50"] / (1 + threshold):
+            findings.append((label, "improvement", f"p50 {before['p50']:.2f} -> {entry['p50']:.2f} ms"))
+        buffers_delta = entry["buffers"] - before.get("buffers", entry["buffers"])
+        if buffers_delta > MIN_DELTA_BUFFERS and entry["buffers"] > before["buffers"] * (1 + threshold):
+            findings.append((label, "regression", f"buffers {before['buffers']:,} -> {entry['buffers']:,}"))
+        if before.get("shape") and entry["shape"] != before["shape"]:
+            findings.append((label, "changed", "plan changed"))
+        if before.get("rows") is not None and entry["rows"] != before["rows"]:
+            findings.append((label, "changed", f"returned {before['rows']:,} -> {entry['rows']:,} rows"))
+    return findings
+
+
+def run_benchmark(target, cases=None, functions=None, warmup=WARMUP, repeat=REPEAT, nested=True,
+                  log=None, operation=None):
+    """
+    Time and explain every call of the cases.
+    
+    Args:
+        target (dict): container, database and user.
+        cases (list, optional): Cases to run; DEFAULT_CASES by default.
+        functions (list, optional): Only run the cases of these functions.
+        warmup (int): Unmeasured runs before each call's timed runs.
+        repeat (int): Timed runs per call.
+        nested (bool): Capture the plans inside the functions through auto_explain.
+        log (callable, optional): log(message, color) for progress.
+        operation (Operation, optional): History operation to add a phase (p50) per call to.
+    
+    Returns:
+        dict: context, results {label: entry}, plans {label: explain} and errors {label: message}
+    """
+    log = log or (lambda message, color="white": print(message))
+    cases = [case for case in (cases or DEFAULT_CASES) if not functions or case["function"] in functions]
+    if not cases:
+        raise ValueError(f"No cases for {', '.join(functions)}")
+    context = resolve_context(target)
+    log(f"Dates relative to {context['anchor']:%Y-%m-%d %H:%M} UTC, service {context['service_id']}, "
+        f"member voucher {context['member_voucher_id']}", "white")
+    
+    results, plans, errors = {}, {}, {}
+    for case in cases:
+        for label, params, call in case_calls(case, context):
+            try:
+                timing = time_call(target, call, warmup, repeat)
+                explained = explain_call(target, call, nested)
+            except RuntimeError as e:
+                errors[label] = str(e)
+                log(f"  {label}: {e}", "red")
+                if operation:
+                    operation.add_phase(label, 0, "failed")
+                continue
+            if nested and explained["statements"] is None:
+                log("auto_explain could not be loaded; only top-level plans are captured", "orange")
+                nested = False
+            entry = summarize_call(timing, explained)
+            entry.update(function=case["function"], params=params, call=call)
+            results[label] = entry
+            plans[label] = explained
+            if operation and entry["p50"] is not None:
+                operation.add_phase(label, entry["p50"] / 1000, "ok")
+            log(f"  {label}: p50 {entry['p50']:.2f} ms, p95 {entry['p95']:.2f} ms, "
+                f"{entry['rows']:,} rows, {entry['buffers']:,} buffers", "white")
+    return {"context": {**context, "anchor": context["anchor"].isoformat()}, "results": results,
+            "plans": plans, "errors": errors}
+
+
+def save_report(report, tag):
+    """Write the full report, plans included, and return its path."""
+    results_dir = get_results_dir()
+    results_dir.mkdir(parents=True, exist_ok=True)
+    path = results_dir / f"{datetime.now():%Y%m%d-%H%M%S}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', tag)}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    return path
+
+
+def report_lines(report, findings, changed_files):
+    """Render the results and the comparison with the previous run as (text, color) lines."""
+    lines = []
+    function = None
+    for entry in report["results"].values():
+        if entry["function"] != function:
+            function = entry["function"]
+            lines.append((f"{function:<52} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'rows':>6} {'buffers':>8}", "cyan"))
+        params = " ".join(f"{name}={value}" for name, value in entry["params"].items()) or "-"
+        lines.append((f"  {params[:50]:<50} {entry['p50']:>8.2f} {entry['p95']:>8.2f} {entry['p99']:>8.2f} "
+                      f"{entry['rows']:>6,} {entry['buffers']:>8,}", "white"))
+    if changed_files:
+        lines.append((f"Function files changed since the previous run: {', '.join(changed_files)}", "cyan"))
+    regressions = [finding for finding in findings if finding[1] == "regression"]
+    for label, kind, message in findings:
+        color = {"regression": "orange", "improvement": "green"}.get(kind, "yellow")
+        lines.append((f"{kind.upper()}: {label}: {message}", color))
+    if report["errors"]:
+        lines.append((f"{len(report['errors'])} calls failed", "red"))
+    elif not regressions:
+        lines.append(("No regressions", "green"))
+    return lines
+
+
+def default_tag(scale=None, seed=DEFAULT_SEED):
+    """The tag of a run: the scale and seed of its generated data, or "current" for the data as it is."""
+    return f"scale {scale:g} seed {seed}" if scale else "current"
+
+
+def benchmark_and_compare(target, tag, cases=None, functions=None, warmup=WARMUP, repeat=REPEAT, nested=True,
+                          threshold=THRESHOLD, baseline=None, install=False, scale=None, seed=DEFAULT_SEED, log=None):
+    """
+    Run the suite, record it and compare it with the previous run.
+    
+    Args:
+        target (dict): container, database and user; skip_triggers is used when generating data.
+        tag (str): Runs are compared with the previous successful run of the same tag.
+        cases (list, optional): Cases to run; DEFAULT_CASES by default.
+        functions (list, optional): Only run the cases of these functions.
+        warmup (int): Unmeasured runs before each call's timed runs.
+        repeat (int): Timed runs per call.
+        nested (bool): Capture the plans inside the functions.
+        threshold (float): Relative change that is flagged.
+        baseline (str, optional): A saved report to compare with instead of the previous run.
+        install (bool): Load the function files of the working copy first.
+        scale (float, optional): Replace the data with a synthetic dataset of this scale first.
+        seed (int): Random seed of the synthetic dataset.
+        log (callable, optional): log(message, color) for progress.
+    
+    Returns:
+        tuple: (report, findings)
+    """
+    log = log or (lambda message, color="white": print(message))
+    cases = cases or DEFAULT_CASES
+    hashes = file_hashes(cases)
+    with record_operation("sql-bench", tag, database=target["database"], repeat=repeat) as operation:
+        if scale:
+            log(f"Generating a dataset at scale {scale:g} with seed {seed}...", "cyan")
+            with operation.phase("generate"):
+                generated = generate_dataset(DatasetPlan(load_schema(), seed_files(), scale=scale, seed=seed), target,
+                                             log=log)
+            if generated["errors"]:
+                operation.finish("failed")
+                raise RuntimeError("Could not generate the dataset")
+        if install:
+            with operation.phase("install"):
+                install_functions(target, cases, log=log)
+        
+        report = run_benchmark(target, cases, functions, warmup, repeat, nested, log, operation)
+        report.update(tag=tag, files=hashes, scale=scale, seed=seed if scale else None)
+        path = save_report(report, tag)
+        
+        if baseline:
+            with open(baseline, encoding="utf-8") as f:
+                previous = json.load(f)
+        else:
+            previous = latest_details("sql-bench", tag) or {}
+        findings = compare_results(report["results"], previous.get("results", {}), threshold)
+        changed_files = sorted(file for file, digest in hashes.items()
+                               if previous.get("files", {}).get(file) not in (None, digest))
+        
+        # Plans stay in the report file; the history keeps what the next comparison needs
+        operation.details.update(
+            report=str(path), files=hashes, scale=scale, seed=report["seed"], context=report["context"],
+            results={label: {key: entry[key] for key in ("p50", "p95", "p99", "rows", "buffers", "shape")}
+                     for label, entry in report["results"].items()},
+            regressions=sum(1 for finding in findings if finding[1] == "regression"),
+        )
+        operation.finish("failed" if report["errors"] else "ok")
+    
+    for line, color in report_lines(report, findings, changed_files):
+        log(line, color)
+    log(f"Report with plans: {path}", "cyan")
+    if not previous:
+        log(f"No previous run tagged '{tag}' to compare with", "white")
+    return report, findings
+
+
+def run_sql_benchmark(app, database, functions, repeat, scale, install, tag):
+    """Benchmark the functions in a local database, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    app.log_local_message(f"\n---- BENCHMARKING SQL FUNCTIONS ({target['database']}) ----", "yellow")
+    try:
+        benchmark_and_compare(target, tag or default_tag(scale), functions=functions,
+                              repeat=repeat, install=install, scale=scale, log=app.log_local_message)
+    except (OSError, ValueError, RuntimeError) as e:
+        app.log_local_message(f"Error: {e}", "red")
+
+
+def open_sql_benchmark_dialog(app):
+    """Ask for the benchmark options and run the suite in the background."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Benchmark SQL Functions")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    database = tk.StringVar(value="main")
+    repeat = tk.IntVar(value=REPEAT)
+    scale = tk.StringVar(value="")
+    install = tk.BooleanVar(value=True)
+    tag = tk.StringVar(value="")
+    selected = {case["function"]: tk.BooleanVar(value=True) for case in DEFAULT_CASES}
+    
+    ttk.Label(frame, text="Database:").grid(row=0, column=0, sticky=tk.W, pady=3)
+    database_frame = ttk.Frame(frame)
+    database_frame.grid(row=0, column=1, sticky=tk.W)
+    ttk.Radiobutton(database_frame, text="Main", variable=database, value="main").pack(side=tk.LEFT)
+    ttk.Radiobutton(database_frame, text="Simulation", variable=database, value="sim").pack(side=tk.LEFT, padx=10)
+    
+    functions_frame = ttk.LabelFrame(frame, text="Functions", padding="5")
+    functions_frame.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+    for function, variable in selected.items():
+        ttk.Checkbutton(functions_frame, text=function, variable=variable).pack(anchor=tk.W)
+    
+    ttk.Label(frame, text="Timed runs per call:").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(frame, from_=1, to=1000, textvariable=repeat, width=8).grid(row=2, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Generate data at scale (optional):").grid(row=3, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=scale, width=10).grid(row=3, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Tag (optional):").grid(row=4, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=tag, width=20).grid(row=4, column=1, sticky=tk.W)
+    ttk.Checkbutton(frame, text="Install the function files of the working copy first", variable=install).grid(
+        row=5, column=0, columnspan=2, sticky=tk.W, pady=3)
+    
+    def start():
+        try:
+            functions = [function for function, variable in selected.items() if variable.get()]
+            scale_value = float(scale.get()) if scale.get().strip() else None
+            args = (app, database.get(), functions, repeat.get(), scale_value, install.get(), tag.get().strip())
+        except (tk.TclError, ValueError) as e:
+            messagebox.showerror("Input Error", str(e), parent=dialog)
+            return
+        if not functions:
+            messagebox.showerror("Input Error", "Select at least one function", parent=dialog)
+            return
+        if scale_value and not messagebox.askyesno(
+                "Confirm", "Generating data replaces the data in the database. Continue?", parent=dialog):
+            return
+        dialog.destroy()
+        threading.Thread(target=run_sql_benchmark, args=args, daemon=True).start()
+    
+    ttk.Button(frame, text="Run", command=start).grid(row=6, column=0, columnspan=2, pady=10)
+
+
+def main(argv=None):
+    """Benchmark the stored functions from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark the stored functions in server/sql")
+    parser.add_argument('--container', required=True, help='Database container')
+    parser.add_argument('--database', default="my_db", help='Database name')
+    parser.add_argument('--user', default="user", help='Database user')
+    parser.add_argument('--function', action='append', dest='functions', help='Only benchmark this function (repeatable)')
+    parser.add_argument('--cases', help='JSON file of cases to run instead of the built-in ones')
+    parser.add_argument('--warmup', type=int, default=WARMUP, help='Unmeasured runs per call')
+    parser.add_argument('--repeat', type=int, default=REPEAT, help='Timed runs per call')
+    parser.add_argument('--no-nested', action='store_true', help='Do not capture the plans inside the functions')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='Relative change that is flagged (0.2 = 20%%)')
+    parser.add_argument('--tag', help='Compare with the previous run of this tag (default: "scale N seed S" or "current")')
+    parser.add_argument('--baseline', help='Compare with this saved report instead')
+    parser.add_argument('--install', action='store_true', help='Load the function files of the working copy first')
+    parser.add_argument('--scale', type=float, help='Replace the data with a synthetic dataset of this scale first')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed of the synthetic dataset')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with 1 when a call regressed')
+    args = parser.parse_args(argv)
+    
+    target = {"container": args.container, "database": args.database, "user": args.user, "skip_triggers": True}
+    tag = args.tag or default_tag(args.scale, args.seed)
+    try:
+        cases = load_cases(args.cases) if args.cases else None
+        report, findings = benchmark_and_compare(target, tag, cases, args.functions, args.warmup, args.repeat,
+                                                 not args.no_nested, args.threshold, args.baseline,
+                                                 args.install, args.scale, args.seed)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if report["errors"]:
+        return 1
+    if args.fail_on_regression and any(kind == "regression" for _, kind, _ in findings):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Content-addressed store for side-by-side installed versions of CLEO SPA.
+
+File contents live once under ~/.cleo-spa/store/objects, named by their sha256.
+Each installed version under ~/.cleo-spa/versions/<version> is a tree of hard
+links into the store, so several releases can be kept installed while only the
+files that differ between them take extra disk space. Stored objects are
+read-only and keep the source's executable bit; files the setup tool or npm
+rewrite are copied into each version instead.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+from .utils.locations import CONFIG_PATH, read_install_config, clear_location_cache
+
+CLEO_HOME = Path.home() / ".cleo-spa"
+STORE_DIR = CLEO_HOME / "store" / "objects"
+VERSIONS_DIR = CLEO_HOME / "versions"
+
+# Files the setup tool or npm rewrite in place; these are copied instead of linked
+# so editing them in one version can never change the stored object.
+MUTABLE_PATTERNS = [
+    "compose.yml", ".env*", "*.tfvars", "*.tfstate*", ".aws_credentials.env", "package.json", "package-lock.json",
+]
+
+_READ_ONLY = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+_EXECUTABLE = stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+
+
+def read_config():
+    """Read ~/.cleo-spa/config.json, returning an empty dict if missing or invalid."""
+    # Return a copy so callers can modify it before writing it back
+    return json.loads(json.dumps(read_install_config()))
+
+
+def write_config(config):
+    """Write ~/.cleo-spa/config.json."""
+    CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(CONFIG_PATH, 'w') as f:
+        json.dump(config, f, indent=2)
+    clear_location_cache()
+
+
+def is_mutable(rel_path):
+    """Check if a project file is rewritten by the setup tool."""
+    name = Path(rel_path).name
+    return any(fnmatch.fnmatch(name, pattern) for pattern in MUTABLE_PATTERNS)
+
+
+def _hash_file(path):
+    """Return the sha256 hex digest of a file."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_executable(path):
+    """Check if a file has its owner's executable bit set."""
+    return bool(os.stat(path).st_mode & stat.S_IXUSR)
+
+
+def object_path(digest, executable=False):
+    """Return the path of a stored object; executable files are stored apart from the others."""
+    return STORE_DIR / digest[:2] / (digest[2:] + ("-x" if executable else ""))
+
+
+def store_file(source, digest=None):
+    """
+    Add a file to the store if its content is not already there.
+
+    Args:
+        source (Path): The file to store.
+        digest (str, optional): Known sha256 of the file, saves hashing it again.
+
+    Returns:
+        Path: The path of the stored object
+    """
+    digest = digest or _hash_file(source)
+    executable = _is_executable(source)
+    target = object_path(digest, executable)
+    if target.exists():
+        return target
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    # Copy to a temporary name first so a partial copy is never visible
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_name)
+        os.chmod(tmp_name, _READ_ONLY | (_EXECUTABLE if executable else 0))
+        os.replace(tmp_name, target)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+    return target
+
+
+def _link_or_copy(stored, target):
+    """Hard link a stored object into a version tree, copying if links are unsupported."""
+    try:
+        os.link(stored, target)
+    except OSError:
+        shutil.copy(stored, target)
+
+
+def _remove_tree(path):
+    """Remove a version tree, including read-only linked files."""
+    def make_writable_and_retry(func, failed_path, _exc):
+        os.chmod(failed_path, stat.S_IWRITE | stat.S_IREAD)
+        func(failed_path)
+    # onerror is deprecated from Python 3.12 in favour of onexc; the handler fits both
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=make_writable_and_retry)
+    else:
+        shutil.rmtree(path, onerror=make_writable_and_retry)
+
+
+def install_version(files, version, progress=None):
+    """
+    Install a version as a tree of links into the content-addressed store.
+
+    Args:
+        files (iterable): Pairs of (relative path, source file path).
+        version (str): The version being installed.
+        progress (callable, optional): Called with a status message.
+
+    Returns:
+        Path: The installed version directory
+    """
+    version_dir = VERSIONS_DIR / version
+    staging_dir = VERSIONS_DIR / f".{version}.staging"
+    if staging_dir.exists():
+        _remove_tree(staging_dir)
+    staging_dir.mkdir(parents=True)
+
+    new_objects = 0
+    linked = 0
+    for rel_path, source in files:
+        target = staging_dir / rel_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if is_mutable(rel_path):
+            shutil.copy2(source, target)
+            os.chmod(target, stat.S_IMODE(os.stat(target).st_mode) | stat.S_IWUSR)
+            continue
+        digest = _hash_file(source)
+        if not object_path(digest, _is_executable(source)).exists():
+            new_objects += 1
+        _link_or_copy(store_file(source, digest), target)
+        linked += 1
+
+    # Swap the new tree in only once it is complete
+    if version_dir.exists():
+        _remove_tree(version_dir)
+    os.replace(staging_dir, version_dir)
+
+    if progress:
+        progress(f"Installed version {version}: {linked} files linked, {new_objects} new in store")
+
+    return version_dir
+
+
+def register_version(version, version_dir, activate=True):
+    """
+    Record an installed version in the config, optionally making it active.
+
+    The active version's path is also written to installation_path so code that
+    only knows about a single installation keeps working.
+    """
+    config = read_config()
+    versions = config.setdefault("versions", {})
+    versions[version] = {
+        "path": str(version_dir),
+        "installed_at": datetime.now().isoformat(timespec="seconds")
+    }
+    if activate or "active_version" not in config:
+        config["active_version"] = version
+        config["installation_path"] = str(version_dir)
+        config["version"] = version
+    config["setup_completed"] = True
+    write_config(config)
+    return config
+
+
+def list_versions():
+    """
+    List installed versions.
+
+    Returns:
+        tuple: (dict of version -> info, active version or None)
+    """
+    config = read_config()
+    return config.get("versions", {}), config.get("active_version")
+
+
+def set_active_version(version):
+    """
+    Switch the active version.
+
+    Args:
+        version (str): An installed version.
+
+    Returns:
+        Path: The now active installation path
+    """
+    config = read_config()
+    versions = config.get("versions", {})
+    if version not in versions:
+        raise ValueError(f"Version {version} is not installed. Installed: {', '.join(sorted(versions)) or 'none'}")
+    version_dir = Path(versions[version]["path"])
+    config["active_version"] = version
+    config["installation_path"] = str(version_dir)
+    config["version"] = version
+    write_config(config)
+    return version_dir
+
+
+def remove_version(version):
+    """Remove an installed version and drop objects no longer linked from any version."""
+    config = read_config()
+    versions = config.get("versions", {})
+    if version == config.get("active_version"):
+        raise ValueError("Cannot remove the active version. Switch to another version first.")
+    info = versions.pop(version, None)
+    if info and Path(info["path"]).exists():
+        _remove_tree(info["path"])
+    write_config(config)
+    return collect_garbage()
+
+
+def collect_garbage():
+    """
+    Delete stored objects that no version links to any more.
+
+    Returns:
+        int: Number of objects removed
+    """
+    removed = 0
+    if not STORE_DIR.exists():
+        return removed
+    for stored in STORE_DIR.glob("*/*"):
+        # An object with a single link is only referenced by the store itself
+        if stored.is_file() and stored.stat().st_nlink <= 1:
+            os.chmod(stored, stat.S_IWRITE | stat.S_IREAD)
+            stored.unlink()
+            removed += 1
+    return removed
@@ -8,6 +8,7 @@ import os
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 import sys
+import threading
 
 # Make sure we have jwt and requests modules
 try:
@@ -21,6 +22,8 @@ except ImportError:
     import requests
 
 from .utils import log_message
+from .history import record_operation
+from .provisioning import setup_bulk_provisioning_section
 
 def setup_super_admin_tab(parent, app):
     """Setup the super admin tab in the notebook."""
@@ -51,6 +54,12 @@ def setup_super_admin_tab(parent, app):
     url_entry = ttk.Entry(url_frame, textvariable=server_url, width=50)
     url_entry.grid(row=0, column=1, sticky=tk.W, pady=5)
     
+    ttk.Button(
+        url_frame,
+        text="Use Deployed Server",
+        command=lambda: use_deployed_server(app, server_url)
+    ).grid(row=0, column=2, sticky=tk.W, pady=5, padx=(10, 0))
+    
     # JWT Secret
     jwt_frame = ttk.Frame(config_frame)
     jwt_frame.pack(fill=tk.X, pady=5, padx=10)
@@ -114,6 +123,9 @@ def setup_super_admin_tab(parent, app):
     )
     submit_button.pack(pady=10)
     
+    # Bulk provisioning of further accounts
+    setup_bulk_provisioning_section(frame, app, server_url)
+    
     # Console output
     console_frame = ttk.LabelFrame(frame, text="Super Admin Setup Console")
     console_frame.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -138,8 +150,40 @@ def setup_super_admin_tab(parent, app):
     # Initial log message
     app.log_su_message("Super Admin setup ready. Enter credentials and server information.", "orange")
 
+def use_deployed_server(app, server_url):
+    """Point the server URL at the AWS deployment recorded in the Terraform state."""
+    # A remote backend runs terraform in Docker, so the outputs are read off the UI thread
+    threading.Thread(target=_read_deployed_server, args=(app, server_url), daemon=True).start()
+
+def _read_deployed_server(app, server_url):
+    """Read the Terraform outputs and hand the server address back to the UI thread."""
+    from .aws_deployment import get_terraform_outputs
+    
+    try:
+        outputs = get_terraform_outputs() or {}
+    except (OSError, ValueError) as e:
+        app.root.after(0, app.log_su_message, f"Error reading the deployment outputs: {e}", "red")
+        return
+    public_dns = outputs.get('app_instance_public_dns', {}).get('value')
+    app.root.after(0, _set_deployed_server, app, server_url, public_dns)
+
+def _set_deployed_server(app, server_url, public_dns):
+    """Set the server URL from the deployed server address, on the UI thread."""
+    if not public_dns:
+        app.log_su_message("No deployed server found. Apply the AWS deployment first.", "red")
+        return
+    # The backend is reached on its own port; nginx on port 80 strips the /api prefix the routes are mounted under
+    server_url.set(f"http://{public_dns}:3000/api/auth/initsu")
+    app.log_su_message(f"Using deployed server: {public_dns}", "cyan")
+
 def generate_and_send_jwt(app, request_url, jwt_secret_key, email, password):
     """Generate JWT token and send request to create super admin."""
+    with record_operation("super_admin", "create", url=request_url) as operation:
+        status_code = _generate_and_send_jwt(app, request_url, jwt_secret_key, email, password)
+        operation.finish("ok" if status_code == 201 else "failed", status_code)
+
+def _generate_and_send_jwt(app, request_url, jwt_secret_key, email, password):
+    """Send the super admin request, returning the response status code or None if it was not sent."""
     jwt_algorithm = "HS256"  # Default algorithm
     
     app.su_console.config(state=tk.NORMAL)
@@ -218,6 +262,7 @@ def generate_and_send_jwt(app, request_url, jwt_secret_key, email, password):
                     "Request Failed",
                     f"Status Code: {response.status_code}\nResponse: {response.text}",
                 )
+        return response.status_code
     
     except jwt.ExpiredSignatureError:
         app.log_su_message("JWT Error: Token has expired.", "red")
@@ -0,0 +1,816 @@
+"""
+Synthetic data generation at production scale.
+
+Builds datasets shaped like the seed CSVs: every column is generated from the
+values, ranges and null rates seen in the seeds, and every foreign key in
+schema.sql points at a row that exists. Reference tables (employees,
+services, payment methods and the like) are loaded from the seeds as they
+are, unless a seed leaves a NOT NULL column empty, in which case as many
+rows are generated from it; the other seeded tables are scaled up.
+
+Rows are generated in fixed-size shards, each from its own random generator
+derived from the seed, table and shard number, so a dataset is identical for
+the same seed however many worker processes produce it. Each worker streams
+its shard straight into COPY through psql in the database container, or
+writes it to a file in COPY text format.
+
+Command line:
+    
+    python -m cleo_setup.synthetic_data --container cleo-db-1 \\
+        --rows members=1000000 --rows sale_transactions=10000000 --scale 1000 --seed 42
+"""
+import argparse
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from .history import record_operation
+from .schema import load_schema
+from .seeds import seed_files, read_seed_rows, merged_seed_rows
+from .utils import log_message
+from .utils.psql import copy_command, local_target, normalize_timestamp, psql, setval_statements, upsert_command
+
+# Seeded tables loaded as they are instead of scaled
+REFERENCE_TABLES = {
+    "care_package_item_details", "care_packages", "employee_to_position", "employees", "membership_types",
+    "payment_methods", "positions", "service_categories", "services", "statuses", "timetables",
+    "voucher_template_details", "voucher_templates",
+}
+
+# Tables never touched, so logins and configuration survive a load
+EXCLUDED_TABLES = {"roles", "user_auth", "users", "user_to_role", "settings", "system_parameters", "translations", "sessions"}
+
+# Columns generated as an offset after another column of the same row
+DERIVED_AFTER = {
+    "updated_at": "created_at",
+    "end_time": "start_time",
+    "end_date": "start_date",
+    "effective_enddate": "effective_startdate",
+}
+
+SHARD_ROWS = 50000
+BATCH_ROWS = 5000
+CATEGORY_LIMIT = 12
+# Seed the dialog and the benchmarks generate with, so their datasets match
+DEFAULT_SEED = 42
+TIME_TYPES = {"timestamptz", "timestamp", "date"}
+
+
+def _parse_time(value):
+    """Parse a seed timestamp or date into epoch seconds, or None."""
+    value = normalize_timestamp(value)
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        for pattern in ("%m/%d/%Y", "%d/%m/%Y", "%m/%d/%Y %H:%M", "%Y/%m/%d"):
+            try:
+                parsed = datetime.strptime(value, pattern)
+                break
+            except ValueError:
+                continue
+        else:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _parse_value(value, base_type):
+    """Parse a seed value for a column type, or return None if it does not fit."""
+    try:
+        if base_type == "integer":
+            number = float(value)
+            return int(number) if number.is_integer() else None
+        if base_type in ("decimal", "float"):
+            return float(value)
+        if base_type == "boolean":
+            lowered = value.strip().lower()
+            return {"true": True, "t": True, "1": True, "yes": True,
+                    "false": False, "f": False, "0": False, "no": False}.get(lowered)
+        if base_type in TIME_TYPES:
+            return _parse_time(value)
+    except ValueError:
+        return None
+    return value
+
+
+def copy_escape(value):
+    """Escape a text value for COPY text format."""
+    return value.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _to_base36(number):
+    """Encode a non-negative integer in base 36, for short unique suffixes."""
+    digits = "0123456789abcdefghijklmnopqrstuvwxyz"
+    text = ""
+    while True:
+        number, remainder = divmod(number, 36)
+        text = digits[remainder] + text
+        if not number:
+            return text
+
+
+def profile_column(column, values, table, is_fk, time_span=365 * 86400, anchor=None):
+    """
+    Describe how to generate a column from its seed values.
+    
+    Args:
+        column (Column): The schema column.
+        values (list): The column's raw seed values, empty strings included.
+        table (Table): The column's table.
+        is_fk (bool): Whether the column is a foreign key.
+        time_span (float): Minimum span of generated timestamps in seconds.
+        anchor (float, optional): Latest timestamp for columns without seed values.
+    
+    Returns:
+        dict: A picklable column spec with a "kind"
+    """
+    base_type = column.base_type
+    present = [value for value in values if value.strip()]
+    null_fraction = 0.0
+    if column.nullable:
+        null_fraction = 1 - len(present) / len(values) if values else (0.5 if is_fk else 0.1)
+    spec = {"name": column.name, "type": base_type, "null": null_fraction, "span": time_span, "anchor": anchor,
+            "length": column.length if base_type == "text" else None, "scale": column.scale}
+    
+    if column.serial and column.name in table.primary_key:
+        return dict(spec, kind="serial", null=0.0)
+    if is_fk:
+        return dict(spec, kind="fk")
+    
+    parsed = [p for p in (_parse_value(value, base_type) for value in present) if p is not None]
+    unique = column.name in table.unique_columns()
+    
+    if base_type == "enum":
+        labels = [value for value in parsed if value in column.enum_values] or column.enum_values
+        return dict(spec, kind="choice", values=[copy_escape(v) for v in labels], weights=None)
+    if base_type == "boolean":
+        share = sum(parsed) / len(parsed) if parsed else 0.5
+        return dict(spec, kind="bool", p_true=share)
+    if not parsed:
+        return dict(spec, kind="fallback", unique=unique)
+    
+    distinct = sorted(set(parsed), key=str)
+    if not unique and len(distinct) <= CATEGORY_LIMIT and (len(distinct) <= 3 or len(parsed) >= 2 * len(distinct)):
+        counts = {value: 0 for value in distinct}
+        for value in parsed:
+            counts[value] += 1
+        return dict(spec, kind="choice", values=[_format_value(v, spec) for v in distinct],
+                    weights=[counts[v] for v in distinct])
+    if base_type in ("integer", "decimal", "float"):
+        return dict(spec, kind="number", low=min(parsed), high=max(parsed), unique=unique)
+    if base_type in TIME_TYPES:
+        low, high = min(parsed), max(parsed)
+        return dict(spec, kind="time", low=min(low, high - time_span), high=high)
+    return dict(spec, kind="sample", values=[copy_escape(v) for v in distinct[:1000]], unique=unique)
+
+
+def _format_value(value, spec):
+    """Format a generated value as COPY text for its column."""
+    base_type = spec["type"]
+    if base_type == "integer":
+        return str(int(value))
+    if base_type in ("decimal", "float"):
+        return f"{value:.{spec['scale'] if spec.get('scale') is not None else 2}f}"
+    if base_type == "boolean":
+        return "t" if value else "f"
+    if base_type in TIME_TYPES:
+        parts = time.gmtime(value)
+        if base_type == "date":
+            return time.strftime("%Y-%m-%d", parts)
+        return time.strftime("%Y-%m-%d %H:%M:%S", parts) + ("+00" if base_type == "timestamptz" else "")
+    text = copy_escape(str(value))
+    return text[:spec["length"]] if spec.get("length") else text
+
+
+def reference_columns(table, rows):
+    """
+    Pick the columns to COPY seed rows into, leaving out the columns the
+    seed lacks that have a default or are serial, so the default applies.
+    
+    Args:
+        table (Table): The schema table.
+        rows (list): Seed rows as dicts.
+    
+    Returns:
+        tuple: (columns, problems), problems describing each NOT NULL column the rows leave empty
+    """
+    header = set().union(*(row.keys() for row in rows))
+    columns = []
+    problems = []
+    for column in table.columns.values():
+        if column.name not in header and (column.default is not None or column.serial):
+            continue
+        columns.append(column.name)
+        if not column.nullable:
+            empty = sum(1 for row in rows if not (row.get(column.name) or "").strip())
+            if empty:
+                problems.append(f"{column.name} ({empty} of {len(rows)} rows"
+                                f"{', not in the seed' if column.name not in header else ''})")
+    return columns, problems
+
+
+def kept_tables(schema, tables):
+    """
+    Find the tables that excluded tables reference, directly or through
+    other tables, such as statuses for users. Truncating them would cascade
+    into the logins, so loads merge them on their primary key instead.
+    
+    Args:
+        schema (Schema): The parsed schema.sql.
+        tables (list): The tables being loaded.
+    
+    Returns:
+        list: Table names, in the given order
+    """
+    return [name for name in tables if schema.tables[name].primary_key
+            and set(schema.cascaded_tables([name])) & EXCLUDED_TABLES]
+
+
+def load_effects(schema, tables):
+    """
+    Describe what loading tables into a database does beyond replacing their data.
+    
+    Returns:
+        list: Lines naming the merged and the cascaded tables; empty when there are none
+    """
+    lines = []
+    kept = kept_tables(schema, tables)
+    if kept:
+        lines.append(f"Merged on their primary key, since logins reference them: {', '.join(kept)}")
+    cascaded = schema.cascaded_tables([name for name in tables if name not in kept])
+    if cascaded:
+        lines.append(f"Also emptied by TRUNCATE ... CASCADE: {', '.join(cascaded)}")
+    return lines
+
+
+def latest_seed_time(schema, seeds):
+    """Find the latest timestamp in the seeds, the anchor for columns the seeds do not cover."""
+    latest = None
+    for name, files in seeds.items():
+        table = schema.tables.get(name)
+        if not table:
+            continue
+        time_columns = [column.name for column in table.columns.values() if column.base_type in TIME_TYPES]
+        for row in read_seed_rows([path for paths in files.values() for path in paths]):
+            for column in time_columns:
+                value = _parse_time(row[column]) if row.get(column, "").strip() else None
+                if value is not None and (latest is None or value > latest):
+                    latest = value
+    return latest if latest is not None else datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+
+
+class DatasetPlan:
+    """
+    What to load into each table, and how to generate it.
+    
+    Args:
+        schema (Schema): The parsed schema.sql.
+        seeds (dict): Seed files per table, as from seed_files.
+        scale (float): Multiplier on the seed row count of scaled tables.
+        rows (dict, optional): Explicit row counts per table; also adds unseeded tables.
+        seed (int): Random seed; the same seed gives the same dataset.
+        time_span_days (int): Minimum span of generated timestamps, ending at the latest seed value.
+    """
+    
+    def __init__(self, schema, seeds, scale=1.0, rows=None, seed=DEFAULT_SEED, time_span_days=365):
+        self.schema = schema
+        self.time_span = time_span_days * 86400
+        self.anchor = latest_seed_time(schema, seeds)
+        self.seed = seed
+        self.reference_rows = {}
+        self.reference_columns = {}
+        self.generated_references = {}
+        self.counts = {}
+        self.specs = {}
+        rows = dict(rows or {})
+        
+        unknown = set(rows) - set(schema.tables)
+        if unknown:
+            raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}")
+        excluded = set(rows) & EXCLUDED_TABLES
+        if excluded:
+            raise ValueError(f"These tables are never generated: {', '.join(sorted(excluded))}")
+        
+        for name, files in seeds.items():
+            if name not in schema.tables or name in EXCLUDED_TABLES:
+                continue
+            if name in REFERENCE_TABLES and name not in rows:
+                seed_rows = self._number_rows(name, merged_seed_rows(files))
+                columns, problems = reference_columns(schema.tables[name], seed_rows)
+                if problems:
+                    # The seed cannot be loaded as it is, so as many rows are generated from it instead
+                    self.generated_references[name] = problems
+                    self.counts[name] = len(seed_rows)
+                    continue
+                self.reference_rows[name] = seed_rows
+                self.reference_columns[name] = columns
+                self.counts[name] = len(seed_rows)
+            else:
+                seed_count = len(merged_seed_rows(files))
+                self.counts[name] = rows.get(name, max(1, round(seed_count * scale)) if seed_count else 0)
+        for name, count in rows.items():
+            self.counts[name] = count
+        
+        self.order = schema.dependency_order([name for name, count in self.counts.items() if count])
+        for name in self.order:
+            if name not in self.reference_rows:
+                self.specs[name] = self._table_specs(name, seeds.get(name, {}))
+    
+    def notes(self):
+        """Describe the reference tables generated because their seed leaves NOT NULL columns empty."""
+        return [f"{name} is generated: its seed leaves NOT NULL columns empty: {', '.join(problems)}"
+                for name, problems in sorted(self.generated_references.items())]
+    
+    def _number_rows(self, name, rows):
+        """Give reference rows without an id the next free ids, as the serial column would when seeding."""
+        id_column = self.schema.tables[name].columns.get("id")
+        if id_column is None or not id_column.serial:
+            return rows
+        taken = [int(float(row["id"])) for row in rows if row.get("id", "").strip()]
+        next_id = max(taken, default=0) + 1
+        numbered = []
+        for row in rows:
+            if not row.get("id", "").strip():
+                row = dict(row, id=str(next_id))
+                next_id += 1
+            numbered.append(row)
+        return numbered
+    
+    def _table_specs(self, name, files):
+        """Profile a generated table's columns from all of its seed rows."""
+        table = self.schema.tables[name]
+        seed_rows = list(read_seed_rows([path for paths in files.values() for path in paths]))
+        fk_columns = {fk.columns[0]: fk for fk in table.foreign_keys if len(fk.columns) == 1}
+        specs = []
+        for column in table.columns.values():
+            values = [row[column.name] for row in seed_rows if column.name in row]
+            spec = profile_column(column, values, table, column.name in fk_columns, self.time_span, self.anchor)
+            if spec["kind"] == "fk":
+                spec.update(self._parent_pool(table, column, fk_columns[column.name]))
+            specs.append(spec)
+        return specs
+    
+    def _parent_pool(self, table, column, fk):
+        """Describe the ids a foreign key column can point at."""
+        if fk.ref_table == table.name:
+            return {"pool": "self"}
+        if fk.ref_table in self.reference_rows:
+            ids = sorted({int(float(row["id"])) for row in self.reference_rows[fk.ref_table] if row.get("id", "").strip()})
+            if ids:
+                return {"pool": "list", "ids": ids}
+        elif self.counts.get(fk.ref_table):
+            return {"pool": "range", "low": 1, "high": self.counts[fk.ref_table]}
+        if not column.nullable:
+            raise ValueError(
+                f"{table.name}.{column.name} needs rows in {fk.ref_table}; add --rows {fk.ref_table}=N"
+            )
+        return {"pool": "none", "null": 1.0}
+    
+    def kept_tables(self):
+        """Tables of the dataset merged on their primary key instead of truncated; see kept_tables."""
+        return kept_tables(self.schema, self.order)
+    
+    def truncated_tables(self):
+        """Tables of the dataset that are emptied before loading."""
+        kept = set(self.kept_tables())
+        return [name for name in self.order if name not in kept]
+    
+    def cascaded_tables(self):
+        """Tables outside the dataset that TRUNCATE ... CASCADE also empties."""
+        return self.schema.cascaded_tables(self.truncated_tables())
+    
+    def tasks(self, shard_rows=SHARD_ROWS):
+        """
+        Split the dataset into shards.
+        
+        Returns:
+            list: Task dicts, parents before children
+        """
+        tasks = []
+        kept = set(self.kept_tables())
+        for name in self.order:
+            columns = self.schema.tables[name].column_names()
+            upsert = {"upsert": self.schema.tables[name].primary_key} if name in kept else {}
+            if name in self.reference_rows:
+                tasks.append(dict({"table": name, "shard": 0, "columns": self.reference_columns[name],
+                                   "reference": self.reference_rows[name],
+                                   "start": 1, "end": len(self.reference_rows[name])}, **upsert))
+                continue
+            count = self.counts[name]
+            for shard in range(math.ceil(count / shard_rows)):
+                tasks.append(dict({
+                    "table": name, "shard": shard, "columns": columns, "specs": self.specs[name], "seed": self.seed,
+                    "start": shard * shard_rows + 1, "end": min(count, (shard + 1) * shard_rows)
+                }, **upsert))
+        return tasks
+
+
+def _reference_lines(task):
+    """Format reference seed rows as COPY text; blanks and unknown columns become NULL."""
+    for row in task["reference"]:
+        values = []
+        for column in task["columns"]:
+            value = row.get(column, "")
+            values.append(copy_escape(value) if value.strip() else "\\N")
+        yield "\t".join(values) + "\n"
+
+
+def _generated_lines(task):
+    """Generate a shard's rows as COPY text."""
+    rng = random.Random(f"{task['seed']}:{task['table']}:{task['shard']}")
+    specs = task["specs"]
+    names = [spec["name"] for spec in specs]
+    derived = {name: DERIVED_AFTER[name] for name in names if DERIVED_AFTER.get(name) in names}
+    
+    for row_id in range(task["start"], task["end"] + 1):
+        raw = {}
+        values = []
+        for spec in specs:
+            name = spec["name"]
+            kind = spec["kind"]
+            if kind == "serial":
+                values.append(str(row_id))
+                continue
+            if spec["null"] and rng.random() < spec["null"]:
+                values.append("\\N")
+                continue
+            if name in derived and derived[name] in raw:
+                value = raw[derived[name]] + rng.uniform(0, 3 * 3600 if name == "end_time" else 30 * 86400)
+                raw[name] = value
+                values.append(_format_value(value, spec))
+                continue
+            if kind == "fk":
+                pool = spec["pool"]
+                if pool == "range":
+                    values.append(str(rng.randint(spec["low"], spec["high"])))
+                elif pool == "list":
+                    values.append(str(rng.choice(spec["ids"])))
+                elif pool == "self" and row_id > 1:
+                    values.append(str(rng.randint(1, row_id - 1)))
+                else:
+                    values.append("\\N")
+            elif kind == "choice":
+                values.append(rng.choices(spec["values"], spec["weights"])[0] if spec["weights"] else rng.choice(spec["values"]))
+            elif kind == "bool":
+                values.append("t" if rng.random() < spec["p_true"] else "f")
+            elif kind == "number":
+                if spec.get("unique"):
+                    value = spec["low"] + row_id
+                elif spec["type"] == "integer":
+                    value = rng.randint(int(spec["low"]), int(spec["high"]))
+                else:
+                    value = rng.uniform(spec["low"], spec["high"])
+                values.append(_format_value(value, spec))
+            elif kind == "time":
+                value = rng.uniform(spec["low"], spec["high"])
+                raw[name] = value
+                values.append(_format_value(value, spec))
+            elif kind == "sample":
+                value = rng.choice(spec["values"])
+                if spec.get("unique"):
+                    value = _unique_text(value, row_id, spec.get("length"))
+                elif spec.get("length"):
+                    value = value[:spec["length"]]
+                values.append(value)
+            else:
+                values.append(_fallback_value(spec, rng, row_id, raw))
+        yield "\t".join(values) + "\n"
+
+
+def _unique_text(value, row_id, length):
+    """Make a sampled text value unique by suffixing the row id, keeping emails valid."""
+    suffix = _to_base36(row_id)
+    if "@" in value:
+        local, domain = value.split("@", 1)
+        value = f"{local}.{suffix}@{domain}"
+        return value if not length or len(value) <= length else f"{suffix}@{domain}"[-length:]
+    if length:
+        return value[:max(0, length - len(suffix) - 1)] + "-" + suffix if length > len(suffix) + 1 else suffix[-length:]
+    return f"{value}-{suffix}"
+
+
+def _fallback_value(spec, rng, row_id, raw):
+    """Generate a value for a column without usable seed values."""
+    base_type = spec["type"]
+    if base_type == "integer":
+        return str(row_id if spec.get("unique") else rng.randint(1, 100))
+    if base_type in ("decimal", "float"):
+        return _format_value(rng.uniform(0, 1000), spec)
+    if base_type in TIME_TYPES:
+        value = spec["anchor"] - rng.uniform(0, spec["span"])
+        raw[spec["name"]] = value
+        return _format_value(value, spec)
+    if base_type == "json":
+        return "{}"
+    if base_type == "uuid":
+        return "%032x" % rng.getrandbits(128)
+    if base_type == "text":
+        value = f"{spec['name']} {row_id if spec.get('unique') else rng.randint(1, 1000)}"
+        return value[:spec["length"]] if spec.get("length") else value
+    return "\\N"
+
+
+def run_shard(task, target):
+    """
+    Produce one shard and stream it to its target.
+    
+    Args:
+        task (dict): A task from DatasetPlan.tasks.
+        target (dict): {"container", "database", "user", "skip_triggers"} to COPY into a database,
+            or {"output": directory} to write COPY text files.
+    
+    Returns:
+        dict: table, shard, rows, bytes, seconds and error (None on success)
+    """
+    started = time.monotonic()
+    lines = _reference_lines(task) if "reference" in task else _generated_lines(task)
+    written = 0
+    rows = 0
+    error = None
+    
+    if "output" in target:
+        path = Path(target["output"]) / task["table"] / f"{task['shard']:05d}.tsv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding='utf-8', newline='') as f:
+            for line in lines:
+                f.write(line)
+                written += len(line)
+                rows += 1
+    else:
+        if "upsert" in task:
+            command = upsert_command(target, task["table"], task["columns"], task["upsert"],
+                                     target.get("skip_triggers", True))
+        else:
+            command = copy_command(target, task["table"], task["columns"], target.get("skip_triggers", True))
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+        )
+        batch = []
+        try:
+            for line in lines:
+                batch.append(line)
+                rows += 1
+                if len(batch) >= BATCH_ROWS:
+                    data = "".join(batch).encode("utf-8")
+                    process.stdin.write(data)
+                    written += len(data)
+                    batch = []
+            data = "".join(batch).encode("utf-8")
+            process.stdin.write(data)
+            written += len(data)
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        if process.wait() != 0:
+            error = stderr.strip() or f"psql exited with {process.returncode}"
+    
+    return {"table": task["table"], "shard": task["shard"], "rows": rows, "bytes": written,
+            "seconds": time.monotonic() - started, "error": error}
+
+
+def generate_dataset(plan, target, workers=None, shard_rows=SHARD_ROWS, log=None, operation=None):
+    """
+    Generate a planned dataset into a database or a directory.
+    
+    When loading into a database, the dataset's tables are truncated first
+    (with CASCADE, which also empties the tables plan.cascaded_tables() names),
+    except for plan.kept_tables(), which are merged on their primary key.
+    Sequences and statistics are updated afterwards.
+    
+    Args:
+        plan (DatasetPlan): What to generate.
+        target (dict): Where to put it, as for run_shard.
+        workers (int, optional): Worker processes; the CPU count by default.
+        shard_rows (int): Rows per shard.
+        log (callable, optional): Called with (message, color).
+        operation (Operation, optional): History operation to add per-table phases to.
+    
+    Returns:
+        dict: Rows, bytes and seconds per table, plus "errors"
+    
+    Raises:
+        RuntimeError: When the truncate would cascade into an excluded table, or psql fails.
+    """
+    log = log or (lambda message, color="white": log_message(None, message, color))
+    workers = workers or os.cpu_count() or 2
+    tasks = plan.tasks(shard_rows)
+    into_database = "output" not in target
+    tables = plan.order
+    quoted = ", ".join(f'"{name}"' for name in tables)
+    
+    for note in plan.notes():
+        log(note, "orange")
+    if into_database:
+        wiped = sorted(set(plan.cascaded_tables()) & EXCLUDED_TABLES)
+        if wiped:
+            raise RuntimeError(f"Truncating the dataset would also empty {', '.join(wiped)}; nothing was changed")
+        truncated = plan.truncated_tables()
+        if truncated:
+            log(f"Truncating {len(truncated)} tables...", "cyan")
+            psql(target, "TRUNCATE " + ", ".join(f'"{name}"' for name in truncated) + " RESTART IDENTITY CASCADE;")
+    else:
+        Path(target["output"]).mkdir(parents=True, exist_ok=True)
+    
+    summary = {name: {"rows": 0, "bytes": 0, "seconds": 0.0, "started": None} for name in tables}
+    errors = []
+    started = time.monotonic()
+    
+    # Without triggers the order does not matter, so every shard can run at once;
+    # otherwise each table is loaded only after the tables it references
+    skip_triggers = target.get("skip_triggers", True) or not into_database
+    groups = [tasks] if skip_triggers else [[task for task in tasks if task["table"] == name] for name in tables]
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for group in groups:
+            futures = [executor.submit(run_shard, task, target) for task in group]
+            for future in as_completed(futures):
+                result = future.result()
+                table = summary[result["table"]]
+                table["rows"] += result["rows"]
+                table["bytes"] += result["bytes"]
+                table["seconds"] = time.monotonic() - started
+                if result["error"]:
+                    errors.append(f"{result['table']} shard {result['shard']}: {result['error']}")
+                    log(f"  {result['table']} shard {result['shard']} failed: {result['error'][:300]}", "red")
+                    continue
+                total = plan.counts[result["table"]]
+                if table["rows"] >= total:
+                    log(f"  {result['table']}: {table['rows']:,} rows, done at {table['seconds']:.1f}s", "green")
+    
+    elapsed = time.monotonic() - started
+    if into_database and not errors:
+        log("Updating sequences and statistics...", "cyan")
+        statements = []
+        for name in tables:
+            table = plan.schema.tables[name]
+            statements += setval_statements(name, [column.name for column in table.columns.values() if column.serial])
+        statements.append(f"ANALYZE {quoted};")
+        psql(target, "\n".join(statements))
+    
+    if operation:
+        for name, table in summary.items():
+            operation.add_phase(f"{name} ({table['rows']:,} rows)", table["seconds"], "ok")
+    
+    total_rows = sum(table["rows"] for table in summary.values())
+    total_bytes = sum(table["bytes"] for table in summary.values())
+    log(f"Generated {total_rows:,} rows ({total_bytes / 1e6:,.0f} MB) in {elapsed:.1f}s with {workers} workers "
+        f"({total_rows / elapsed if elapsed else 0:,.0f} rows/s)", "green" if not errors else "orange")
+    if "output" in target:
+        with open(Path(target["output"]) / "manifest.json", "w", encoding='utf-8') as f:
+            json.dump({"seed": plan.seed, "order": tables, "counts": plan.counts,
+                       "columns": {name: plan.reference_columns.get(name) or plan.schema.tables[name].column_names()
+                                   for name in tables}}, f, indent=2)
+    return {"tables": summary, "errors": errors, "seconds": elapsed}
+
+
+def parse_row_counts(items):
+    """Parse table=count items, allowing suffixes like 10M and 500k."""
+    counts = {}
+    multipliers = {"k": 1000, "m": 1000000}
+    for item in items or []:
+        name, _, count = item.partition("=")
+        count = count.strip().lower()
+        if not name or not count:
+            raise ValueError(f"Expected table=count, got {item!r}")
+        multiplier = multipliers.get(count[-1], 1)
+        counts[name.strip()] = int(float(count.rstrip("km")) * multiplier)
+    return counts
+
+
+def run_synthetic_data(app, database, plan, scale, workers):
+    """Generate a planned dataset into a local database, logging to the local console."""
+    target = local_target(app, database)
+    if not target:
+        return
+    
+    app.log_local_message(f"\n---- GENERATING SYNTHETIC DATA ({target['database']}) ----", "yellow")
+    total = sum(plan.counts[name] for name in plan.order)
+    app.log_local_message(f"{total:,} rows across {len(plan.order)} tables, seed {plan.seed}", "cyan")
+    
+    with record_operation("synthetic-data", target["database"], scale=scale, seed=plan.seed, rows=total) as operation:
+        try:
+            result = generate_dataset(plan, target, workers, log=app.log_local_message, operation=operation)
+        except RuntimeError as e:
+            app.log_local_message(f"Error: {e}", "red")
+            operation.finish("failed")
+            return
+        operation.finish("ok" if not result["errors"] else "failed")
+
+
+def open_synthetic_data_dialog(app):
+    """Ask for the dataset size and generate it in the background."""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Generate Synthetic Data")
+    dialog.transient(app.root)
+    
+    frame = ttk.Frame(dialog, padding="10")
+    frame.pack(fill=tk.BOTH, expand=True)
+    
+    database = tk.StringVar(value="main")
+    scale = tk.DoubleVar(value=100)
+    rows = tk.StringVar(value="")
+    seed = tk.IntVar(value=DEFAULT_SEED)
+    workers = tk.IntVar(value=os.cpu_count() or 2)
+    
+    ttk.Label(
+        frame,
+        text="Replaces the data in the seeded tables with a dataset shaped like the seed CSVs. "
+             "Logins (users, roles) are kept.",
+        wraplength=420, justify=tk.LEFT
+    ).grid(row=0, column=0, columnspan=2, sticky=tk.W, pady=(0, 10))
+    ttk.Label(frame, text="Database:").grid(row=1, column=0, sticky=tk.W, pady=3)
+    ttk.Combobox(frame, textvariable=database, values=["main", "sim"], state="readonly", width=8).grid(row=1, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Scale factor:").grid(row=2, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=scale, width=12).grid(row=2, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Row counts (e.g. members=1M):").grid(row=3, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=rows, width=40).grid(row=3, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Random seed:").grid(row=4, column=0, sticky=tk.W, pady=3)
+    ttk.Entry(frame, textvariable=seed, width=12).grid(row=4, column=1, sticky=tk.W)
+    ttk.Label(frame, text="Worker processes:").grid(row=5, column=0, sticky=tk.W, pady=3)
+    ttk.Spinbox(frame, from_=1, to=64, textvariable=workers, width=6).grid(row=5, column=1, sticky=tk.W)
+    
+    def start():
+        try:
+            counts = parse_row_counts(rows.get().replace(",", " ").split())
+            plan = DatasetPlan(load_schema(), seed_files(), scale=scale.get(), rows=counts, seed=seed.get())
+            args = (app, database.get(), plan, scale.get(), workers.get())
+        except (OSError, ValueError, tk.TclError) as e:
+            messagebox.showerror("Input Error", str(e), parent=dialog)
+            return
+        wiped = sorted(set(plan.cascaded_tables()) & EXCLUDED_TABLES)
+        if wiped:
+            messagebox.showerror("Not Loaded", f"Truncating the dataset would also empty {', '.join(wiped)}.", parent=dialog)
+            return
+        message = "\n\n".join([f"This replaces the data in {len(plan.order)} tables of the {database.get()} database."]
+                              + load_effects(plan.schema, plan.order) + ["Continue?"])
+        if not messagebox.askyesno("Confirm", message, parent=dialog):
+            return
+        dialog.destroy()
+        threading.Thread(target=run_synthetic_data, args=args, daemon=True).start()
+    
+    ttk.Button(frame, text="Generate", command=start).grid(row=6, column=0, columnspan=2, pady=10)
+
+
+def main(argv=None):
+    """Generate a dataset from the command line."""
+    parser = argparse.ArgumentParser(description="Generate synthetic CLEO SPA data shaped by the seed CSVs")
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiplier on the seed row counts of scaled tables')
+    parser.add_argument('--rows', action='append', metavar='TABLE=COUNT', help='Row count for a table, e.g. members=1M')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed; the same seed gives the same data')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--shard-rows', type=int, default=SHARD_ROWS, help='Rows per shard')
+    parser.add_argument('--time-span-days', type=int, default=365, help='Minimum span of generated timestamps')
+    parser.add_argument('--schema', help='schema.sql to read (default: the project\'s)')
+    parser.add_argument('--seed-dir', help='Seed directory to profile (default: the project\'s)')
+    parser.add_argument('--output', help='Write COPY text files to this directory instead of loading')
+    parser.add_argument('--container', help='Database container to COPY into')
+    parser.add_argument('--database', default="my_db", help='Database name')
+    parser.add_argument('--user', default="user", help='Database user')
+    parser.add_argument('--keep-triggers', action='store_true', help='Check foreign keys and run triggers while loading')
+    parser.add_argument('--plan', action='store_true', help='Print the row counts and exit')
+    args = parser.parse_args(argv)
+    
+    try:
+        plan = DatasetPlan(load_schema(args.schema), seed_files(args.seed_dir), scale=args.scale,
+                           rows=parse_row_counts(args.rows), seed=args.seed, time_span_days=args.time_span_days)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.plan:
+        for name in plan.order:
+            source = "seed" if name in plan.reference_rows else "generated"
+            print(f"{name:<40} {plan.counts[name]:>14,}  {source}")
+        for line in plan.notes() + load_effects(plan.schema, plan.order):
+            print(line)
+        return 0
+    
+    if args.output:
+        target = {"output": args.output}
+    elif args.container:
+        target = {"container": args.container, "database": args.database, "user": args.user,
+                  "skip_triggers": not args.keep_triggers}
+    else:
+        parser.error("give --container to load into a database or --output to write files")
+    
+    name = "files" if args.output else args.database
+    with record_operation("synthetic-data", name, output=args.output, scale=args.scale, seed=args.seed) as operation:
+        result = generate_dataset(plan, target, args.workers, args.shard_rows, operation=operation)
+        operation.finish("ok" if not result["errors"] else "failed")
+    return 0 if not result["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
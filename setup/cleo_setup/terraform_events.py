@@ -0,0 +1,160 @@
+"""
+Parsing of Terraform's machine-readable (-json) output.
+
+Terraform run with -json prints one JSON message per line. TerraformEventStream
+turns those messages into console lines with per-resource elapsed times and,
+once the run is over, a report of the resources that took the longest.
+"""
+import json
+import time
+
+# Resource types whose create/delete waits on AWS polling for minutes
+LONG_POLLING_TYPES = {
+    "aws_db_instance", "aws_rds_cluster", "aws_rds_cluster_instance",
+    "aws_instance", "aws_nat_gateway", "aws_elasticache_cluster",
+    "aws_cloudfront_distribution", "aws_eks_cluster"
+}
+
+ACTION_VERBS = {
+    "create": "Creating",
+    "update": "Modifying",
+    "delete": "Destroying",
+    "replace": "Replacing",
+    "read": "Reading",
+    "noop": "Checking"
+}
+
+
+def _resource_type(resource):
+    """
+    Get the type of the resource a hook event refers to.
+    
+    Args:
+        resource: The hook's resource object, with resource_type and an addr like module.x.aws_instance.app[0]
+    
+    Returns:
+        The resource type, such as aws_instance
+    """
+    if resource.get("resource_type"):
+        return resource["resource_type"]
+    address = resource.get("addr", "")
+    parts = [part for part in address.split(".") if part not in ("module", "data")]
+    return parts[-2] if len(parts) >= 2 else address
+
+
+class TerraformEventStream:
+    """Track resource progress from the lines of a terraform -json run."""
+    
+    def __init__(self):
+        """Initialize an empty tracker."""
+        self.started_at = time.monotonic()
+        self.resources = {}
+        self.diagnostics = []
+    
+    def handle(self, line):
+        """
+        Process one line of output.
+        
+        Args:
+            line (str): A line printed by terraform or docker.
+        
+        Returns:
+            list: (message, color) pairs to show in the console
+        """
+        line = line.strip()
+        if not line:
+            return []
+        try:
+            event = json.loads(line)
+        except ValueError:
+            # Not a terraform message, e.g. docker pulling the image
+            return [(line, "white")]
+        if not isinstance(event, dict):
+            return [(line, "white")]
+        
+        event_type = event.get("type")
+        hook = event.get("hook", {})
+        address = hook.get("resource", {}).get("addr", "")
+        
+        if event_type == "apply_start":
+            action = hook.get("action", "")
+            self.resources[address] = {
+                "action": action,
+                "type": _resource_type(hook.get("resource", {})),
+                "started": time.monotonic(),
+                "elapsed": None,
+                "status": "running"
+            }
+            return [(f"  {address}: {ACTION_VERBS.get(action, action.title())}...", "cyan")]
+        
+        if event_type == "apply_progress":
+            elapsed = hook.get("elapsed_seconds", 0)
+            resource = self.resources.get(address)
+            if resource:
+                resource["elapsed"] = elapsed
+            return [(f"  {address}: still {ACTION_VERBS.get(hook.get('action', ''), 'working').lower()} [{elapsed}s elapsed]", "white")]
+        
+        if event_type in ("apply_complete", "apply_errored"):
+            elapsed = hook.get("elapsed_seconds", 0)
+            resource = self.resources.setdefault(address, {
+                "action": hook.get("action", ""),
+                "type": _resource_type(hook.get("resource", {})),
+                "started": None,
+                "status": None
+            })
+            resource["elapsed"] = elapsed
+            if event_type == "apply_complete":
+                resource["status"] = "complete"
+                return [(f"  {address}: done after {elapsed}s", "green")]
+            resource["status"] = "errored"
+            return [(f"  {address}: failed after {elapsed}s", "red")]
+        
+        if event_type == "diagnostic":
+            diagnostic = event.get("diagnostic", {})
+            self.diagnostics.append(diagnostic)
+            color = "red" if diagnostic.get("severity") == "error" else "yellow"
+            lines = [(f"{diagnostic.get('severity', 'warning').title()}: {diagnostic.get('summary', '')}", color)]
+            if diagnostic.get("detail"):
+                lines.append((f"  {diagnostic['detail']}", color))
+            return lines
+        
+        if event_type in ("planned_change", "refresh_start", "refresh_complete", "provision_progress"):
+            # Too chatty for the console; the plan summary lists the changes
+            return []
+        
+        message = event.get("@message")
+        return [(message, "white")] if message else []
+    
+    @property
+    def errors(self):
+        """Error diagnostics seen so far."""
+        return [d for d in self.diagnostics if d.get("severity") == "error"]
+    
+    def report(self, limit=10):
+        """
+        Rank the resources that took the longest.
+        
+        Args:
+            limit (int): Number of resources to list.
+        
+        Returns:
+            list: (message, color) pairs to show in the console
+        """
+        timed = [(address, r) for address, r in self.resources.items() if r.get("elapsed") is not None]
+        if not timed:
+            return []
+        
+        total = time.monotonic() - self.started_at
+        timed.sort(key=lambda item: item[1]["elapsed"], reverse=True)
+        lines = [("\n---- SLOWEST RESOURCES ----", "green")]
+        for address, resource in timed[:limit]:
+            elapsed = resource["elapsed"]
+            share = f"{min(elapsed / total, 1):4.0%}" if total > 0 else "  - "
+            note = "  (long-polling)" if resource["type"] in LONG_POLLING_TYPES else ""
+            status = "" if resource["status"] == "complete" else f"  [{resource['status']}]"
+            color = "yellow" if note else "white"
+            lines.append((f"  {elapsed:>6}s {share}  {address}{note}{status}", color))
+        
+        resource_seconds = sum(resource["elapsed"] for _, resource in timed)
+        lines.append((f"{len(timed)} resources, {resource_seconds}s of resource time in {total:.0f}s wall time", "cyan"))
+        return lines
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Embedded resource database for the CLEO SPA Setup application.
+
+Templates and assets are stored in a single SQLite file (resources.db) generated
+by the build. Each resource is stored compressed together with the SHA-256 of its
+content, so it can be loaded with one indexed query and extracted to disk only
+when the copy already there is missing or different.
+
+This module only depends on the standard library so the build script can load it
+directly to generate the database.
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import zlib
+from pathlib import Path
+
+RESOURCE_DB_NAME = "resources.db"
+
+# Logical resource names and the project files they resolve to, in order of
+# preference. The build resolves them into the manifest and the database;
+# development mode probes them directly.
+RESOURCE_CANDIDATES = {
+    "terraform.tfvars.template": ["terraform/terraform.tfvars", "terraform/terraform.tfvars.template"],
+    "compose.yml.template": ["compose.yml", "docker-compose.yml"],
+    "server.env.template": ["server/.env.template", "server/.env.example", "server/.env"],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS resources (
+    name TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    compression TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL
+)
+"""
+
+_lock = threading.Lock()
+_connection = {"path": None, "conn": None}
+
+
+def get_database_path():
+    """Get the path of the resource database shipped with the application."""
+    if getattr(sys, 'frozen', False) and hasattr(sys, '_MEIPASS'):
+        base_path = Path(sys._MEIPASS) / "cleo_setup" / "resources"
+    else:
+        base_path = Path(__file__).parent.parent / "resources"
+    return base_path / RESOURCE_DB_NAME
+
+
+def _get_connection():
+    """Open the resource database read-only, once."""
+    db_path = get_database_path()
+    with _lock:
+        if _connection["path"] == db_path and _connection["conn"] is not None:
+            return _connection["conn"]
+        if not db_path.exists():
+            return None
+        conn = sqlite3.connect(f"{db_path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        _connection["path"] = db_path
+        _connection["conn"] = conn
+        return conn
+
+
+def _query(sql, params):
+    """Run a single-row query against the resource database."""
+    conn = _get_connection()
+    if conn is None:
+        return None
+    with _lock:
+        return conn.execute(sql, params).fetchone()
+
+
+def _decompress(content, compression):
+    """Decompress stored resource content."""
+    if compression == "zlib":
+        return zlib.decompress(content)
+    return bytes(content)
+
+
+def get_resource_bytes(name):
+    """
+    Get the raw content of a resource.
+    
+    Args:
+        name (str): The name of the resource.
+    
+    Returns:
+        tuple: (content bytes, sha256) or None if not found.
+    """
+    row = _query("SELECT content, compression, sha256 FROM resources WHERE name = ?", (name,))
+    if row is None:
+        return None
+    return _decompress(row[0], row[1]), row[2]
+
+
+def get_resource(name):
+    """
+    Get a text resource.
+    
+    Args:
+        name (str): The name of the resource.
+    
+    Returns:
+        tuple: (content, sha256) or None if not found.
+    """
+    resource = get_resource_bytes(name)
+    if resource is None:
+        return None
+    return resource[0].decode('utf-8'), resource[1]
+
+
+def _file_matches(path, size, sha256):
+    """Check if a file on disk already has the given size and content hash."""
+    try:
+        if os.path.getsize(path) != size:
+            return False
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest() == sha256
+    except OSError:
+        return False
+
+
+def extract_resource_to_file(name, target_path):
+    """
+    Extract a resource to a file, skipping the write if the file is already current.
+    
+    Args:
+        name (str): The name of the resource.
+        target_path (str): The path to write the resource to.
+    
+    Returns:
+        bool: True if the file holds the resource, False if not found or on error.
+    """
+    row = _query("SELECT size, sha256 FROM resources WHERE name = ?", (name,))
+    if row is None:
+        return False
+    
+    size, sha256 = row
+    if _file_matches(target_path, size, sha256):
+        return True
+    
+    try:
+        content, _ = get_resource_bytes(name)
+        target_dir = os.path.dirname(os.path.abspath(target_path))
+        os.makedirs(target_dir, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=target_dir, prefix=".resource-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_name, target_path)
+        except Exception:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+            raise
+        return True
+    except Exception as e:
+        print(f"Error extracting resource {name}: {e}")
+        return False
+
+
+def create_resource_database(db_path, resources):
+    """
+    Create the resource database. Used by the build.
+    
+    Args:
+        db_path (Path): Where to write the database.
+        resources (dict): Mapping of resource name -> source file path.
+    
+    Returns:
+        dict: Counts of stored resources and raw and stored bytes
+    """
+    db_path = Path(db_path)
+    if db_path.exists():
+        db_path.unlink()
+    
+    stats = {"resources": 0, "raw_bytes": 0, "stored_bytes": 0}
+    conn = sqlite3.connect(str(db_path))
+    try:
+        conn.execute(SCHEMA)
+        for name, source in sorted(resources.items()):
+            data = Path(source).read_bytes()
+            compressed = zlib.compress(data, 9)
+            # Keep small or incompressible resources as they are
+            if len(compressed) < len(data):
+                content, compression = compressed, "zlib"
+            else:
+                content, compression = data, "none"
+            conn.execute(
+                "INSERT INTO resources (name, content, compression, sha256, size) VALUES (?, ?, ?, ?, ?)",
+                (name, content, compression, hashlib.sha256(data).hexdigest(), len(data))
+            )
+            stats["resources"] += 1
+            stats["raw_bytes"] += len(data)
+            stats["stored_bytes"] += len(content)
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    return stats
@@ -3,9 +3,183 @@
 Environment variable handling for the CLEO SPA Setup application.
 """
 import os
-import re
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from .resources import get_template_content, save_template_to_file
+
+_umask_lock = threading.Lock()
+
+
+def _current_umask():
+    """Read the process umask; os.umask can only be read by setting it."""
+    with _umask_lock:
+        mask = os.umask(0o022)
+        os.umask(mask)
+    return mask
+
+
+def write_file_atomic(path, content):
+    """
+    Write a text file atomically.
+    
+    The content is written to a temporary file in the same directory, flushed and
+    fsynced, then renamed over the target, so a crash never leaves a truncated file.
+    
+    Args:
+        path (str): The path to write.
+        content (str): The text content.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        # Keep the permissions of the file being replaced; a new file gets the
+        # usual umask-based mode instead of mkstemp's 0600
+        if path.exists():
+            os.chmod(tmp_name, path.stat().st_mode & 0o777)
+        else:
+            os.chmod(tmp_name, 0o666 & ~_current_umask())
+        os.replace(tmp_name, path)
+    except Exception:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+        raise
+
+
+class EnvStore:
+    """
+    Cached, comment-preserving view of a .env file.
+    
+    The file is parsed once into its original lines plus an index of key -> line,
+    and the parse is reused until the file's mtime or size changes. Updates made
+    inside a transaction are written together in a single atomic write.
+    """
+    
+    _cache = {}
+    _lock = threading.RLock()
+    
+    def __init__(self, env_path):
+        """Initialize the store for a .env file."""
+        self.env_path = Path(env_path)
+        self._pending = None
+        self._pending_comments = None
+    
+    def _stamp(self):
+        """Return the (mtime, size) pair used to validate the cache, or None if missing."""
+        try:
+            stat = self.env_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    @staticmethod
+    def _parse(lines):
+        """Build the key -> line index for a list of raw lines."""
+        index = {}
+        for line_number, line in enumerate(lines):
+            stripped = line.strip()
+            # Skip comments and empty lines
+            if not stripped or stripped.startswith('#') or '=' not in stripped:
+                continue
+            key, value = stripped.split('=', 1)
+            index[key.strip()] = (line_number, value.strip())
+        return index
+    
+    def _load(self):
+        """Return the cached (lines, index) for the file, re-reading it only if it changed."""
+        stamp = self._stamp()
+        with self._lock:
+            cached = self._cache.get(self.env_path)
+            if cached and cached[0] == stamp:
+                return cached[1], cached[2]
+            
+            lines = []
+            if stamp is not None:
+                with open(self.env_path, 'r') as f:
+                    lines = f.readlines()
+            if lines and not lines[-1].endswith('\n'):
+                lines[-1] += '\n'
+            index = self._parse(lines)
+            self._cache[self.env_path] = (stamp, lines, index)
+            return lines, index
+    
+    def get(self, key, default=None):
+        """Get a variable, including any update pending in the current transaction."""
+        if self._pending and key in self._pending:
+            return self._pending[key]
+        _, index = self._load()
+        if key in index:
+            return index[key][1]
+        return default
+    
+    def as_dict(self):
+        """Return all variables as a dictionary."""
+        _, index = self._load()
+        env_vars = {key: value for key, (_, value) in index.items()}
+        if self._pending:
+            env_vars.update(self._pending)
+        return env_vars
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Group several updates into a single atomic write.
+        
+        Updates are only written if the block completes without an exception.
+        """
+        if self._pending is not None:
+            # Nested transactions join the outer one
+            yield self
+            return
+        self._pending = {}
+        self._pending_comments = {}
+        try:
+            yield self
+            if self._pending:
+                self._commit(self._pending, self._pending_comments)
+        finally:
+            self._pending = None
+            self._pending_comments = None
+    
+    def set(self, key, value, comment=None):
+        """Set a variable, writing immediately unless inside a transaction."""
+        self.update({key: value}, {key: comment} if comment else None)
+    
+    def update(self, env_vars, comments=None):
+        """Set several variables, writing immediately unless inside a transaction."""
+        if self._pending is not None:
+            self._pending.update(env_vars)
+            self._pending_comments.update(comments or {})
+            return
+        self._commit(env_vars, comments or {})
+    
+    def _commit(self, env_vars, comments):
+        """Apply updates to the parsed lines and write the file atomically."""
+        with self._lock:
+            lines, index = self._load()
+            new_lines = list(lines)
+            
+            # Update values for existing variables in place
+            for key, value in env_vars.items():
+                if key in index:
+                    new_lines[index[key][0]] = f"{key}={value}\n"
+            
+            # Add any new variables
+            for key, value in env_vars.items():
+                if key not in index:
+                    # Add comment if provided
+                    if comments.get(key):
+                        new_lines.append(f"\n# {comments[key]}\n")
+                    new_lines.append(f"{key}={value}\n")
+            
+            write_file_atomic(self.env_path, ''.join(new_lines))
+            self._cache[self.env_path] = (self._stamp(), new_lines, self._parse(new_lines))
+
 
 def load_env_file(env_path):
     """
@@ -17,24 +191,11 @@ def load_env_file(env_path):
     Returns:
         dict: A dictionary of environment variables.
     """
-    env_vars = {}
-    
     try:
-        with open(env_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                # Skip comments and empty lines
-                if not line or line.startswith('#'):
-                    continue
-                
-                # Parse variable
-                if '=' in line:
-                    key, value = line.split('=', 1)
-                    env_vars[key.strip()] = value.strip()
+        return EnvStore(env_path).as_dict()
     except Exception as e:
         print(f"Error loading .env file: {e}")
-    
-    return env_vars
+        return {}
 
 def save_env_file(env_path, env_vars, comments=None):
     """
@@ -49,45 +210,7 @@ def save_env_file(env_path, env_vars, comments=None):
         bool: True if successful, False otherwise.
     """
     try:
-        # Read existing file to preserve comments and formatting
-        existing_lines = []
-        if os.path.exists(env_path):
-            with open(env_path, 'r') as f:
-                existing_lines = f.readlines()
-        
-        # Process existing lines to update values
-        new_lines = []
-        used_keys = set()
-        
-        for line in existing_lines:
-            stripped = line.strip()
-            # Keep comments and empty lines
-            if not stripped or stripped.startswith('#'):
-                new_lines.append(line)
-                continue
-            
-            # Update values for existing variables
-            if '=' in stripped:
-                key, _ = stripped.split('=', 1)
-                key = key.strip()
-                if key in env_vars:
-                    new_lines.append(f"{key}={env_vars[key]}\n")
-                    used_keys.add(key)
-                else:
-                    new_lines.append(line)
-        
-        # Add any new variables
-        for key, value in env_vars.items():
-            if key not in used_keys:
-                # Add comment if provided
-                if comments and key in comments:
-                    new_lines.append(f"\n# {comments[key]}\n")
-                new_lines.append(f"{key}={value}\n")
-        
-        # Write the updated file
-        with open(env_path, 'w') as f:
-            f.writelines(new_lines)
-        
+        EnvStore(env_path).update(env_vars, comments)
         return True
     except Exception as e:
         print(f"Error saving .env file: {e}")
@@ -105,6 +228,8 @@ def create_env_file_from_template(template_name, target_path, variables=None):
     Returns:
         bool: True if successful, False otherwise.
     """
+    from .resources import get_template_content
+    
     # Get template content
     content = get_template_content(template_name)
     if not content:
@@ -118,8 +243,7 @@ def create_env_file_from_template(template_name, target_path, variables=None):
     
     # Write to target file
     try:
-        with open(target_path, 'w') as f:
-            f.write(content)
+        write_file_atomic(target_path, content)
         return True
     except Exception as e:
         print(f"Error creating .env file: {e}")
@@ -137,9 +261,7 @@ def update_env_variable(env_path, key, value):
     Returns:
         bool: True if successful, False otherwise.
     """
-    env_vars = load_env_file(env_path)
-    env_vars[key] = value
-    return save_env_file(env_path, env_vars)
+    return save_env_file(env_path, {key: value})
 
 def get_env_variable(env_path, key, default=None):
     """
@@ -153,5 +275,8 @@ def get_env_variable(env_path, key, default=None):
     Returns:
         str: The variable value or default if not found.
     """
-    env_vars = load_env_file(env_path)
-    return env_vars.get(key, default)
+    try:
+        return EnvStore(env_path).get(key, default)
+    except Exception as e:
+        print(f"Error loading .env file: {e}")
+        return default
@@ -0,0 +1,151 @@
+"""
+Memoized resolution of the CLEO SPA installation and project root.
+
+The installation is resolved once and reused until the CLEO_SPA_PROJECT_PATH
+environment variable or ~/.cleo-spa/config.json changes, so button handlers can
+ask for the project root without probing the filesystem every time.
+"""
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+CONFIG_PATH = Path.home() / ".cleo-spa" / "config.json"
+
+_lock = threading.Lock()
+_config_cache = {"stamp": None, "config": {}}
+_location_cache = {}
+
+
+def _file_stamp(path):
+    """Return (mtime, size) for a file, or None if it does not exist."""
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _cache_key():
+    """The inputs that invalidate a resolved location when they change."""
+    return (os.environ.get('CLEO_SPA_PROJECT_PATH'), _file_stamp(CONFIG_PATH))
+
+
+def read_install_config():
+    """
+    Read ~/.cleo-spa/config.json, re-parsing it only when the file changes.
+    
+    Returns:
+        dict: The parsed config, or an empty dict if missing or invalid
+    """
+    stamp = _file_stamp(CONFIG_PATH)
+    with _lock:
+        if _config_cache["stamp"] == stamp and stamp is not None:
+            return _config_cache["config"]
+        config = {}
+        if stamp is not None:
+            try:
+                with open(CONFIG_PATH) as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                config = {}
+        _config_cache["stamp"] = stamp
+        _config_cache["config"] = config
+        return config
+
+
+def clear_location_cache():
+    """Forget all resolved locations and the parsed config."""
+    with _lock:
+        _config_cache["stamp"] = None
+        _config_cache["config"] = {}
+        _location_cache.clear()
+
+
+def _find_installation():
+    """Probe the environment, the config and common locations for an installation."""
+    # Check environment variable first
+    env_path = os.environ.get('CLEO_SPA_PROJECT_PATH')
+    if env_path and Path(env_path).exists():
+        return Path(env_path)
+    
+    # Check fixed config location (primary method)
+    config = read_install_config()
+    if config.get("setup_completed"):
+        # Prefer the selected version when versioned releases are installed
+        active_version = config.get("versions", {}).get(config.get("active_version"), {})
+        install_path = Path(active_version.get("path") or config.get("installation_path", ""))
+        if str(install_path) not in ("", ".") and install_path.exists():
+            return install_path
+    
+    # Fallback: Check common installation locations for local config files
+    possible_locations = [
+        Path.home() / "CLEO-SPA",
+        Path.home() / "Documents" / "CLEO-SPA",
+        Path("C:/Program Files/CLEO-SPA") if sys.platform == "win32" else None,
+        Path("/opt/cleo-spa") if sys.platform.startswith("linux") else None,
+        Path("/Applications/CLEO-SPA") if sys.platform == "darwin" else None
+    ]
+    
+    for location in possible_locations:
+        if location and location.exists():
+            config_file = location / ".cleo-setup" / "config.json"
+            if config_file.exists():
+                try:
+                    with open(config_file) as f:
+                        local_config = json.load(f)
+                    if local_config.get("setup_completed"):
+                        return location
+                except (OSError, ValueError):
+                    continue
+    
+    return None
+
+
+def _memoized(name, resolve):
+    """Return a cached location, resolving it again only if its inputs changed."""
+    key = _cache_key()
+    cached = _location_cache.get(name)
+    if cached and cached[0] == key:
+        return cached[1]
+    value = resolve()
+    _location_cache[name] = (key, value)
+    return value
+
+
+def resolve_installation():
+    """
+    Get the installation path of the CLEO SPA project files.
+    
+    Returns:
+        Path or None: Installation path if found, None otherwise
+    """
+    return _memoized("installation", _find_installation)
+
+
+def _default_project_root():
+    """Resolve the project root when no installation is recorded."""
+    installation = resolve_installation()
+    if installation:
+        return installation
+    
+    if getattr(sys, 'frozen', False):
+        # Running as executable but no installation found
+        # Use a folder in the user's documents for the project files
+        user_docs = Path.home() / "Documents" / "CLEO-SPA"
+        user_docs.mkdir(exist_ok=True, parents=True)
+        return user_docs
+    
+    # Running as script - development mode
+    return Path(__file__).parent.parent.parent
+
+
+def resolve_project_root():
+    """
+    Get the project root directory.
+    
+    Returns:
+        Path: The installed project files, or the source tree in development mode
+    """
+    return _memoized("project_root", _default_project_root)
@@ -0,0 +1,145 @@
+"""
+psql and COPY through docker exec for the databases of the local stack.
+
+Every tool that talks to a database runs psql inside its container, so
+nothing needs a PostgreSQL client or an open port on the host. A target is a
+dict with the container, database and user, plus skip_triggers for loads.
+"""
+import re
+import subprocess
+
+# Hour-only UTC offsets as PostgreSQL prints them, e.g. "2024-01-01 10:00:00+02"
+_TZ_SUFFIX = re.compile(r'([+-]\d{2})$')
+
+
+def psql_command(target, *options):
+    """Build the docker exec psql command for a target, with extra psql options appended."""
+    return ["docker", "exec", "-i", target["container"], "psql", "-h", "localhost", "-p", "5432",
+            "-U", target["user"], "-d", target["database"]] + list(options)
+
+
+def _run(command, sql):
+    """Run a psql command with SQL on stdin."""
+    return subprocess.run(
+        command, input=sql, capture_output=True, text=True, encoding='utf-8',
+        creationflags=subprocess.CREATE_NO_WINDOW if hasattr(subprocess, 'CREATE_NO_WINDOW') else 0
+    )
+
+
+def psql(target, sql):
+    """
+    Run SQL through psql in the database container.
+    
+    Returns:
+        str: psql's output in its default format
+    
+    Raises:
+        RuntimeError: With psql's error output when a statement fails.
+    """
+    result = _run(psql_command(target, "-v", "ON_ERROR_STOP=1", "-q"), sql)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip())
+    return result.stdout
+
+
+def query(target, sql, stop_on_error=True):
+    """
+    Run SQL through psql without psqlrc, printing rows only, unaligned.
+    
+    Args:
+        target (dict): container, database and user.
+        sql (str): Statements and psql meta-commands.
+        stop_on_error (bool): Stop at the first failing statement.
+    
+    Returns:
+        tuple: (stdout, stderr)
+    
+    Raises:
+        RuntimeError: With the ERROR and FATAL lines when psql fails.
+    """
+    options = ["-X", "-q", "-t", "-A"] + (["-v", "ON_ERROR_STOP=1"] if stop_on_error else [])
+    result = _run(psql_command(target, *options), sql)
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if "ERROR" in line or "FATAL" in line]
+        raise RuntimeError("\n".join(errors) or result.stderr.strip() or f"psql exited with {result.returncode}")
+    return result.stdout, result.stderr
+
+
+def copy_command(target, table, columns, skip_triggers=True, binary=False):
+    """Build the docker exec psql command that COPYs its stdin, text or binary format, into a table."""
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    command = psql_command(target, "-v", "ON_ERROR_STOP=1", "-q")
+    if skip_triggers:
+        # Rows are consistent by construction, so foreign key and user triggers can be skipped
+        command += ["-c", "SET session_replication_role = replica"]
+    return command + ["-c", f'COPY "{table}" ({column_list}) FROM STDIN' + (" (FORMAT binary)" if binary else "")]
+
+
+def upsert_command(target, table, columns, key, skip_triggers=True):
+    """
+    Build the docker exec psql command that COPYs its stdin into a staging
+    table and merges it into a table on its key, so nothing else is deleted.
+    
+    Args:
+        target (dict): container, database and user.
+        table (str): Table to merge into.
+        columns (list): Columns of the COPY text.
+        key (list): Primary key columns to match rows on.
+        skip_triggers (bool): Skip foreign key and user triggers.
+    
+    Returns:
+        list: The command
+    """
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    staging = f"{table}_upsert"
+    command = psql_command(target, "-v", "ON_ERROR_STOP=1", "-q")
+    if skip_triggers:
+        command += ["-c", "SET session_replication_role = replica"]
+    return command + [
+        "-c", f'CREATE TEMP TABLE "{staging}" AS SELECT {column_list} FROM "{table}" WITH NO DATA',
+        "-c", f'COPY "{staging}" ({column_list}) FROM STDIN',
+        "-c", upsert_statement(table, staging, columns, key),
+    ]
+
+
+def upsert_statement(table, staging, columns, key):
+    """SQL that merges a staging table into a table on its key columns."""
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    key_list = ", ".join(f'"{column}"' for column in key)
+    updates = ", ".join(f'"{column}" = EXCLUDED."{column}"' for column in columns if column not in key)
+    return (f'INSERT INTO "{table}" ({column_list}) SELECT {column_list} FROM "{staging}" '
+            f'ON CONFLICT ({key_list}) DO {"UPDATE SET " + updates if updates else "NOTHING"}')
+
+
+def setval_statements(table, columns):
+    """SQL that moves the sequences of a table's serial columns past the largest id in it."""
+    return [
+        f"SELECT setval(pg_get_serial_sequence('\"{table}\"', '{column}'), "
+        f"COALESCE((SELECT MAX(\"{column}\") FROM \"{table}\"), 0) + 1, false);"
+        for column in columns
+    ]
+
+
+def normalize_timestamp(value):
+    """Rewrite a timestamp as datetime.fromisoformat reads it: space separator, +HH:MM offsets."""
+    value = value.strip().replace("T", " ").replace("Z", "+00:00")
+    return _TZ_SUFFIX.sub(r'\1:00', value)
+
+
+def local_target(app, database):
+    """
+    Build the target of the main or simulation database of the local stack.
+    
+    Args:
+        app: The application, for the database settings and container lookup.
+        database (str): "main" or "sim".
+    
+    Returns:
+        dict: container, database, user and skip_triggers, or None when the container is not running
+    """
+    from ..local_development import get_database_container_name
+    service, name = ("db-sim", app.local_sim_db_name.get()) if database == "sim" else ("db", app.local_db_name.get())
+    container = get_database_container_name(app, service)
+    if not container:
+        return None
+    return {"container": container, "database": name, "user": app.local_db_user.get(), "skip_triggers": True}
@@ -5,8 +5,10 @@ Resource utilities for the CLEO SPA Setup application.
 import os
 import sys
 import tempfile
-from pathlib import Path
 from .database import get_resource, extract_resource_to_file
+from .env import write_file_atomic
+from .locations import resolve_project_root
+from .utils import get_resource_path as resolve_resource_path
 
 def get_resource_path(resource_name):
     """
@@ -18,24 +20,19 @@ def get_resource_path(resource_name):
     Returns:
         str: The path to the resource or None if not found.
     """
-    # First, check if we're in development mode and the file exists directly
-    dev_resource_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'resources', resource_name)
-    if os.path.exists(dev_resource_path):
-        return dev_resource_path
-    
-    # In PyInstaller mode, check _MEIPASS
-    if hasattr(sys, '_MEIPASS'):
-        resource_path = os.path.join(sys._MEIPASS, 'cleo_setup', 'resources', resource_name)
-        if os.path.exists(resource_path):
-            return resource_path
-    
-    # If we couldn't find the resource directly, try to extract it from the database
-    # Create a temporary directory if needed
+    # The frozen executable serves resources from the embedded database, extracting
+    # them to a temporary directory; unchanged files there are reused as they are
     temp_dir = os.path.join(tempfile.gettempdir(), 'cleo_spa_resources')
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    # Extract the resource to a temporary file
     temp_file = os.path.join(temp_dir, resource_name)
+    if getattr(sys, 'frozen', False) and extract_resource_to_file(resource_name, temp_file):
+        return temp_file
+    
+    # Otherwise resolve the resource from the manifest (frozen) or the project tree (development)
+    resource_path = resolve_resource_path(resource_name)
+    if resource_path.exists():
+        return str(resource_path)
+    
+    # Last resort: a database built alongside the source tree
     if extract_resource_to_file(resource_name, temp_file):
         return temp_file
     
@@ -55,6 +52,11 @@ def get_template_content(template_name):
     resource = get_resource(template_name)
     if resource:
         return resource[0]
+    
+    # Development mode has no database; read the template from the project tree
+    resource_path = resolve_resource_path(template_name)
+    if resource_path.exists():
+        return resource_path.read_text()
     return None
 
 def save_template_to_file(template_name, target_path):
@@ -68,7 +70,14 @@ def save_template_to_file(template_name, target_path):
     Returns:
         bool: True if successful, False otherwise.
     """
-    return extract_resource_to_file(template_name, target_path)
+    if extract_resource_to_file(template_name, target_path):
+        return True
+    
+    content = get_template_content(template_name)
+    if content is None:
+        return False
+    write_file_atomic(target_path, content)
+    return True
 
 def get_project_root():
     """
@@ -77,13 +86,4 @@ def get_project_root():
     Returns:
         Path: The path to the project root directory.
     """
-    # If we're in development mode
-    if os.path.exists(os.path.join(os.path.dirname(os.path.dirname(__file__)), '..', 'setup.py')):
-        return Path(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-    
-    # If we're in PyInstaller mode
-    if hasattr(sys, '_MEIPASS'):
-        return Path(os.getcwd())
-    
-    # Default to current directory
-    return Path(os.getcwd())
+    return resolve_project_root()
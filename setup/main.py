@@ -7,9 +7,12 @@ import os
 import sys
 import tkinter as tk
 import argparse
+import multiprocessing
 from pathlib import Path
 from cleo_setup import DeploymentApp
 from cleo_setup.installer import check_installation, run_installer
+from cleo_setup.store import list_versions, set_active_version
+from cleo_setup.prewarm import export_image_cache
 
 def main():
     """Main function to start the application."""
@@ -24,8 +27,32 @@ def main():
                        help='Force reinstallation even if already installed')
     parser.add_argument('--extract-only', action='store_true',
                        help='Only extract files, do not launch the setup tool')
+    parser.add_argument('--list-versions', action='store_true',
+                       help='List installed versioned releases and exit')
+    parser.add_argument('--use-version', type=str, default=None,
+                       help='Switch to an installed versioned release before starting')
+    parser.add_argument('--export-image-cache', action='store_true',
+                       help='Save the Docker images the project needs for offline use and exit')
     args = parser.parse_args()
     
+    # Manage versioned releases
+    if args.list_versions:
+        versions, active_version = list_versions()
+        if not versions:
+            print("No versioned releases installed.")
+        for version, info in sorted(versions.items()):
+            marker = "*" if version == active_version else " "
+            print(f"{marker} {version}  {info['path']}  (installed {info['installed_at']})")
+        sys.exit(0)
+    
+    if args.use_version:
+        try:
+            version_dir = set_active_version(args.use_version)
+        except ValueError as e:
+            print(str(e))
+            sys.exit(1)
+        print(f"Switched to version {args.use_version}: {version_dir}")
+    
     # Check if we're running as a frozen executable (built with PyInstaller)
     is_frozen = getattr(sys, 'frozen', False)
     
@@ -72,6 +99,11 @@ def main():
             os.environ['CLEO_SPA_PROJECT_PATH'] = str(install_path)
             print(f"Using installed project files from: {install_path}")
     
+    if args.export_image_cache:
+        saved = export_image_cache()
+        print(f"Saved {saved} images for offline use.")
+        sys.exit(0)
+    
     # Check if running in a container
     in_container = os.path.exists('/.dockerenv')
     
@@ -81,4 +113,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Worker processes of frozen builds re-run the executable; let them start as workers
+    multiprocessing.freeze_support()
     main()